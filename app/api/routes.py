@@ -1,15 +1,20 @@
 import os, json
-from fastapi import APIRouter, BackgroundTasks, HTTPException, Query
-from starlette.responses import PlainTextResponse
-from pydantic import BaseModel, EmailStr  
+from typing import Optional
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Query, Response
+from starlette.responses import PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, EmailStr, Field
 
 from app.metrics import get_metrics_text, CONTENT_TYPE_LATEST
 from app.models.schema import ScrapeRequest, ScrapeParams
-from app.services import scraper
-from app.utils.io_utils import tail_jsonl
+from app.services import cluster, scraper, verifier
+from app.services.exporter import export_rows, export_ndjson
+from app.utils import profiler, spans
+from app.utils.checkpoint import get_checkpoint
+from app.utils.email_index import get_index
+from app.utils.io_utils import page_jsonl
 from app.utils.kpi_from_file import kpi_from_emails_jsonl
-from app.utils.verify_email import verify_email  
-from app.config import OUT_PATH
+from app.utils.verify_email import verify_email, verify_batch
+from app.config import OUT_PATH, VERIFY_CONCURRENCY, VERIFY_BATCH_MAX, VERIFY_SMTP
 
 router = APIRouter()
 
@@ -26,7 +31,8 @@ def metrics():
 def kpi_latest():
     file_view = kpi_from_emails_jsonl(OUT_PATH)
     run_view = scraper.get_last_kpi() or {}
-    for k in ("run_seconds", "users_discovered", "users_with_hits", "hit_rate_percent"):
+    for k in ("run_seconds", "users_discovered", "users_discovered_partial", "users_visited", "users_with_hits",
+              "hit_rate_percent"):
         if k in run_view:
             file_view[k] = run_view[k]
     if file_view.get("new_emails_written", 0) == 0 and os.path.exists("kpi_latest.json"):
@@ -43,6 +49,8 @@ def kpi_latest():
 def start_scrape(req: ScrapeRequest, background: BackgroundTasks):
     if scraper.is_running():
         raise HTTPException(status_code=409, detail="Scrape already running")
+    if cluster.is_running():
+        raise HTTPException(status_code=409, detail="A sharded-run worker is running in this process")
     def _job():
         try:
             scraper.run_scrape(ScrapeParams(**req.model_dump()))
@@ -51,9 +59,122 @@ def start_scrape(req: ScrapeRequest, background: BackgroundTasks):
     background.add_task(_job)
     return {"status": "started", "params": req.model_dump()}
 
+@router.post("/cluster/start")
+def cluster_start(req: ScrapeRequest):
+    if cluster.is_running() or scraper.is_running():
+        raise HTTPException(status_code=409, detail="A scrape or worker is running in this process")
+    try:
+        return cluster.start_run(ScrapeParams(**req.model_dump()))
+    except RuntimeError as e:  # workers elsewhere still on the previous run
+        raise HTTPException(status_code=409, detail=str(e))
+
+@router.post("/cluster/worker")
+def cluster_worker(background: BackgroundTasks,
+                   threads: int = Query(1, ge=1, le=64, description="Tasks worked on in parallel")):
+    if cluster.is_running() or scraper.is_running():
+        raise HTTPException(status_code=409, detail="A scrape or worker is running in this process")
+    def _job():
+        try:
+            cluster.run_worker(threads=threads)
+        except Exception as e:
+            print("Worker error:", e)
+    background.add_task(_job)
+    return {"status": "started", "threads": threads}
+
+@router.get("/cluster/kpi")
+def cluster_kpi():
+    return cluster.cluster_kpi()
+
+@router.get("/scrape/checkpoint")
+def scrape_checkpoint():
+    return get_checkpoint().summary()
+
+@router.get("/scrape/timing")
+def scrape_timing():
+    """Span breakdown of the current/last run so far."""
+    return {"running": scraper.is_running() or cluster.is_running(), **spans.breakdown()}
+
+@router.get("/admin/profile")
+def admin_profile(seconds: float = Query(10.0, gt=0, le=120),
+                  interval: float = Query(0.01, ge=0.001, le=1.0),
+                  top: int = Query(25, ge=1, le=200),
+                  threads: Optional[str] = Query(None, description="only threads whose name starts with this"),
+                  format: str = Query("json", pattern="^(json|collapsed)$")):
+    # runs in the threadpool: sampling sleeps, the event loop and the scrape keep going
+    try:
+        prof = profiler.sample(seconds, interval, top, threads)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    if format == "collapsed":
+        return PlainTextResponse(prof["collapsed"] + "\n")
+    prof["scrape_running"] = scraper.is_running() or cluster.is_running()
+    return prof
+
 @router.get("/emails")
-def get_emails(limit: int = Query(50, ge=1, le=1000)):
-    return tail_jsonl(OUT_PATH, limit)
+def get_emails(
+    response: Response,
+    limit: int = Query(50, ge=1, le=1000),
+    after: Optional[int] = Query(None, ge=0, description="Rows starting at this byte offset"),
+    before: Optional[int] = Query(None, ge=0, description="Rows ending before this byte offset"),
+    domain: Optional[str] = Query(None, description="Email domain, e.g. gmail.com (indexed)"),
+    source: Optional[str] = Query(None, description="huggingface-profile, huggingface-model, website, github (indexed)"),
+    username: Optional[str] = Query(None, description="HF username (indexed)"),
+):
+    if after is not None and before is not None:
+        raise HTTPException(status_code=400, detail="Use either after or before, not both")
+    if domain is None and source is None and username is None:
+        rows, start, end = page_jsonl(OUT_PATH, limit, after=after, before=before)
+    else:
+        rows, start, end = _find_rows(limit, after, before, username=username, domain=domain, source=source)
+    # cursors: X-Cursor-Before pages to older rows, X-Cursor-After to newer ones
+    response.headers["X-Cursor-Before"] = str(start)
+    response.headers["X-Cursor-After"] = str(end)
+    return rows
+
+@router.get("/emails/by-user/{username}")
+def get_emails_by_user(
+    username: str,
+    response: Response,
+    limit: int = Query(100, ge=1, le=1000),
+    after: Optional[int] = Query(None, ge=0, description="Rows starting at this byte offset"),
+    before: Optional[int] = Query(None, ge=0, description="Rows ending before this byte offset"),
+):
+    if after is not None and before is not None:
+        raise HTTPException(status_code=400, detail="Use either after or before, not both")
+    rows, start, end = _find_rows(limit, after, before, username=username)
+    response.headers["X-Cursor-Before"] = str(start)
+    response.headers["X-Cursor-After"] = str(end)
+    return rows
+
+def _find_rows(limit: int, after: Optional[int], before: Optional[int], **filters):
+    # rows through the offset index of emails.jsonl: no scan of the file
+    if not os.path.exists(OUT_PATH):
+        return [], 0, 0
+    index = get_index(OUT_PATH)
+    hits = index.find(limit=limit, after=after, before=before, **filters)
+    if not hits:
+        at = after if after is not None else (before if before is not None else index.offset)
+        return [], at, at
+    return index.read_rows(hits), hits[0][0], hits[-1][0] + hits[-1][1]
+
+@router.get("/export")
+def export_emails(
+    source: Optional[str] = Query(None, description="huggingface-profile, huggingface-model, website, github"),
+    domain: Optional[str] = Query(None, description="Email domain, e.g. gmail.com"),
+    username: Optional[str] = Query(None),
+    status: Optional[str] = Query(None, pattern="^(valid|invalid|uncertain|unverified)$",
+                                  description="Verification status from the verification stage"),
+    with_status: bool = Query(False, description="Add a verification field to each row"),
+    gzip: bool = Query(False, description="gzip the NDJSON stream"),
+):
+    rows = export_rows(OUT_PATH, source=source, domain=domain, username=username,
+                       status=status, with_status=with_status)
+    name = "emails.ndjson.gz" if gzip else "emails.ndjson"
+    return StreamingResponse(
+        export_ndjson(rows, gzip=gzip),
+        media_type="application/gzip" if gzip else "application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="{name}"'},
+    )
 
 # ---- NEW: /verify endpoint ----
 class VerifyIn(BaseModel):
@@ -73,16 +194,66 @@ def verify_email_endpoint(
     res = verify_email(str(body.email), require_com=require_com, do_smtp=smtp)
     return {"email": body.email, **res}
 
+class VerifyBatchIn(BaseModel):
+    emails: list[str] = Field(..., min_length=1, max_length=VERIFY_BATCH_MAX)
+
+class VerifyBatchItem(BaseModel):
+    email: str
+    status: str
+    reasons: list[str]
+
+@router.post("/verify/batch", response_model=list[VerifyBatchItem])
+def verify_batch_endpoint(
+    body: VerifyBatchIn,
+    require_com: bool = Query(False, description="Only allow .com domains"),
+    smtp: bool = Query(False, description="Enable SMTP RCPT probe (one session per domain)"),
+    concurrency: int = Query(VERIFY_CONCURRENCY, ge=1, le=256, description="Domains checked in parallel"),
+):
+    return verify_batch(body.emails, require_com=require_com, do_smtp=smtp, concurrency=concurrency)
+
+@router.post("/verify/pipeline")
+def start_verification(
+    background: BackgroundTasks,
+    require_com: bool = Query(False, description="Only allow .com domains"),
+    smtp: bool = Query(VERIFY_SMTP, description="Enable SMTP RCPT probe"),
+):
+    if verifier.is_running():
+        raise HTTPException(status_code=409, detail="Verification already running")
+    def _job():
+        try:
+            verifier.run_verification(OUT_PATH, do_smtp=smtp, require_com=require_com)
+        except Exception as e:
+            print("Verification error:", e)
+    background.add_task(_job)
+    return {"status": "started", "smtp": smtp, "require_com": require_com}
+
+@router.get("/verify/status")
+def verification_status():
+    return {"running": verifier.is_running(), "by_status": verifier.get_store(OUT_PATH).counts()}
+
 @router.get("/")
 def root():
     return {
         "app": "Email Lookup Service (FastAPI)",
         "endpoints": {
             "GET /health": "health check",
-            "POST /scrape": "start background scrape",
+            "POST /scrape": "start background scrape (resume=true continues an interrupted run)",
+            "GET /scrape/checkpoint": "frontier of the current/last run",
+            "GET /scrape/timing": "per-span timing of the current/last run (stages, http, parse, dedup, write)",
+            "GET /admin/profile?seconds=N": "sample the live process's stacks for N seconds (format=collapsed for flamegraphs)",
+            "POST /cluster/start": "reset the shared work queue for a sharded run",
+            "POST /cluster/worker?threads=N": "work on the sharded run from this process",
+            "GET /cluster/kpi": "KPI merged across sharded-run workers",
             "GET /kpi/latest": "dynamic KPI from emails.jsonl (+run overlay)",
             "GET /emails?limit=N": "tail emails.jsonl",
+            "GET /emails?after=|before=OFFSET": "page by byte offset (X-Cursor-Before / X-Cursor-After headers)",
+            "GET /emails?domain=|source=|username=": "indexed row lookup (same cursors)",
+            "GET /emails/by-user/{username}": "rows of one HF user (indexed)",
+            "GET /export": "stream filtered rows as NDJSON (source, domain, username, status; gzip=true)",
             "POST /verify": "email validity check",
+            "POST /verify/batch": "validity check for many emails (grouped by domain)",
+            "POST /verify/pipeline": "background verification of new rows in emails.jsonl",
+            "GET /verify/status": "verification stage state and per-status counts",
             "GET /metrics": "Prometheus metrics",
         },
         "out_path": os.path.abspath(OUT_PATH),
@@ -11,3 +11,103 @@ OUT_PATH = os.getenv("OUT_PATH", "emails.jsonl")
 DEFAULT_EMAIL_LIMIT = int(os.getenv("EMAIL_LIMIT", "200"))
 DEFAULT_HF_LISTING_PAGES = int(os.getenv("HF_LISTING_PAGES", "40"))
 DEFAULT_MODELS_PAGES_PER_USER = int(os.getenv("HF_MODELS_PAGES_PER_USER", "3"))
+
+# user discovery: JSON listing API (falls back to the HTML listing) streamed into the crawl
+HF_LISTING_API = os.getenv("HF_LISTING_API", "1") == "1"
+HF_API_PAGE_SIZE = int(os.getenv("HF_API_PAGE_SIZE", "30"))        # models per listing page
+CHECKPOINT_PATH = os.getenv("CHECKPOINT_PATH", "crawl_checkpoint.sqlite")  # frontier of the current run
+DISCOVERY_QUEUE_SIZE = int(os.getenv("DISCOVERY_QUEUE_SIZE", "0"))  # users waiting for a worker; 0 = 2 x concurrency
+
+# crawl concurrency: users in flight (1 = sequential loop) and per-target request slots
+DEFAULT_CRAWL_CONCURRENCY = int(os.getenv("CRAWL_CONCURRENCY", "1"))
+PER_TARGET_CONCURRENCY = int(os.getenv("PER_TARGET_CONCURRENCY", "0"))  # 0 = unlimited
+TARGET_CONCURRENCY = os.getenv("TARGET_CONCURRENCY", "")  # e.g. "github_repos=4,github_commits=4"
+
+# sharded runs: workers (processes/hosts on a shared filesystem) leasing from one queue
+SHARD_QUEUE_PATH = os.getenv("SHARD_QUEUE_PATH", "work_queue.sqlite")
+SHARD_LEASE_SECONDS = float(os.getenv("SHARD_LEASE_SECONDS", "300"))  # task visible again after this
+SHARD_POLL_SECONDS = float(os.getenv("SHARD_POLL_SECONDS", "2"))      # idle wait when all tasks are leased
+SHARD_PREFETCH_USERS = int(os.getenv("SHARD_PREFETCH_USERS", "32"))   # fetch the next listing page below this
+SHARD_MAX_ATTEMPTS = int(os.getenv("SHARD_MAX_ATTEMPTS", "3"))        # leases of one task before it is failed
+
+# pooled keep-alive HTTP sessions (one per target)
+HTTP_POOL_CONNECTIONS = int(os.getenv("HTTP_POOL_CONNECTIONS", "10"))  # host pools kept per target
+HTTP_POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE", "16"))          # keep-alive conns per host
+HTTP_RETRIES = int(os.getenv("HTTP_RETRIES", "2"))
+HTTP_BACKOFF = float(os.getenv("HTTP_BACKOFF", "0.5"))
+
+# per-host token-bucket pacing (replaces fixed sleeps); headers/429s adjust it at runtime
+RATE_DEFAULT_RPS = float(os.getenv("RATE_DEFAULT_RPS", "10"))
+RATE_BURST = int(os.getenv("RATE_BURST", "10"))
+HOST_RATES = os.getenv("HOST_RATES", "")  # e.g. "huggingface.co=8,api.github.com=20"
+RATE_LIMIT_BACKOFF = float(os.getenv("RATE_LIMIT_BACKOFF", "5"))  # 429 without Retry-After
+RATE_LIMIT_MAX_RETRIES = int(os.getenv("RATE_LIMIT_MAX_RETRIES", "2"))
+
+# on-disk conditional-request cache under timed_get ("" disables)
+HTTP_CACHE_PATH = os.getenv("HTTP_CACHE_PATH", "http_cache.sqlite")
+HTTP_CACHE_TTL = int(os.getenv("HTTP_CACHE_TTL", "3600"))         # seconds served without revalidating
+HTTP_CACHE_MAX_MB = int(os.getenv("HTTP_CACHE_MAX_MB", "256"))
+
+# HTML link/text extraction backend: auto | selectolax | stdlib | bs4
+HTML_BACKEND = os.getenv("HTML_BACKEND", "auto")
+
+# buffered JSONL writer for OUT_PATH
+WRITER_QUEUE_SIZE = int(os.getenv("WRITER_QUEUE_SIZE", "10000"))
+WRITER_BATCH_SIZE = int(os.getenv("WRITER_BATCH_SIZE", "256"))
+WRITER_FLUSH_INTERVAL = float(os.getenv("WRITER_FLUSH_INTERVAL", "0.5"))  # seconds
+WRITER_FSYNC = os.getenv("WRITER_FSYNC", "none")  # none | batch | close
+
+# email verification
+MX_CACHE_TTL = int(os.getenv("MX_CACHE_TTL", "3600"))           # seconds
+MX_NEGATIVE_TTL = int(os.getenv("MX_NEGATIVE_TTL", "300"))      # cached "no MX" answers
+VERIFY_CONCURRENCY = int(os.getenv("VERIFY_CONCURRENCY", "16"))  # domains verified in parallel
+VERIFY_BATCH_MAX = int(os.getenv("VERIFY_BATCH_MAX", "10000"))
+SMTP_RCPT_PER_SESSION = int(os.getenv("SMTP_RCPT_PER_SESSION", "50"))  # RCPTs per MAIL FROM
+VERIFY_AFTER_SCRAPE = os.getenv("VERIFY_AFTER_SCRAPE", "0") == "1"  # run the verification stage after run_scrape
+VERIFY_SMTP = os.getenv("VERIFY_SMTP", "0") == "1"                  # RCPT probes in the verification stage
+VERIFY_CHUNK_ROWS = int(os.getenv("VERIFY_CHUNK_ROWS", "1000"))      # rows per verify_batch call
+
+# GitHub harvesting memo (login -> emails, across runs)
+GITHUB_MEMO_PATH = os.getenv("GITHUB_MEMO_PATH", "github_memo.sqlite")  # "" = in-memory only
+GITHUB_MEMO_TTL = int(os.getenv("GITHUB_MEMO_TTL", "86400"))
+GITHUB_MEMO_NEGATIVE_TTL = int(os.getenv("GITHUB_MEMO_NEGATIVE_TTL", "3600"))  # logins with no emails
+
+# parsing offload
+PARSE_WORKERS = int(os.getenv("PARSE_WORKERS", "0"))  # processes for HTML parsing + email extraction; 0 = inline
+
+# export
+EXPORT_CHUNK_BYTES = int(os.getenv("EXPORT_CHUNK_BYTES", "65536"))  # bytes per streamed chunk
+
+# adaptive stage ordering (models / websites / GitHub, after the HF profile)
+STAGE_ORDER = os.getenv("STAGE_ORDER", "adaptive")                  # adaptive | fixed
+STAGE_EXPLORE = float(os.getenv("STAGE_EXPLORE", "0.1"))            # share of users visited with every stage, in random order
+STAGE_SKIP_YIELD = float(os.getenv("STAGE_SKIP_YIELD", "0.01"))     # emails/request below which a stage is skipped
+STAGE_MIN_REQUESTS = int(os.getenv("STAGE_MIN_REQUESTS", "50"))     # requests a stage gets before it may be skipped
+STAGE_STATS_PATH = os.getenv("STAGE_STATS_PATH", "stage_stats.sqlite")  # yields across runs; "" = this run only
+STAGE_PRIOR_REQUESTS = int(os.getenv("STAGE_PRIOR_REQUESTS", "1000"))   # past runs count as at most this many requests
+
+# website stage: bounded same-site crawl from the linked page
+SITE_MAX_PAGES = int(os.getenv("SITE_MAX_PAGES", "4"))            # pages per site, the linked one included; 1 = linked page only
+SITE_MAX_DEPTH = int(os.getenv("SITE_MAX_DEPTH", "1"))            # link hops from the linked page
+SITE_MAX_BYTES = int(os.getenv("SITE_MAX_BYTES", "2000000"))      # body bytes per site
+SITE_CANDIDATE_PATHS = [p for p in os.getenv(
+    "SITE_CANDIDATE_PATHS", "contact,kontakt,impressum,imprint,about,team,people,members,legal"
+).split(",") if p]                                                # followed links, by priority
+SITE_SHARED_HOSTS = [h for h in os.getenv(
+    "SITE_SHARED_HOSTS", "github.com,gitlab.com,huggingface.co,twitter.com,x.com,linkedin.com,medium.com,"
+    "youtube.com,google.com,arxiv.org,scholar.google.com,kaggle.com,facebook.com,instagram.com,discord.gg"
+).split(",") if h]                                                # one account per path: linked page only, no cache
+SITE_CACHE_TTL = int(os.getenv("SITE_CACHE_TTL", "3600"))         # per-site results, seconds
+SITE_CACHE_SIZE = int(os.getenv("SITE_CACHE_SIZE", "10000"))      # sites kept, least recently used dropped
+ROBOTS_TTL = int(os.getenv("ROBOTS_TTL", "3600"))
+
+# streaming fetches (website stage): body read in chunks, capped, stopped early
+STREAM_MAX_BYTES = int(os.getenv("STREAM_MAX_BYTES", "1000000"))  # per response
+STREAM_CHUNK_BYTES = int(os.getenv("STREAM_CHUNK_BYTES", "16384"))
+STREAM_CONTENT_TYPES = [t for t in os.getenv(
+    "STREAM_CONTENT_TYPES", "text/html,application/xhtml+xml,text/plain"
+).split(",") if t]                                                # others are not read; no header = read
+
+# compaction (python -m app.services.compactor)
+COMPACT_CHUNK_ROWS = int(os.getenv("COMPACT_CHUNK_ROWS", "200000"))  # rows sorted in memory per run file
+COMPACT_FANIN = int(os.getenv("COMPACT_FANIN", "64"))                # run files merged at once
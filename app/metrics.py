@@ -1,5 +1,5 @@
 from prometheus_client import (
-    Counter, Histogram, Summary, generate_latest, CONTENT_TYPE_LATEST
+    Counter, Gauge, Histogram, Summary, generate_latest, CONTENT_TYPE_LATEST
 )
 
 # counters
@@ -10,12 +10,61 @@ EMAILS_WRITTEN   = Counter("emails_written_total",           "Emails written to
 EMAILS_DEDUP_SKIPPED = Counter("emails_dedup_skipped_total", "Emails skipped due to dedup")
 REQUESTS_TOTAL   = Counter("scrape_requests_total",          "HTTP requests made", ["target", "status"])
 REQUEST_ERRORS   = Counter("scrape_request_errors_total",    "HTTP request errors", ["target"])
+HTTP_CACHE       = Counter("scrape_http_cache_total",        "HTTP cache lookups (hit/miss/revalidated)", ["target", "result"])
+GITHUB_MEMO      = Counter("scrape_github_memo_total",       "GitHub login lookups served from the memo (hit) or harvested (miss)", ["result"])
+HTTP_CACHE_BYTES = Gauge("scrape_http_cache_bytes",          "Bytes of response bodies held in the HTTP cache")
+
+# per-host rate budget
+RATE_TOKENS      = Gauge("scrape_rate_tokens",               "Token-bucket budget available", ["host"])
+RATE_PER_SECOND  = Gauge("scrape_rate_per_second",           "Current pacing rate", ["host"])
+RATE_REMAINING   = Gauge("scrape_rate_limit_remaining",      "Server-reported X-RateLimit-Remaining", ["host"])
+RATE_LIMITED     = Counter("scrape_rate_limited_total",      "Responses telling us to back off", ["host"])
 
 # timings / histos
 REQ_LATENCY      = Histogram("scrape_request_latency_seconds", "HTTP request latency", ["target"])
+CONN_OPENED      = Counter("scrape_http_connections_opened_total", "New TCP/TLS connections", ["target"])
+CONN_REUSE       = Counter("scrape_http_connection_reuse_total", "Requests by keep-alive reuse", ["target", "reused"])
 EMAILS_PER_USER  = Histogram("emails_per_user", "Emails per user (post-dedup)", buckets=(0,1,2,3,5,10,20))
 RUN_DURATION     = Summary("run_duration_seconds", "Total run duration (seconds)")
 USERS_WITH_HITS  = Counter("scrape_users_with_hits_total", "Users with >=1 email")
 
+# jsonl writer
+WRITER_QUEUE_DEPTH   = Gauge("jsonl_writer_queue_depth", "Rows waiting in the JSONL writer queue")
+WRITER_FLUSH_LATENCY = Histogram("jsonl_writer_flush_seconds", "JSONL writer batch write+flush latency")
+WRITER_BATCH_ROWS    = Histogram("jsonl_writer_batch_rows", "Rows per JSONL writer batch",
+                                 buckets=(1,2,5,10,25,50,100,250,500,1000))
+
+# parse offload
+PARSE_PAGES          = Counter("parse_pages_total", "Pages parsed (inline or in the process pool)", ["mode"])
+PARSE_SECONDS        = Histogram("parse_seconds", "Decode + link/email extraction time per page", ["mode"])
+PARSE_QUEUE_SECONDS  = Histogram("parse_queue_seconds", "Time a page waited for a parse worker")
+
+# verification stage
+VERIFY_CHECKED       = Counter("verify_emails_checked_total", "Emails verified by the pipeline stage", ["status"])
+VERIFY_BATCH_SECONDS = Histogram("verify_batch_seconds", "Verification stage time per chunk")
+VERIFY_THROUGHPUT    = Gauge("verify_emails_per_second", "Verification throughput of the last pass")
+VERIFY_BACKLOG_BYTES = Gauge("verify_backlog_bytes", "Bytes of OUT_PATH not yet verified")
+
+# stage spans
+SPAN_SECONDS         = Histogram("scrape_span_seconds", "Time per scrape stage span (user, stages, http, parse, dedup, write)",
+                                 ["span"], buckets=(.0005,.001,.005,.01,.025,.05,.1,.25,.5,1,2.5,5,10,30,60))
+
+# adaptive stage ordering
+STAGE_REQUESTS       = Counter("scrape_stage_requests_total", "HTTP requests sent per visit stage", ["stage"])
+STAGE_EMAILS         = Counter("scrape_stage_emails_total", "New emails written per visit stage", ["stage"])
+STAGE_SKIPPED        = Counter("scrape_stage_skipped_total", "Stage visits skipped for low yield", ["stage"])
+STAGE_YIELD          = Gauge("scrape_stage_yield", "Estimated emails per request of a visit stage", ["stage"])
+
+# website crawl
+SITE_PAGES           = Counter("scrape_site_pages_total", "Website pages fetched (linked page or followed candidate)", ["kind"])
+SITE_CACHE           = Counter("scrape_site_cache_total", "Per-site result cache lookups", ["result"])
+SITE_STOPS           = Counter("scrape_site_stops_total", "Why a site crawl ended", ["reason"])
+SITE_ROBOTS_BLOCKED  = Counter("scrape_site_robots_blocked_total", "Candidate pages skipped by robots.txt")
+
+# streaming fetches
+STREAM_BYTES_READ    = Counter("scrape_stream_bytes_read_total", "Body bytes read by streaming fetches", ["target"])
+STREAM_BYTES_SAVED   = Counter("scrape_stream_bytes_saved_total", "Body bytes left unread by aborted streaming fetches (from Content-Length)", ["target"])
+STREAM_ABORTS        = Counter("scrape_stream_aborts_total", "Streaming fetches cut short (content_type, max_bytes, enough)", ["target", "reason"])
+
 def get_metrics_text() -> bytes:
     return generate_latest()
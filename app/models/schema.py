@@ -1,12 +1,16 @@
 from pydantic import BaseModel
 from app.config import (
-    DEFAULT_EMAIL_LIMIT, DEFAULT_HF_LISTING_PAGES, DEFAULT_MODELS_PAGES_PER_USER
+    DEFAULT_EMAIL_LIMIT, DEFAULT_HF_LISTING_PAGES, DEFAULT_MODELS_PAGES_PER_USER,
+    DEFAULT_CRAWL_CONCURRENCY, VERIFY_AFTER_SCRAPE,
 )
 
 class ScrapeParams(BaseModel):
     email_limit: int = DEFAULT_EMAIL_LIMIT
     hf_listing_pages: int = DEFAULT_HF_LISTING_PAGES
     models_pages_per_user: int = DEFAULT_MODELS_PAGES_PER_USER
+    concurrency: int = DEFAULT_CRAWL_CONCURRENCY  # users in flight; >1 uses the async crawler
+    verify: bool = VERIFY_AFTER_SCRAPE  # verify the new rows once the run is written
+    resume: bool = False  # continue an interrupted run from its checkpoint (its params win)
 
 class ScrapeRequest(ScrapeParams):
     pass
@@ -0,0 +1,250 @@
+"""
+Sharded scraping: N workers (processes, or hosts sharing a filesystem)
+cooperating on one run.
+
+    python -m app.services.cluster start --limit 1000 --pages 40
+    python -m app.services.cluster worker --threads 4      # on each host / N times
+    python -m app.services.cluster kpi
+
+The run lives in a WorkQueue: listing pages and users are leased tasks, so
+every page and user is fetched by one worker. Emails are claimed in the same
+file before they are written, which keeps rows unique across workers and
+caps the run at email_limit. Each worker writes its own shard next to
+OUT_PATH and appends it to OUT_PATH (under an exclusive lock) when it
+finishes; per-worker counters are merged into one KPI.
+"""
+import argparse, glob, json, os, shutil, socket, threading, time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional
+
+from app.config import OUT_PATH, SHARD_LEASE_SECONDS, SHARD_POLL_SECONDS
+from app.metrics import USERS_DISCOVERED
+from app.models.schema import ScrapeParams
+from app.services.scraper import _RunState, _visit_user, first_listing_page, hf_listing_page
+from app.utils.email_index import EmailIndex, get_index
+from app.utils import spans
+from app.utils.io_utils import append_locked
+from app.utils.jsonl_writer import JsonlWriter
+from app.utils.work_queue import WorkQueue, get_queue
+
+_running = False
+_run_lock = threading.Lock()
+
+def is_running() -> bool:
+    return _running
+
+class _SharedDedup:
+    """
+    Dedup for a sharded run: rows already in OUT_PATH via the local index,
+    rows of this run via claims in the queue. seen() claims the email when
+    it returns False (reserve() then has nothing left to do).
+    """
+    def __init__(self, index: EmailIndex, queue: WorkQueue, worker: str, limit: int):
+        self.index, self.queue, self.worker, self.limit = index, queue, worker, limit
+
+    def seen(self, username: str, email: str) -> bool:
+        if self.index.seen(username, email):
+            return True
+        return not self.queue.claim(self.worker, username, email, self.limit)
+
+    def reserve(self, username: str, email: str) -> None:
+        pass
+
+    def known(self, username: str, email: str) -> bool:
+        """seen() without taking a claim."""
+        return self.index.seen(username, email) or self.queue.is_claimed(email)
+
+class _LeaseProgress:
+    """Checkpoint hooks of _RunState: stage progress renews the user's lease (so does _heartbeat)."""
+    def __init__(self, queue: WorkQueue, worker: str):
+        self.queue, self.worker = queue, worker
+        self.tasks: Dict[str, int] = {}  # user -> leased task id
+
+    def stage(self, user: str, stage: str) -> None:
+        task_id = self.tasks.get(user)
+        if task_id is not None:
+            self.queue.extend(task_id, self.worker, SHARD_LEASE_SECONDS)
+
+    def user_done(self, user: str, counters: dict) -> None:
+        self.queue.report(self.worker, counters)
+
+class _ShardState(_RunState):
+    def __init__(self, email_limit: int, dedup: _SharedDedup, writer: JsonlWriter,
+                 progress: _LeaseProgress, queue: WorkQueue):
+        super().__init__(email_limit, dedup, writer, progress)
+        self.queue = queue
+
+    def done(self) -> bool:
+        # the limit is for the whole run, i.e. all workers' claims
+        return self.queue.claimed() >= self.email_limit
+
+    def is_new(self, user: str, email: str) -> bool:
+        return not self.index.known(user, email.strip().lower())
+
+def _shard_path(worker: str) -> str:
+    return f"{OUT_PATH}.{worker}.shard"
+
+def _merge_shard(shard: str) -> None:
+    """Append a worker's shard to OUT_PATH under an exclusive lock, then drop it."""
+    if not os.path.exists(shard):
+        return
+    if os.path.getsize(shard):
+        with append_locked(OUT_PATH) as out:
+            with open(shard, "rb") as src:
+                shutil.copyfileobj(src, out)
+            out.flush()
+            os.fsync(out.fileno())
+    os.remove(shard)
+
+def _heartbeat(queue: WorkQueue, worker: str, stop: threading.Event) -> None:
+    # renews this worker's leases while a stage blocks (e.g. waiting out a rate limit)
+    while not stop.wait(SHARD_LEASE_SECONDS / 3):
+        try:
+            queue.heartbeat(worker, SHARD_LEASE_SECONDS)
+        except Exception as e:
+            print("Worker heartbeat error:", e)
+
+def start_run(params: ScrapeParams) -> dict:
+    """Reset the shared queue for a new sharded run (no workers may be running)."""
+    active = get_queue().active_workers(SHARD_LEASE_SECONDS)
+    if active:
+        raise RuntimeError(f"Workers still running: {', '.join(active)}")
+    for shard in glob.glob(f"{glob.escape(OUT_PATH)}.*.shard"):
+        _merge_shard(shard)  # left behind by a worker that died
+    get_queue().start(params.model_dump(exclude={"resume"}), first_listing_page())
+    return {"status": "started", "params": params.model_dump(exclude={"resume"})}
+
+def run_worker(worker_id: Optional[str] = None, threads: int = 1) -> dict:
+    """Lease and run tasks until the run is over or its email_limit is reached."""
+    global _running
+    with _run_lock:
+        if _running:
+            raise RuntimeError("Worker already running")
+        _running = True
+    try:
+        queue = get_queue()
+        if not queue.params:
+            raise RuntimeError("No sharded run started")
+        params = ScrapeParams(**queue.params)
+        worker = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        shard = _shard_path(worker)
+        index = get_index(OUT_PATH)
+        progress = _LeaseProgress(queue, worker)
+        spans.reset()
+
+        with JsonlWriter(shard, on_flush=lambda rows, _: queue.flushed(worker, [r["email"] for r in rows])) as writer:
+            state = _ShardState(params.email_limit, _SharedDedup(index, queue, worker, params.email_limit),
+                                writer, progress, queue)
+            queue.report(worker, state.counters())
+            stop = threading.Event()
+            beat = threading.Thread(target=_heartbeat, args=(queue, worker, stop), name="shard-heartbeat",
+                                    daemon=True)
+            beat.start()
+
+            def loop() -> None:
+                while not state.done():
+                    task = queue.lease(worker, SHARD_LEASE_SECONDS)
+                    if task is None:
+                        if queue.idle():
+                            return
+                        time.sleep(SHARD_POLL_SECONDS)
+                        continue
+                    task_id, kind, key, payload = task
+                    try:
+                        if kind == "page":
+                            users, nxt = hf_listing_page(payload)
+                            if nxt is not None and nxt["page"] > params.hf_listing_pages:
+                                nxt = None
+                            USERS_DISCOVERED.inc(queue.complete(task_id, worker, users, nxt))
+                        else:
+                            progress.tasks[key] = task_id
+                            try:
+                                _visit_user(key, params, state)
+                            finally:
+                                progress.tasks.pop(key, None)
+                            queue.complete(task_id, worker)
+                    except Exception as e:  # retried, by any worker, until SHARD_MAX_ATTEMPTS
+                        print("Worker task error:", kind, key, e)
+                        queue.release(task_id, worker)
+
+            try:
+                with ThreadPoolExecutor(max_workers=max(1, threads), thread_name_prefix="shard") as pool:
+                    for f in [pool.submit(loop) for _ in range(max(1, threads))]:
+                        f.result()
+            finally:
+                stop.set()
+                beat.join()
+
+        state.scheduler.save()
+        _merge_shard(shard)
+        queue.report(worker, state.counters(), finished=True)
+        kpi = cluster_kpi()
+        if kpi["finished"]:
+            with open("kpi_latest.json", "w", encoding="utf-8") as f:
+                json.dump(kpi, f, ensure_ascii=False, indent=2)
+        return {**kpi, "worker_stages": state.scheduler.summary(), "worker_timing": spans.breakdown()}
+    finally:
+        _running = False
+
+def cluster_kpi() -> dict:
+    """KPI of the sharded run, merged from every worker's counters."""
+    queue = get_queue()
+    workers = queue.workers()
+    tasks = queue.counts()
+    found = users_with_hits = 0
+    by_source: Dict[str, int] = {}
+    domains: Dict[str, int] = {}
+    for w in workers:
+        c = w["counters"]
+        found += c.get("found", 0)
+        users_with_hits += c.get("users_with_hits", 0)
+        for k, v in c.get("emails_by_source", {}).items():
+            by_source[k] = by_source.get(k, 0) + v
+        for k, v in c.get("domains_count", {}).items():
+            domains[k] = domains.get(k, 0) + v
+    discovered = sum(n for k, n in tasks.items() if k.startswith("user:"))
+    visited = tasks.get("user:done", 0)
+    started = queue.started_at
+    last = max((w["heartbeat"] for w in workers), default=started or 0)
+    return {
+        "run_seconds": round(last - started, 2) if started else 0.0,
+        "users_discovered": discovered,
+        "users_discovered_partial": any(k.startswith("page:") and k != "page:done" for k in tasks),
+        "users_visited": visited,
+        "users_with_hits": users_with_hits,
+        "hit_rate_percent": round(users_with_hits / visited * 100.0, 2) if visited else 0.0,
+        "new_emails_written": found,
+        "emails_by_source": by_source,
+        "unique_domains": len(domains),
+        "top_domains": sorted(domains.items(), key=lambda x: x[1], reverse=True)[:10],
+        "out_path": os.path.abspath(OUT_PATH),
+        "workers": len(workers),
+        "workers_finished": sum(w["finished"] for w in workers),
+        "finished": bool(workers) and all(w["finished"] for w in workers),
+        "tasks": tasks,
+    }
+
+def main() -> None:
+    ap = argparse.ArgumentParser(prog="python -m app.services.cluster")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    st = sub.add_parser("start", help="reset the shared queue for a new run")
+    st.add_argument("--limit", type=int, default=ScrapeParams().email_limit)
+    st.add_argument("--pages", type=int, default=ScrapeParams().hf_listing_pages)
+    st.add_argument("--models-pages", type=int, default=ScrapeParams().models_pages_per_user)
+    wk = sub.add_parser("worker", help="work on the current run until it is over")
+    wk.add_argument("--id", default=None)
+    wk.add_argument("--threads", type=int, default=1)
+    sub.add_parser("kpi", help="merged KPI of the current run")
+    args = ap.parse_args()
+
+    if args.cmd == "start":
+        out = start_run(ScrapeParams(email_limit=args.limit, hf_listing_pages=args.pages,
+                                     models_pages_per_user=args.models_pages))
+    elif args.cmd == "worker":
+        out = run_worker(args.id, args.threads)
+    else:
+        out = cluster_kpi()
+    print(json.dumps(out, indent=2))
+
+if __name__ == "__main__":
+    main()
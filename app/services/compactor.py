@@ -0,0 +1,176 @@
+"""
+Compaction of email JSONL outputs into OUT_PATH.
+
+    python -m app.services.compactor emails.jsonl old_emails.jsonl
+    python -m app.services.compactor a.jsonl b.jsonl --out merged.jsonl --keep-shared
+
+Rows of every input are cleaned (email stripped and lower-cased), dropped
+unless kpi_from_file.is_valid_email accepts them, deduplicated and written
+sorted by email. An existing output is always one of the inputs (the first,
+unless listed), so its rows are never dropped. By default an email is kept
+once, like the scraper's dedup; with keep_shared only repeated
+(username, email) pairs are dropped. The first occurrence wins: earlier
+inputs first, then earlier lines.
+
+Memory stays bounded: rows are sorted COMPACT_CHUNK_ROWS at a time into run
+files, which are merged COMPACT_FANIN at a time. The result is written next
+to the output and swapped in with os.replace, under the output's flock. If
+the output grew while compacting (a writer appended to it), the swap is
+refused; JsonlWriter and shard merges append under the same lock and
+reopen the file once it was swapped. Compacting from a process that is
+scraping is refused outright.
+"""
+import argparse, heapq, json, os, shutil, tempfile, time
+from typing import Dict, IO, Iterator, List, Optional, Tuple
+
+from app.config import OUT_PATH, COMPACT_CHUNK_ROWS, COMPACT_FANIN
+from app.services import cluster, scraper
+from app.utils.io_utils import iter_jsonl_from, locked
+from app.utils.kpi_from_file import is_valid_email
+
+Item = Tuple[str, int, int, dict]  # (email, input no, line no, row): the sort key is the first three
+
+def _clean(row: dict) -> Optional[str]:
+    email = row.get("email")
+    if not isinstance(email, str) or not is_valid_email(email):
+        return None
+    return email.strip().strip('<>,"\'').lower()
+
+def _write_run(items: List[Item], tmp_dir: str) -> str:
+    items.sort(key=lambda it: it[:3])
+    fd, path = tempfile.mkstemp(prefix="run-", suffix=".jsonl", dir=tmp_dir)
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        for it in items:
+            f.write(json.dumps(it, ensure_ascii=False) + "\n")
+    return path
+
+def _read_run(f: IO[str]) -> Iterator[Item]:
+    for line in f:
+        email, src, seq, row = json.loads(line)
+        yield email, src, seq, row
+
+def _merged(paths: List[str]) -> Iterator[Item]:
+    files = [open(p, "r", encoding="utf-8") for p in paths]
+    try:
+        yield from heapq.merge(*(_read_run(f) for f in files), key=lambda it: it[:3])
+    finally:
+        for f in files:
+            f.close()
+
+def _merge_runs(runs: List[str], tmp_dir: str, fanin: int) -> List[str]:
+    """Merge run files `fanin` at a time until at most `fanin` are left."""
+    fanin = max(2, fanin)
+    while len(runs) > fanin:
+        merged: List[str] = []
+        for i in range(0, len(runs), fanin):
+            group = runs[i:i + fanin]
+            fd, path = tempfile.mkstemp(prefix="run-", suffix=".jsonl", dir=tmp_dir)
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                for it in _merged(group):
+                    f.write(json.dumps(it, ensure_ascii=False) + "\n")
+            for p in group:
+                os.remove(p)
+            merged.append(path)
+        runs = merged
+    return runs
+
+def compact(inputs: List[str], out_path: str = OUT_PATH, keep_shared: bool = False,
+            chunk_rows: int = COMPACT_CHUNK_ROWS, fanin: int = COMPACT_FANIN,
+            tmp_dir: Optional[str] = None) -> Dict[str, object]:
+    """Merge `inputs` into `out_path` (see the module docstring); returns counts."""
+    if scraper.is_running() or cluster.is_running():
+        raise RuntimeError("A scrape or worker is running in this process; not compacting")
+    t0 = time.perf_counter()
+    out_dir = os.path.dirname(os.path.abspath(out_path))
+    watched = None
+    if os.path.exists(out_path):
+        if not any(os.path.abspath(p) == os.path.abspath(out_path) for p in inputs):
+            inputs = [out_path] + list(inputs)
+        st = os.stat(out_path)
+        watched = (st.st_ino, st.st_size)
+
+    stats: Dict[str, object] = {"inputs": {}, "read": 0, "invalid": 0, "duplicates": 0, "written": 0}
+    work = tempfile.mkdtemp(prefix="compact-", dir=tmp_dir or out_dir)
+    tmp_out = None
+    try:
+        # 1. sorted runs of at most chunk_rows rows
+        runs: List[str] = []
+        chunk: List[Item] = []
+        for src, path in enumerate(inputs):
+            rows = 0
+            for seq, (row, _, _) in enumerate(iter_jsonl_from(path)):
+                rows += 1
+                email = _clean(row)
+                if email is None:
+                    stats["invalid"] += 1
+                    continue
+                chunk.append((email, src, seq, {**row, "email": email}))
+                if len(chunk) >= chunk_rows:
+                    runs.append(_write_run(chunk, work))
+                    chunk = []
+            stats["inputs"][path] = rows
+            stats["read"] += rows
+        if chunk:
+            runs.append(_write_run(chunk, work))
+        runs = _merge_runs(runs, work, fanin)
+        stats["runs"] = len(runs)
+
+        # 2. final merge, deduplicated, into a file next to the output
+        fd, tmp_out = tempfile.mkstemp(prefix=".compact-", suffix=".jsonl", dir=out_dir)
+        if os.path.exists(out_path):
+            os.chmod(tmp_out, os.stat(out_path).st_mode & 0o777)  # mkstemp creates 0600
+        with os.fdopen(fd, "w", encoding="utf-8") as out:
+            last_email = None
+            users: set = set()  # usernames already kept for last_email (keep_shared)
+            for email, _, _, row in _merged(runs):
+                if email != last_email:
+                    last_email, users = email, set()
+                elif not keep_shared or str(row.get("username") or "") in users:
+                    stats["duplicates"] += 1
+                    continue
+                users.add(str(row.get("username") or ""))
+                out.write(json.dumps(row, ensure_ascii=False) + "\n")
+                stats["written"] += 1
+            out.flush()
+            os.fsync(out.fileno())
+
+        # 3. swap in, unless a writer appended to the output meanwhile
+        with open(out_path, "ab") as lock, locked(lock):
+            if watched is not None:
+                st = os.stat(out_path)
+                if (st.st_ino, st.st_size) != watched:
+                    raise RuntimeError(f"{out_path} changed while compacting; nothing replaced")
+            os.replace(tmp_out, out_path)
+        dir_fd = os.open(out_dir, os.O_RDONLY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+        if tmp_out is not None and os.path.exists(tmp_out):
+            os.remove(tmp_out)  # not swapped in
+    stats["out_path"] = os.path.abspath(out_path)
+    stats["seconds"] = round(time.perf_counter() - t0, 2)
+    return stats
+
+def main() -> None:
+    ap = argparse.ArgumentParser(prog="python -m app.services.compactor")
+    ap.add_argument("inputs", nargs="*", help=f"JSONL files to merge (default: {OUT_PATH})")
+    ap.add_argument("--out", default=OUT_PATH,
+                    help="file replaced by the result; its existing rows are kept (default: OUT_PATH)")
+    ap.add_argument("--keep-shared", action="store_true",
+                    help="keep an email once per username instead of once overall")
+    ap.add_argument("--chunk-rows", type=int, default=COMPACT_CHUNK_ROWS)
+    ap.add_argument("--fanin", type=int, default=COMPACT_FANIN)
+    ap.add_argument("--tmp-dir", default=None, help="run files (default: next to --out)")
+    args = ap.parse_args()
+    inputs = args.inputs or [OUT_PATH]
+    missing = [p for p in inputs if not os.path.exists(p)]
+    if missing:
+        ap.error(f"missing inputs: {missing}")
+    print(json.dumps(compact(inputs, args.out, args.keep_shared, args.chunk_rows, args.fanin, args.tmp_dir),
+                     indent=2))
+
+if __name__ == "__main__":
+    main()
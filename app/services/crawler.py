@@ -0,0 +1,48 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable
+
+_END = object()
+
+async def crawl(users: Iterable[str], visit: Callable[[str], None],
+                done: Callable[[], bool], concurrency: int, queue_size: int = 0) -> None:
+    """
+    Visit many users at once. `visit` is the blocking per-user pipeline
+    (profile -> models -> websites -> github) and runs on a dedicated thread
+    pool; `concurrency` bounds users in flight. `users` may be a lazy stream
+    (e.g. discovery still fetching listing pages): it is drained by a producer
+    into a queue of at most `queue_size` (0 = unbounded), so visiting starts
+    with the first user. Once `done()` reports the run limit was reached,
+    workers stop picking up users and the producer stops pulling from `users`.
+    """
+    n = max(1, concurrency)
+    queue: asyncio.Queue = asyncio.Queue(maxsize=max(0, queue_size))
+    loop = asyncio.get_running_loop()
+    it = iter(users)
+
+    with ThreadPoolExecutor(max_workers=n, thread_name_prefix="crawl") as pool, \
+         ThreadPoolExecutor(max_workers=1, thread_name_prefix="discover") as feeder:
+        async def producer() -> None:
+            try:
+                while not done():
+                    user = await loop.run_in_executor(feeder, next, it, _END)
+                    if user is _END:
+                        break
+                    await queue.put(user)
+            finally:
+                for _ in range(n):
+                    await queue.put(_END)
+
+        async def worker() -> None:
+            while True:
+                user = await queue.get()
+                if user is _END:
+                    return
+                if not done():
+                    await loop.run_in_executor(pool, visit, user)
+
+        await asyncio.gather(producer(), *(worker() for _ in range(n)))
+
+def run_crawl(users: Iterable[str], visit: Callable[[str], None],
+              done: Callable[[], bool], concurrency: int, queue_size: int = 0) -> None:
+    asyncio.run(crawl(users, visit, done, concurrency, queue_size))
@@ -0,0 +1,92 @@
+import json, os, zlib
+from typing import Dict, Iterator, List, Optional
+
+from app.config import EXPORT_CHUNK_BYTES
+from app.services.verifier import get_store
+from app.utils.email_index import get_index
+from app.utils.io_utils import iter_jsonl_from
+
+_LOOKUP_ROWS = 500  # rows per verification-store lookup
+
+def export_rows(path: str, source: Optional[str] = None, domain: Optional[str] = None,
+                username: Optional[str] = None, status: Optional[str] = None,
+                with_status: bool = False) -> Iterator[Dict]:
+    """
+    Rows of an emails JSONL matching every given filter, in file order. With
+    a source, domain or username filter only the matching rows are read, at
+    offsets from the email index; otherwise the file is read front to back.
+    `status` (valid/invalid/uncertain/unverified) comes from the verification
+    store and is looked up a chunk of rows at a time.
+    """
+    if not os.path.exists(path):
+        return
+    domain = domain.lower().lstrip("@") if domain else None
+    need_status = status is not None or with_status
+    store = get_store(path) if need_status else None
+
+    pending: List[Dict] = []
+    for row in _candidate_rows(path, source, domain, username):
+        email = row.get("email")
+        if not isinstance(email, str):
+            continue
+        if source and row.get("source") != source:
+            continue
+        if username and row.get("username") != username:
+            continue
+        if domain and email.rsplit("@", 1)[-1].lower() != domain:
+            continue
+        if store is None:
+            yield row
+            continue
+        pending.append(row)
+        if len(pending) >= _LOOKUP_ROWS:
+            yield from _with_status(store, pending, status, with_status)
+            pending = []
+    if pending:
+        yield from _with_status(store, pending, status, with_status)
+
+def _candidate_rows(path: str, source: Optional[str], domain: Optional[str],
+                    username: Optional[str]) -> Iterator[Dict]:
+    if source is None and domain is None and username is None:
+        for row, _, _ in iter_jsonl_from(path):
+            yield row
+        return
+    index = get_index(path)
+    locs: List = []
+    for loc in index.iter_find(username=username, domain=domain, source=source, batch=_LOOKUP_ROWS):
+        locs.append(loc)
+        if len(locs) >= _LOOKUP_ROWS:
+            yield from index.read_rows(locs)
+            locs = []
+    yield from index.read_rows(locs)
+
+def _with_status(store, rows: List[Dict], status: Optional[str], with_status: bool) -> Iterator[Dict]:
+    found = store.statuses(r["email"].strip().lower() for r in rows)
+    for r in rows:
+        st = found.get(r["email"].strip().lower(), "unverified")
+        if status and st != status:
+            continue
+        yield {**r, "verification": st} if with_status else r
+
+def export_ndjson(rows: Iterator[Dict], gzip: bool = False,
+                  chunk_bytes: int = EXPORT_CHUNK_BYTES) -> Iterator[bytes]:
+    """NDJSON bytes for `rows`, in ~chunk_bytes pieces, optionally gzip-framed."""
+    z = zlib.compressobj(6, zlib.DEFLATED, 31) if gzip else None
+    buf: List[bytes] = []
+    size = 0
+    for r in rows:
+        line = (json.dumps(r, ensure_ascii=False) + "\n").encode("utf-8")
+        buf.append(line)
+        size += len(line)
+        if size >= chunk_bytes:
+            data = b"".join(buf)
+            buf, size = [], 0
+            if z is not None:
+                data = z.compress(data)
+            if data:
+                yield data
+    data = b"".join(buf)
+    if z is not None:
+        data = z.compress(data) + z.flush()
+    if data:
+        yield data
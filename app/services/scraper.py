@@ -1,61 +1,107 @@
-import os, time, random, threading, json
-from typing import List, Tuple, Dict
-from bs4 import BeautifulSoup
-import requests
+import itertools, os, time, random, threading, json
+from typing import Callable, Dict, Iterator, List, Optional, Set, Tuple
 
-from app.config import HF_BASE, GITHUB_API, GITHUB_TOKEN, UA, OUT_PATH
+from app.config import (
+    HF_BASE, GITHUB_API, GITHUB_TOKEN, UA, OUT_PATH, HF_LISTING_API, HF_API_PAGE_SIZE,
+    DISCOVERY_QUEUE_SIZE,
+)
 from app.metrics import (
     USERS_DISCOVERED, USERS_VISITED, EMAILS_FOUND, EMAILS_WRITTEN,
     EMAILS_DEDUP_SKIPPED, EMAILS_PER_USER, USERS_WITH_HITS, RUN_DURATION
 )
 from app.utils.email_utils import extract_emails
-from app.utils.http_utils import timed_get
-from app.utils.io_utils import append_jsonl, load_existing_emails
+from app.utils.parse_pool import parse_response
+from app.utils.http_utils import requests_made, thread_requests, timed_get
+from app.utils.github_memo import get_memo
+from app.utils.checkpoint import CrawlCheckpoint, get_checkpoint
+from app.utils.email_index import EmailIndex, get_index
+from app.utils.jsonl_writer import JsonlWriter
+from app.utils import spans
+from app.utils.spans import span, user_span
 from app.models.schema import ScrapeParams
+from app.services.crawler import run_crawl
+from app.services.site_crawler import crawl_site
+from app.services.stage_scheduler import PROFILE, StageScheduler
+from app.services.verifier import run_verification
 
-_lock = threading.Lock()
 _last_kpi: Dict[str, object] = {}
 _running = False
 _PER_USER_MAX = int(os.getenv("PER_USER_MAX", "1"))  # 1 = default single row per username; 0 = unlimited
 
-def _load_existing_pairs(path: str) -> set[tuple[str, str]]:
-    pairs: set[tuple[str, str]] = set()
-    if not os.path.exists(path):
-        return pairs
-    with open(path, "r", encoding="utf-8") as f:
-        for ln in f:
-            try:
-                r = json.loads(ln)
-                u = str(r.get("username", "")).strip()
-                e = str(r.get("email", "")).strip().lower()
-                if u and e:
-                    pairs.add((u, e))
-            except Exception:
-                continue
-    return pairs
+def _html_listing_users(page: int) -> Optional[List[str]]:
+    url = f"{HF_BASE}/models?p={page}&sort=downloads"
+    resp = timed_get(url, "hf_models_list", headers={"User-Agent": UA})
+    if not resp or resp.status_code != 200:
+        return None
+    _, page_links = parse_response(resp, emails=False)
+    roots: List[str] = []
+    for href in page_links.internal:
+        if any(bad in href for bad in ["/models", "/datasets", "/spaces", "/docs", "/blog", "/tasks"]):
+            continue
+        roots.append(href.strip("/").split("/")[0])
+    return roots
+
+def _api_listing_users(url: str) -> Tuple[Optional[List[str]], Optional[str]]:
+    # one page of /api/models: (authors or None on failure, next page url)
+    resp = timed_get(url, "hf_models_api", headers={"User-Agent": UA})
+    if not resp or resp.status_code != 200:
+        return None, None
+    try:
+        models = resp.json()
+    except ValueError:
+        return None, None
+    if not isinstance(models, list):
+        return None, None
+    roots = [str(m.get("id") or m.get("modelId") or "").split("/")[0]
+             for m in models if isinstance(m, dict) and "/" in str(m.get("id") or m.get("modelId") or "")]
+    return roots, resp.links.get("next", {}).get("url")
+
+def first_listing_page() -> dict:
+    return {"page": 1, "use_api": HF_LISTING_API,
+            "api_url": f"{HF_BASE}/api/models?sort=downloads&direction=-1&limit={HF_API_PAGE_SIZE}"}
+
+def hf_listing_page(cursor: dict) -> Tuple[List[str], Optional[dict]]:
+    """Usernames on the listing page at `cursor` and the next page's cursor (None: no more pages)."""
+    cur = dict(cursor)
+    roots = None
+    if cur["use_api"]:
+        if not cur["api_url"]:
+            return [], None  # listing exhausted
+        roots, cur["api_url"] = _api_listing_users(cur["api_url"])
+        cur["use_api"] = roots is not None  # HTML listing from here on if the API failed
+    if roots is None:
+        roots = _html_listing_users(cur["page"]) or []
+    cur["page"] += 1
+    return [r for r in dict.fromkeys(roots) if r and len(r) < 40], cur
+
+def iter_hf_users(pages: int, seen: Optional[Set[str]] = None, cursor: Optional[dict] = None,
+                  on_page: Optional[Callable[[List[str], dict], None]] = None) -> Iterator[str]:
+    """
+    Stream usernames from the most-downloaded model listing, page by page, as
+    they are discovered (each page's users in random order). Uses the JSON
+    listing API and switches to the HTML listing if it fails. `seen` collects
+    every username yielded; stop iterating to stop fetching pages.
+    `cursor` (as passed to `on_page` with each page's users) resumes the
+    listing after that page.
+    """
+    seen = set() if seen is None else seen
+    cur: Optional[dict] = {**first_listing_page(), **(cursor or {})}
+    while cur and cur["page"] <= pages:
+        with span("listing"):
+            roots, cur = hf_listing_page(cur)
+        if cur is None:
+            return
+        fresh = [r for r in roots if r not in seen]
+        random.shuffle(fresh)
+        seen.update(fresh)
+        if on_page:
+            on_page(fresh, dict(cur))
+        for user in fresh:
+            USERS_DISCOVERED.inc()
+            yield user
 
 def scrape_hf_users(pages: int) -> List[str]:
-    users: List[str] = []
-    session = requests.Session()
-    session.headers.update({"User-Agent": UA})
-    for page in range(1, pages + 1):
-        url = f"{HF_BASE}/models?p={page}&sort=downloads"
-        resp = timed_get(url, "hf_models_list", headers={"User-Agent": UA})
-        if not resp or resp.status_code != 200:
-            time.sleep(0.2); continue
-        soup = BeautifulSoup(resp.text, "html.parser")
-        for a in soup.select("a[href]"):
-            href = a.get("href", "")
-            if not href.startswith("/"):
-                continue
-            if any(bad in href for bad in ["/models", "/datasets", "/spaces", "/docs", "/blog", "/tasks"]):
-                continue
-            root = href.strip("/").split("/")[0]
-            if root and len(root) < 40 and root not in users:
-                users.append(root)
-        time.sleep(0.1)
-    if users:
-        USERS_DISCOVERED.inc(len(users))
+    users = list(iter_hf_users(pages))
     random.shuffle(users)
     return users
 
@@ -64,21 +110,8 @@ def scrape_hf_profile(user: str) -> Tuple[list[str], list[str], list[str]]:
     resp = timed_get(url, "hf_profile", headers={"User-Agent": UA})
     if not resp or resp.status_code != 200:
         return [], [], []
-    text = resp.text
-    emails = extract_emails(text)
-    soup = BeautifulSoup(text, "html.parser")
-    gh_links, web_links = [], []
-    for a in soup.find_all("a", href=True):
-        href = a["href"].strip()
-        if not href:
-            continue
-        if "github.com" in href.lower():
-            gh_links.append(href.split("?")[0].split("#")[0].rstrip("/"))
-        if href.startswith("http") and "huggingface.co" not in href:
-            web_links.append(href.split("?")[0].split("#")[0].rstrip("/"))
-    gh_links = list(dict.fromkeys(gh_links))
-    web_links = list(dict.fromkeys(web_links))
-    return emails, gh_links, web_links
+    emails, page = parse_response(resp)
+    return emails, page.github, page.external
 
 def get_user_models(user: str, pages: int) -> list[str]:
     slugs: list[str] = []
@@ -86,14 +119,11 @@ def get_user_models(user: str, pages: int) -> list[str]:
         url = f"{HF_BASE}/{user}?p={p}&sort=models"
         resp = timed_get(url, "hf_models_of_user", headers={"User-Agent": UA})
         if not resp or resp.status_code != 200:
-            time.sleep(0.1); continue
-        soup = BeautifulSoup(resp.text, "html.parser")
-        for a in soup.select(f"a[href^='/{user}/']"):
-            href = a.get("href", "").split("?")[0].split("#")[0].rstrip("/")
-            parts = href.strip("/").split("/")
-            if len(parts) == 2 and href not in slugs:
+            continue
+        _, page = parse_response(resp, emails=False)
+        for href in page.user_slugs(user):
+            if href not in slugs:
                 slugs.append(href)
-        time.sleep(0.1)
     return slugs
 
 def scrape_hf_model_page(slug: str) -> Tuple[list[str], list[str]]:
@@ -101,20 +131,13 @@ def scrape_hf_model_page(slug: str) -> Tuple[list[str], list[str]]:
     resp = timed_get(url, "hf_model_page", headers={"User-Agent": UA})
     if not resp or resp.status_code != 200:
         return [], []
-    text = resp.text
-    emails = extract_emails(text)
-    soup = BeautifulSoup(resp.text, "html.parser")
-    gh_links = [a["href"].split("?")[0].split("#")[0].rstrip("/")
-                for a in soup.find_all("a", href=True)
-                if "github.com" in a["href"].lower()]
-    gh_links = list(dict.fromkeys(gh_links))
-    return emails, gh_links
-
-def scrape_website_for_emails(url: str) -> list[str]:
-    resp = timed_get(url, "website", headers={"User-Agent": UA})
-    if not resp or resp.status_code != 200:
-        return []
-    return extract_emails(resp.text)
+    emails, page = parse_response(resp)
+    return emails, page.github
+
+def scrape_website_for_emails(url: str, enough: int = 1, stop: Optional[Callable[[], bool]] = None,
+                              is_new: Optional[Callable[[str], bool]] = None) -> list[str]:
+    # the linked page plus a few same-site contact/about pages (see site_crawler)
+    return crawl_site(url, enough, stop, is_new)
 
 def _gh_headers() -> dict:
     h = {"User-Agent": UA}
@@ -122,23 +145,45 @@ def _gh_headers() -> dict:
         h["Authorization"] = f"token {GITHUB_TOKEN}"
     return h
 
-def get_github_emails(user_or_url: str) -> list[str]:
-    username = user_or_url.rstrip("/").split("/")[-1] if "github.com" in user_or_url else user_or_url
+def _json_list(resp) -> list:
+    try:
+        data = resp.json()
+    except ValueError:
+        return []
+    return data if isinstance(data, list) else []
+
+def _github_event_emails(username: str) -> Optional[list[str]]:
+    # one call: commit authors of the account's recent public pushes
+    resp = timed_get(f"{GITHUB_API}/users/{username}/events/public?per_page=100",
+                     "github_events", headers=_gh_headers())
+    if not resp or resp.status_code != 200:
+        return None
+    emails: list[str] = []
+    for ev in _json_list(resp):
+        if not isinstance(ev, dict) or ev.get("type") != "PushEvent":
+            continue
+        for c in (ev.get("payload") or {}).get("commits") or []:
+            e = (c.get("author") or {}).get("email") if isinstance(c, dict) else None
+            if isinstance(e, str):
+                emails.append(e)
+    return emails
+
+def _github_commit_emails(username: str) -> Optional[list[str]]:
     resp = timed_get(f"{GITHUB_API}/users/{username}/repos", "github_repos", headers=_gh_headers())
     if not resp or resp.status_code != 200:
-        return []
-    repos_json = resp.json() if isinstance(resp.json(), list) else []
+        return None
     emails: list[str] = []
-    for repo in repos_json[:4]:
-        name = repo.get("name")
+    for repo in _json_list(resp)[:4]:
+        name = repo.get("name") if isinstance(repo, dict) else None
         if not name:
             continue
-        resp2 = timed_get(f"{GITHUB_API}/repos/{username}/{name}/commits?per_page=100",
-                          "github_commits", headers=_gh_headers())
+        url = f"{GITHUB_API}/repos/{username}/{name}/commits?per_page=100"
+        if (repo.get("owner") or {}).get("type") == "User":
+            url += f"&author={username}"  # only the account's own commits
+        resp2 = timed_get(url, "github_commits", headers=_gh_headers())
         if not resp2 or resp2.status_code != 200:
-            time.sleep(0.1); continue
-        commits = resp2.json() if isinstance(resp2.json(), list) else []
-        for c in commits:
+            continue
+        for c in _json_list(resp2):
             for path in (("commit", "author", "email"), ("commit", "committer", "email")):
                 ref = c
                 for k in path:
@@ -147,165 +192,274 @@ def get_github_emails(user_or_url: str) -> list[str]:
                         break
                 if isinstance(ref, str):
                     emails.append(ref)
-        time.sleep(0.1)
-    return extract_emails("\n".join(emails))
+    return emails
 
-def run_scrape(params: ScrapeParams) -> dict:
-    global _running, _last_kpi
-    if _running:
-        raise RuntimeError("Scrape already running")
-    t0 = time.perf_counter()
-    _running = True
-    try:
-        users = scrape_hf_users(params.hf_listing_pages)
+def _harvest_github(username: str) -> Optional[list[str]]:
+    """Events first; repos + commits only when they show no usable addresses. None = calls failed."""
+    events = _github_event_emails(username)
+    found = extract_emails("\n".join(events or []))
+    if not found:  # nothing, or only noreply / invalid addresses
+        more = _github_commit_emails(username)
+        if events is None and more is None:
+            return None
+        found = extract_emails("\n".join(more or []))
+    return found
 
-        # cross-run de-dup
-        seen_emails = load_existing_emails(OUT_PATH)             # emails-only (kept for safety)
-        seen_pairs = _load_existing_pairs(OUT_PATH)              # (username, email)
+def get_github_emails(user_or_url: str) -> list[str]:
+    username = user_or_url.rstrip("/").split("/")[-1] if "github.com" in user_or_url else user_or_url
+    if not username:
+        return []
+    # shared orgs/accounts are linked from many HF users: harvest each login once per TTL
+    return get_memo().get(username, _harvest_github)
 
-        found_this_run = 0
-        users_with_hits = 0
-        emails_by_source: Dict[str, int] = {
+class _RunState:
+    """
+    Cross-run dedup, email_limit and per-run counters. Shared by the
+    sequential loop and the concurrent crawler, so writes go through a lock.
+    """
+    def __init__(self, email_limit: int, index: EmailIndex, writer: JsonlWriter,
+                 checkpoint: CrawlCheckpoint, scheduler: Optional[StageScheduler] = None):
+        self.email_limit = email_limit
+        self.index = index                                       # emails + (username, email) seen so far
+        self.writer = writer
+        self.found = 0
+        self.users_visited = 0
+        self.users_with_hits = 0
+        self.emails_by_source: Dict[str, int] = {
             "huggingface-profile": 0, "huggingface-model": 0, "website": 0, "github": 0
         }
-        domains_count: Dict[str, int] = {}
+        self.domains_count: Dict[str, int] = {}
+        self.checkpoint = checkpoint
+        self.scheduler = scheduler or StageScheduler()
+        self._lock = threading.Lock()
 
-        for user in users:
-            if found_this_run >= params.email_limit:
-                break
-            USERS_VISITED.inc()
-            per_user_written = 0
-            per_user_capped = False
+    def done(self) -> bool:
+        return self.found >= self.email_limit
 
-            prof_emails, gh_links_on_prof, web_links = scrape_hf_profile(user)
+    def is_new(self, user: str, email: str) -> bool:
+        """Would record() write this email (no side effects, unlike a dedup check in a sharded run)?"""
+        return not self.index.seen(user, email.strip().lower())
 
-            # HF profile
-            for e in prof_emails:
-                if found_this_run >= params.email_limit or per_user_capped:
+    def record(self, user: str, emails: List[str], source: str, hits: "_UserHits") -> None:
+        with self._lock:
+            for e in emails:
+                if self.done() or hits.capped:
                     break
                 el = e.strip().lower()
-                pair = (user, el)
-                if el in seen_emails or pair in seen_pairs:
-                    EMAILS_DEDUP_SKIPPED.inc(); continue
-                append_jsonl(OUT_PATH, {"username": user, "email": el, "source": "huggingface-profile"})
-                EMAILS_FOUND.labels("huggingface-profile").inc()
+                with span("dedup"):
+                    if self.index.seen(user, el):
+                        EMAILS_DEDUP_SKIPPED.inc(); continue
+                    self.index.reserve(user, el)
+                with span("write"):
+                    self.writer.write({"username": user, "email": el, "source": source})
+                EMAILS_FOUND.labels(source).inc()
                 EMAILS_WRITTEN.inc()
-                emails_by_source["huggingface-profile"] += 1
-                seen_emails.add(el); seen_pairs.add(pair)
-                found_this_run += 1; per_user_written += 1
-                dom = el.split("@")[-1].lower(); domains_count[dom] = domains_count.get(dom, 0) + 1
-                if _PER_USER_MAX and per_user_written >= _PER_USER_MAX:
-                    per_user_capped = True
-
-            if found_this_run >= params.email_limit:
-                break
-
-            gh_links_accum = list(gh_links_on_prof)
-
-            # HF models
-            if not per_user_capped:
-                for slug in get_user_models(user, params.models_pages_per_user):
-                    if found_this_run >= params.email_limit or per_user_capped:
-                        break
-                    m_emails, m_gh_links = scrape_hf_model_page(slug)
-                    for e in m_emails:
-                        if found_this_run >= params.email_limit or per_user_capped:
-                            break
-                        el = e.strip().lower()
-                        pair = (user, el)
-                        if el in seen_emails or pair in seen_pairs:
-                            EMAILS_DEDUP_SKIPPED.inc(); continue
-                        append_jsonl(OUT_PATH, {"username": user, "email": el, "source": "huggingface-model"})
-                        EMAILS_FOUND.labels("huggingface-model").inc()
-                        EMAILS_WRITTEN.inc()
-                        emails_by_source["huggingface-model"] += 1
-                        seen_emails.add(el); seen_pairs.add(pair)
-                        found_this_run += 1; per_user_written += 1
-                        dom = el.split("@")[-1].lower(); domains_count[dom] = domains_count.get(dom, 0) + 1
-                        if _PER_USER_MAX and per_user_written >= _PER_USER_MAX:
-                            per_user_capped = True
-                    for g in m_gh_links:
-                        if g not in gh_links_accum:
-                            gh_links_accum.append(g)
-
-            if found_this_run >= params.email_limit:
-                break
-
-            # Websites
-            if not per_user_capped:
-                for link in web_links:
-                    if found_this_run >= params.email_limit or per_user_capped:
-                        break
-                    for e in scrape_website_for_emails(link):
-                        if found_this_run >= params.email_limit or per_user_capped:
-                            break
-                        el = e.strip().lower()
-                        pair = (user, el)
-                        if el in seen_emails or pair in seen_pairs:
-                            EMAILS_DEDUP_SKIPPED.inc(); continue
-                        append_jsonl(OUT_PATH, {"username": user, "email": el, "source": "website"})
-                        EMAILS_FOUND.labels("website").inc()
-                        EMAILS_WRITTEN.inc()
-                        emails_by_source["website"] += 1
-                        seen_emails.add(el); seen_pairs.add(pair)
-                        found_this_run += 1; per_user_written += 1
-                        dom = el.split("@")[-1].lower(); domains_count[dom] = domains_count.get(dom, 0) + 1
-                        if _PER_USER_MAX and per_user_written >= _PER_USER_MAX:
-                            per_user_capped = True
-
-            if found_this_run >= params.email_limit:
-                break
-
-            # GitHub
-            if not per_user_capped:
-                for gh in gh_links_accum:
-                    if found_this_run >= params.email_limit or per_user_capped:
+                self.emails_by_source[source] += 1
+                self.found += 1; hits.written += 1
+                dom = el.split("@")[-1].lower(); self.domains_count[dom] = self.domains_count.get(dom, 0) + 1
+                if _PER_USER_MAX and hits.written >= _PER_USER_MAX:
+                    hits.capped = True
+
+    def counters(self) -> dict:
+        return {"found": self.found, "users_visited": self.users_visited, "users_with_hits": self.users_with_hits,
+                "emails_by_source": dict(self.emails_by_source), "domains_count": dict(self.domains_count)}
+
+    def restore(self, counters: dict) -> None:
+        # counters of the interrupted run this one resumes
+        self.found = counters.get("found", 0)
+        self.users_visited = counters.get("users_visited", 0)
+        self.users_with_hits = counters.get("users_with_hits", 0)
+        self.emails_by_source.update(counters.get("emails_by_source", {}))
+        self.domains_count.update(counters.get("domains_count", {}))
+
+    def stage(self, user: str, stage: str) -> None:
+        self.checkpoint.stage(user, stage)
+
+    def user_done(self, user: str, hits: "_UserHits") -> None:
+        with self._lock:
+            self.users_visited += 1
+            if hits.written > 0:
+                self.users_with_hits += 1
+            counters = self.counters()
+            # checkpointed once the user's rows are on disk; queued under the lock,
+            # so every row counted in `counters` is ahead of it
+            self.writer.after_flush(lambda: self.checkpoint.user_done(user, counters))
+        if hits.written > 0:
+            USERS_WITH_HITS.inc()
+            EMAILS_PER_USER.observe(hits.written)
+
+class _UserHits:
+    __slots__ = ("written", "capped")
+
+    def __init__(self):
+        self.written = 0
+        self.capped = False
+
+def _visit_user(user: str, params: ScrapeParams, state: _RunState) -> None:
+    USERS_VISITED.inc()
+    hits = _UserHits()
+    with user_span(user):
+        _visit_stages(user, params, state, hits)  # a failed visit stays pending for a resume
+    state.user_done(user, hits)
+
+class _UserLinks:
+    __slots__ = ("github", "github_done", "web")
+
+    def __init__(self, github: List[str], web: List[str]):
+        self.github = list(github)
+        self.github_done: Set[str] = set()
+        self.web = web
+
+def _stage_hf_models(user: str, params: ScrapeParams, state: _RunState, hits: _UserHits, links: _UserLinks) -> None:
+    for slug in get_user_models(user, params.models_pages_per_user):
+        if state.done() or hits.capped:
+            break
+        m_emails, m_gh_links = scrape_hf_model_page(slug)
+        state.record(user, m_emails, "huggingface-model", hits)
+        for g in m_gh_links:
+            if g not in links.github:
+                links.github.append(g)
+
+def _stage_websites(user: str, params: ScrapeParams, state: _RunState, hits: _UserHits, links: _UserLinks) -> None:
+    stop = lambda: state.done() or hits.capped
+    for link in links.web:
+        if stop():
+            break
+        enough = _PER_USER_MAX - hits.written if _PER_USER_MAX else 0
+        is_new = lambda e: state.is_new(user, e)
+        state.record(user, scrape_website_for_emails(link, enough, stop, is_new), "website", hits)
+
+def _stage_github(user: str, params: ScrapeParams, state: _RunState, hits: _UserHits, links: _UserLinks) -> None:
+    for gh in links.github:
+        if state.done() or hits.capped:
+            break
+        if gh not in links.github_done:
+            links.github_done.add(gh)
+            state.record(user, get_github_emails(gh), "github", hits)
+
+_STAGE_FUNCS = {"hf_models": _stage_hf_models, "websites": _stage_websites, "github": _stage_github}
+
+def _run_stage(name: str, user: str, params: ScrapeParams, state: _RunState, hits: _UserHits,
+               links: _UserLinks) -> None:
+    req0, written0 = thread_requests(), hits.written
+    with span(f"stage:{name}"):
+        _STAGE_FUNCS[name](user, params, state, hits, links)
+    state.scheduler.observe(name, thread_requests() - req0, hits.written - written0)
+
+def _visit_stages(user: str, params: ScrapeParams, state: _RunState, hits: _UserHits) -> None:
+    # HF profile: always first, its links feed the other stages
+    req0 = thread_requests()
+    with span(f"stage:{PROFILE}"):
+        prof_emails, gh_links_on_prof, web_links = scrape_hf_profile(user)
+        state.record(user, prof_emails, "huggingface-profile", hits)
+    state.scheduler.observe(PROFILE, thread_requests() - req0, hits.written)
+    state.stage(user, "profile")
+
+    # then models / websites / GitHub, best yield first (see stage_scheduler)
+    links = _UserLinks(gh_links_on_prof, web_links)
+    plan = state.scheduler.plan()
+    for name in plan:
+        if state.done() or hits.capped:
+            return
+        _run_stage(name, user, params, state, hits, links)
+        state.stage(user, name)
+    # GitHub links found on model pages after the GitHub stage ran
+    if "github" in plan and not (state.done() or hits.capped) and len(links.github_done) < len(links.github):
+        _run_stage("github", user, params, state, hits, links)
+
+def run_scrape(params: ScrapeParams) -> dict:
+    global _running
+    if _running:
+        raise RuntimeError("Scrape already running")
+    t0 = time.perf_counter()
+    _running = True
+    try:
+        # frontier checkpoint: a resumed run continues the interrupted run's
+        # pending users, listing cursor and counters
+        checkpoint = get_checkpoint()
+        spans.reset()
+        requests0 = requests_made()
+        resumed = params.resume and checkpoint.resumable()
+        if resumed:
+            params = ScrapeParams(**{**checkpoint.params, "concurrency": params.concurrency,
+                                     "verify": params.verify, "resume": True})
+        else:
+            checkpoint.start(params.model_dump(exclude={"resume"}))
+
+        # users stream in while listing pages are still being fetched
+        discovered: Set[str] = checkpoint.users()
+        listing = {"complete": False}  # False: the run stopped before the last listing page
+
+        def listed() -> Iterator[str]:
+            yield from iter_hf_users(params.hf_listing_pages, discovered, checkpoint.cursor, checkpoint.add_page)
+            listing["complete"] = True
+
+        users = itertools.chain(checkpoint.pending(), listed())
+
+        # cross-run de-dup; rows reach the index once the writer has them on disk
+        index = get_index(OUT_PATH)
+        with JsonlWriter(OUT_PATH, on_flush=index.commit, on_error=index.release) as writer:
+            state = _RunState(params.email_limit, index, writer, checkpoint)
+            if resumed:
+                state.restore(checkpoint.counters or {})
+            found0 = state.found
+            if params.concurrency > 1:
+                run_crawl(users, lambda u: _visit_user(u, params, state), state.done, params.concurrency,
+                          queue_size=DISCOVERY_QUEUE_SIZE or 2 * params.concurrency)
+            else:
+                for user in users:
+                    if state.done():
                         break
-                    for e in get_github_emails(gh):
-                        if found_this_run >= params.email_limit or per_user_capped:
-                            break
-                        el = e.strip().lower()
-                        pair = (user, el)
-                        if el in seen_emails or pair in seen_pairs:
-                            EMAILS_DEDUP_SKIPPED.inc(); continue
-                        append_jsonl(OUT_PATH, {"username": user, "email": el, "source": "github"})
-                        EMAILS_FOUND.labels("github").inc()
-                        EMAILS_WRITTEN.inc()
-                        emails_by_source["github"] += 1
-                        seen_emails.add(el); seen_pairs.add(pair)
-                        found_this_run += 1; per_user_written += 1
-                        dom = el.split("@")[-1].lower(); domains_count[dom] = domains_count.get(dom, 0) + 1
-                        if _PER_USER_MAX and per_user_written >= _PER_USER_MAX:
-                            per_user_capped = True
-
-            if per_user_written > 0:
-                users_with_hits += 1
-                EMAILS_PER_USER.observe(per_user_written)
+                    _visit_user(user, params, state)
+        checkpoint.finish()
+        state.scheduler.save()
+        run_requests = requests_made() - requests0
 
         run_secs = time.perf_counter() - t0
         RUN_DURATION.observe(run_secs)
 
-        total_users = len(users)
-        hit_rate = (users_with_hits / total_users * 100.0) if total_users else 0.0
+        # discovery stops once email_limit is reached, so users_discovered is only
+        # what was listed by then; the hit rate is over the users actually visited
+        hit_rate = (state.users_with_hits / state.users_visited * 100.0) if state.users_visited else 0.0
         kpi_snapshot = {
             "run_seconds": round(run_secs, 2),
-            "users_discovered": total_users,
-            "users_with_hits": users_with_hits,
+            "users_discovered": len(discovered),
+            "users_discovered_partial": not listing["complete"],
+            "users_visited": state.users_visited,
+            "users_with_hits": state.users_with_hits,
             "hit_rate_percent": round(hit_rate, 2),
-            "new_emails_written": found_this_run,
-            "emails_by_source": emails_by_source,
-            "unique_domains": len(domains_count),
-            "top_domains": sorted(domains_count.items(), key=lambda x: x[1], reverse=True)[:10],
+            "new_emails_written": state.found,
+            "emails_by_source": state.emails_by_source,
+            "unique_domains": len(state.domains_count),
+            "top_domains": sorted(state.domains_count.items(), key=lambda x: x[1], reverse=True)[:10],
             "out_path": os.path.abspath(OUT_PATH),
             "per_user_max": _PER_USER_MAX,
+            "concurrency": params.concurrency,
+            "resumed": resumed,
+            "requests": run_requests,
+            "requests_per_email": round(run_requests / (state.found - found0), 2) if state.found > found0 else None,
+            "stages": state.scheduler.summary(),
+            "timing": spans.breakdown(),
         }
-        _last_kpi = kpi_snapshot
-        with open("kpi_latest.json", "w", encoding="utf-8") as f:
-            json.dump(kpi_snapshot, f, ensure_ascii=False, indent=2)
+        _save_kpi(kpi_snapshot)  # kept even if verification fails
+        if params.verify:
+            try:
+                kpi_snapshot["verification"] = run_verification(OUT_PATH)
+            except RuntimeError as e:
+                if "already running" not in str(e):
+                    raise
+                kpi_snapshot["verification"] = "skipped (already running)"  # /verify/pipeline has it
+            _save_kpi(kpi_snapshot)
         return kpi_snapshot
     finally:
         _running = False
 
+def _save_kpi(kpi_snapshot: Dict[str, object]) -> None:
+    global _last_kpi
+    _last_kpi = kpi_snapshot
+    with open("kpi_latest.json", "w", encoding="utf-8") as f:
+        json.dump(kpi_snapshot, f, ensure_ascii=False, indent=2)
+
 def is_running() -> bool:
     return _running
 
@@ -0,0 +1,164 @@
+"""
+Website stage: the page linked from an HF profile, then a few same-site
+pages that usually carry an address (/contact, /about, /team, ...).
+
+The crawl is bounded by SITE_MAX_PAGES, SITE_MAX_DEPTH and SITE_MAX_BYTES,
+follows only links whose path matches SITE_CANDIDATE_PATHS (in that order of
+priority), honours robots.txt for the pages it follows, and stops as soon as
+it has `enough` emails that `is_new()` accepts (not already in the output)
+or `stop()` says the user / run is done. Crawls that used their whole budget
+are cached per site for SITE_CACHE_TTL (at most SITE_CACHE_SIZE sites, least
+recently used dropped first), since many users link the same lab or
+company site; crawls cut short are not, their result depends on the caller. Hosts in SITE_SHARED_HOSTS hold one account per path, so there
+only the linked page is fetched and nothing is cached.
+
+Pages are streamed: only HTML / text bodies are read, at most
+STREAM_MAX_BYTES each, scanned for emails chunk by chunk, and the read ends
+as soon as the page has supplied the emails still needed.
+"""
+import heapq, posixpath, threading, time
+from collections import OrderedDict
+from typing import Callable, List, Optional, Tuple
+from urllib.parse import urljoin, urlsplit
+
+from app.config import (
+    UA, SITE_MAX_PAGES, SITE_MAX_DEPTH, SITE_MAX_BYTES, SITE_CANDIDATE_PATHS, SITE_SHARED_HOSTS,
+    SITE_CACHE_TTL, SITE_CACHE_SIZE, STREAM_MAX_BYTES,
+)
+from app.metrics import SITE_PAGES, SITE_CACHE, SITE_STOPS, SITE_ROBOTS_BLOCKED
+from app.utils.email_utils import EmailStreamScanner
+from app.utils.html_extract import PageLinks, clean_link
+from app.utils.http_utils import StreamLimits, timed_get
+from app.utils.parse_pool import parse_response
+from app.utils.robots import get_robots
+
+_SKIP_EXT = {".pdf", ".png", ".jpg", ".jpeg", ".gif", ".svg", ".webp", ".ico", ".zip", ".gz", ".tar",
+             ".mp4", ".mp3", ".css", ".js", ".xml", ".json", ".bib", ".ppt", ".pptx", ".doc", ".docx"}
+
+_cache_lock = threading.Lock()
+_cache: "OrderedDict[str, Tuple[float, List[str]]]" = OrderedDict()  # site -> (expires, emails), LRU first
+
+def _site(host: str) -> str:
+    host = host.lower().split(":")[0]
+    return host[4:] if host.startswith("www.") else host
+
+def _shared(site: str) -> bool:
+    return any(site == h or site.endswith("." + h) for h in SITE_SHARED_HOSTS)
+
+def _priority(url: str) -> Optional[int]:
+    """Index of the first candidate word in the URL's path; None = not worth fetching."""
+    path = urlsplit(url).path.lower()
+    if posixpath.splitext(path)[1] in _SKIP_EXT:
+        return None
+    for i, word in enumerate(SITE_CANDIDATE_PATHS):
+        if word in path:
+            return i
+    return None
+
+def _candidates(page: PageLinks, base: str, site: str) -> List[Tuple[int, str]]:
+    out = []
+    for href in page.internal + page.relative + page.external:
+        url = clean_link(urljoin(base, href))
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https") or _site(parts.netloc) != site:
+            continue
+        prio = _priority(url)
+        if prio is not None:
+            out.append((prio, url))
+    return out
+
+def _fetch_page(url: str, max_bytes: int, need: int, known: List[str], links: bool,
+                is_new: Callable[[str], bool]) -> Tuple[List[str], Optional[PageLinks], int, str]:
+    """
+    Stream one page, scanning for emails as it arrives; reading stops at
+    `max_bytes` or once `need` emails not in `known` and accepted by `is_new`
+    are found (0 = read it all). Returns its emails, its links (when asked for and the page was read
+    for them), the bytes read and the URL it was served from (redirects).
+    """
+    scanner = EmailStreamScanner()
+
+    def on_chunk(chunk: bytes, encoding: Optional[str]) -> bool:
+        scanner.feed(chunk, encoding or "")
+        return bool(need) and sum(e not in known and is_new(e) for e in scanner.found) >= need
+
+    resp = timed_get(url, "website", headers={"User-Agent": UA},
+                     stream=StreamLimits(max_bytes=max_bytes, on_chunk=on_chunk))
+    if not resp or resp.status_code != 200:
+        return [], None, 0, url
+    scanner.close()
+    page = None
+    if links and resp.content and getattr(resp, "truncated", None) != "enough":
+        _, page = parse_response(resp, emails=False)
+    return scanner.found, page, len(resp.content), getattr(resp, "url", None) or url
+
+def _crawl(url: str, site: str, enough: int, stop: Callable[[], bool],
+           is_new: Callable[[str], bool]) -> Tuple[List[str], str]:
+    found: List[str] = []
+    frontier: List[Tuple[int, int, int, str]] = [(-1, 0, 0, url)]  # (priority, depth, seq, url)
+    queued = {clean_link(url)}
+    pages = size = seq = 0
+    reason = "exhausted"
+    while frontier:
+        if stop():
+            reason = "limit"; break
+        if pages >= SITE_MAX_PAGES:
+            reason = "pages"; break
+        if size >= SITE_MAX_BYTES:
+            reason = "bytes"; break
+        _, depth, _, page_url = heapq.heappop(frontier)
+        if pages and not get_robots().allowed(page_url):
+            SITE_ROBOTS_BLOCKED.inc()
+            continue
+        SITE_PAGES.labels("linked" if not pages else "candidate").inc()
+        pages += 1
+        follow = depth < SITE_MAX_DEPTH and pages < SITE_MAX_PAGES
+        new = sum(map(is_new, found)) if enough else 0
+        emails, page, read, base = _fetch_page(page_url, min(STREAM_MAX_BYTES, SITE_MAX_BYTES - size),
+                                               enough - new if enough else 0, found, follow, is_new)
+        size += read
+        found.extend(e for e in emails if e not in found)
+        if enough and sum(map(is_new, found)) >= enough:
+            reason = "found"; break
+        if page is not None:
+            # same-site is judged by where the page was served from
+            for prio, link in _candidates(page, base, site):
+                if link not in queued:
+                    queued.add(link)
+                    seq += 1
+                    heapq.heappush(frontier, (prio, depth + 1, seq, link))
+    SITE_STOPS.labels(reason).inc()
+    return found, reason
+
+def crawl_site(url: str, enough: int = 1, stop: Optional[Callable[[], bool]] = None,
+               is_new: Optional[Callable[[str], bool]] = None) -> List[str]:
+    """
+    Emails from the site at `url`. Stops once `enough` emails accepted by
+    `is_new` (default: any) are found (0 = use the whole budget) or `stop()`
+    returns True.
+    """
+    site = _site(urlsplit(url).netloc)
+    stop = stop or (lambda: False)
+    is_new = is_new or (lambda e: True)
+    if not site:
+        return []
+    if _shared(site) or SITE_MAX_PAGES <= 1:
+        SITE_PAGES.labels("linked").inc()
+        return _fetch_page(url, STREAM_MAX_BYTES, enough, [], False, is_new)[0]
+
+    now = time.time()
+    with _cache_lock:
+        hit = _cache.get(site)
+        if hit:
+            _cache.move_to_end(site)
+    if hit and hit[0] > now:
+        SITE_CACHE.labels("hit").inc()
+        return list(hit[1])
+    SITE_CACHE.labels("miss").inc()
+    found, reason = _crawl(url, site, enough, stop, is_new)
+    if reason not in ("limit", "found"):  # cut short for this user / run: not the site's answer
+        with _cache_lock:
+            _cache[site] = (now + SITE_CACHE_TTL, found)
+            _cache.move_to_end(site)
+            while len(_cache) > SITE_CACHE_SIZE:
+                _cache.popitem(last=False)
+    return found
@@ -0,0 +1,96 @@
+"""
+Per-user order of the visit stages that follow the HF profile.
+
+Each stage's yield (new emails per request) is tracked during the run, on
+top of earlier runs' totals. A user's stages run highest yield first, so
+with PER_USER_MAX the cheap, productive stages fill the user's quota and the
+rest never send their requests; a stage whose yield stays below
+STAGE_SKIP_YIELD after STAGE_MIN_REQUESTS requests is skipped. A
+STAGE_EXPLORE share of users still gets every stage, in random order, so
+the estimates keep up when a skipped stage starts paying off.
+"""
+import random, threading
+from typing import Dict, List, Optional, Tuple
+
+from app.config import (
+    STAGE_ORDER, STAGE_EXPLORE, STAGE_SKIP_YIELD, STAGE_MIN_REQUESTS, STAGE_PRIOR_REQUESTS,
+)
+from app.metrics import STAGE_REQUESTS, STAGE_EMAILS, STAGE_SKIPPED, STAGE_YIELD
+from app.utils.stage_stats import StageStats, get_stage_stats
+
+PROFILE = "hf_profile"
+STAGES = ("hf_models", "websites", "github")  # the fixed order
+
+def _zero() -> Dict[str, int]:
+    return {"requests": 0, "emails": 0, "visits": 0, "skipped": 0}
+
+class StageScheduler:
+    def __init__(self, mode: str = STAGE_ORDER, explore: float = STAGE_EXPLORE,
+                 skip_yield: float = STAGE_SKIP_YIELD, min_requests: int = STAGE_MIN_REQUESTS,
+                 stats: Optional[StageStats] = None):
+        self.adaptive = mode == "adaptive"
+        self.explore = explore
+        self.skip_yield = skip_yield
+        self.min_requests = min_requests
+        self.stats = stats if stats is not None else get_stage_stats()
+        self._lock = threading.Lock()
+        self._run: Dict[str, Dict[str, int]] = {s: _zero() for s in (PROFILE,) + STAGES}
+        # earlier runs, scaled down to at most STAGE_PRIOR_REQUESTS requests per stage
+        self._prior: Dict[str, Tuple[float, float]] = {}
+        for s, c in self.stats.load().items():
+            scale = min(1.0, STAGE_PRIOR_REQUESTS / c["requests"]) if c["requests"] else 1.0
+            self._prior[s] = (c["requests"] * scale, c["emails"] * scale)
+
+    def _totals(self, stage: str) -> Tuple[float, float]:
+        pr, pe = self._prior.get(stage, (0.0, 0.0))
+        run = self._run[stage]
+        return pr + run["requests"], pe + run["emails"]
+
+    def estimate(self, stage: str) -> float:
+        """Emails per request; +1 on both sides so an untried stage looks good."""
+        req, emails = self._totals(stage)
+        return (emails + 1.0) / (req + 1.0)
+
+    def plan(self) -> List[str]:
+        """Stages to run for the next user, in order; skipped stages are left out."""
+        if not self.adaptive:
+            return list(STAGES)
+        if random.random() < self.explore:
+            order = list(STAGES)
+            random.shuffle(order)
+            return order
+        with self._lock:
+            ranked = sorted(STAGES, key=self.estimate, reverse=True)
+            keep = []
+            for s in ranked:
+                req, emails = self._totals(s)
+                if req < self.min_requests or emails / req >= self.skip_yield:
+                    keep.append(s)
+            for s in ranked:
+                if s not in keep:
+                    self._run[s]["skipped"] += 1
+                    STAGE_SKIPPED.labels(s).inc()
+        return keep
+
+    def observe(self, stage: str, requests: int, emails: int) -> None:
+        """One visit of `stage`: requests it sent and new emails it wrote."""
+        STAGE_REQUESTS.labels(stage).inc(requests)
+        STAGE_EMAILS.labels(stage).inc(emails)
+        with self._lock:
+            run = self._run[stage]
+            run["requests"] += requests
+            run["emails"] += emails
+            run["visits"] += 1
+            STAGE_YIELD.labels(stage).set(self.estimate(stage))
+
+    def summary(self) -> Dict[str, dict]:
+        """This run's per-stage counts, for the KPI."""
+        with self._lock:
+            return {s: {**c, "emails_per_request": round(c["emails"] / c["requests"], 4) if c["requests"] else None,
+                        "estimate": round(self.estimate(s), 4)}
+                    for s, c in self._run.items()}
+
+    def save(self) -> None:
+        with self._lock:
+            counts = {s: dict(c) for s, c in self._run.items() if any(c.values())}
+        self.stats.add(counts)
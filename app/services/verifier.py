@@ -0,0 +1,152 @@
+import json, os, sqlite3, threading, time
+from typing import Dict, Iterable, List, Optional
+
+from app.config import OUT_PATH, VERIFY_CONCURRENCY, VERIFY_SMTP, VERIFY_CHUNK_ROWS
+from app.metrics import VERIFY_CHECKED, VERIFY_BATCH_SECONDS, VERIFY_THROUGHPUT, VERIFY_BACKLOG_BYTES
+from app.utils.io_utils import iter_jsonl_from, file_marker, resume_offset
+from app.utils.verify_email import verify_batch
+
+class VerificationStore:
+    """
+    Sidecar results for an emails JSONL (`<path>.verify`): status + reasons per
+    email, and the byte offset of the JSONL verified so far.
+    """
+    def __init__(self, jsonl_path: str, store_path: Optional[str] = None):
+        self.jsonl_path = jsonl_path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(store_path or jsonl_path + ".verify", timeout=30, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(
+            "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);"
+            "CREATE TABLE IF NOT EXISTS results (email TEXT PRIMARY KEY, status TEXT NOT NULL,"
+            " reasons TEXT NOT NULL, checked_at REAL NOT NULL) WITHOUT ROWID;"
+            "CREATE INDEX IF NOT EXISTS results_status ON results(status);"
+        )
+        self._db.commit()
+
+    def resume_at(self) -> int:
+        with self._lock:
+            meta = dict(self._db.execute("SELECT key, value FROM meta").fetchall())
+        # results stay valid if the JSONL is rotated; only the read position resets
+        return resume_offset(self.jsonl_path, int(meta.get("offset", "0")),
+                             int(meta.get("inode", "0")), meta.get("marker", ""))
+
+    def known(self, emails: Iterable[str]) -> set[str]:
+        emails = list(emails)
+        found: set[str] = set()
+        with self._lock:
+            for i in range(0, len(emails), 500):
+                chunk = emails[i:i + 500]
+                q = "SELECT email FROM results WHERE email IN (%s)" % ",".join("?" * len(chunk))
+                found.update(r[0] for r in self._db.execute(q, chunk))
+        return found
+
+    def statuses(self, emails: Iterable[str]) -> Dict[str, str]:
+        emails = list(emails)
+        out: Dict[str, str] = {}
+        with self._lock:
+            for i in range(0, len(emails), 500):
+                chunk = emails[i:i + 500]
+                q = "SELECT email, status FROM results WHERE email IN (%s)" % ",".join("?" * len(chunk))
+                out.update(self._db.execute(q, chunk).fetchall())
+        return out
+
+    def get(self, email: str) -> Optional[dict]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT status, reasons, checked_at FROM results WHERE email = ?", (email,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {"email": email, "status": row[0], "reasons": json.loads(row[1]), "checked_at": row[2]}
+
+    def save(self, results: List[dict], offset: int) -> None:
+        now = time.time()
+        st = os.stat(self.jsonl_path)
+        with self._lock:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?)",
+                [(r["email"], r["status"], json.dumps(r["reasons"]), now) for r in results],
+            )
+            self._db.executemany(
+                "INSERT OR REPLACE INTO meta VALUES (?, ?)",
+                [("offset", str(offset)), ("inode", str(st.st_ino)),
+                 ("marker", file_marker(self.jsonl_path, offset))],
+            )
+            self._db.commit()
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._db.execute("SELECT status, COUNT(*) FROM results GROUP BY status").fetchall())
+
+_stores: Dict[str, VerificationStore] = {}
+_stores_lock = threading.Lock()
+
+def get_store(jsonl_path: str = OUT_PATH) -> VerificationStore:
+    key = os.path.abspath(jsonl_path)
+    with _stores_lock:
+        if key not in _stores:
+            _stores[key] = VerificationStore(jsonl_path)
+        return _stores[key]
+
+_running = False
+_run_lock = threading.Lock()
+
+def is_running() -> bool:
+    return _running
+
+def run_verification(path: str = OUT_PATH, do_smtp: bool = VERIFY_SMTP, require_com: bool = False,
+                     concurrency: int = VERIFY_CONCURRENCY, chunk_rows: int = VERIFY_CHUNK_ROWS) -> dict:
+    """
+    Verify rows appended to `path` since the last pass, `chunk_rows` at a time,
+    grouped by domain via verify_batch. Progress is committed after each
+    chunk, so an interrupted pass resumes without re-verifying; emails that
+    already have a result (e.g. after a rotation) are skipped.
+    """
+    global _running
+    with _run_lock:
+        if _running:
+            raise RuntimeError("Verification already running")
+        _running = True
+    try:
+        t0 = time.perf_counter()
+        verified = 0
+        by_status: Dict[str, int] = {}
+        if not os.path.exists(path):
+            return {"verified": 0, "by_status": {}, "seconds": 0.0}
+        store = get_store(path)
+        start = store.resume_at()
+
+        def _flush(emails: List[str], offset: int) -> None:
+            nonlocal verified
+            c0 = time.perf_counter()
+            uniq = list(dict.fromkeys(emails))
+            done = store.known(uniq)
+            todo = [e for e in uniq if e not in done]
+            results = verify_batch(todo, require_com=require_com, do_smtp=do_smtp,
+                                   concurrency=concurrency) if todo else []
+            store.save(results, offset)
+            VERIFY_BATCH_SECONDS.observe(time.perf_counter() - c0)
+            for r in results:
+                VERIFY_CHECKED.labels(r["status"]).inc()
+                by_status[r["status"]] = by_status.get(r["status"], 0) + 1
+            verified += len(results)
+            VERIFY_BACKLOG_BYTES.set(max(0, os.path.getsize(path) - offset))
+
+        pending: List[str] = []
+        end = start
+        for row, _, end in iter_jsonl_from(path, start):
+            e = str(row.get("email") or "").strip().lower()
+            if e:
+                pending.append(e)
+            if len(pending) >= chunk_rows:
+                _flush(pending, end)
+                pending = []
+        if pending or end != start:
+            _flush(pending, end)
+
+        secs = time.perf_counter() - t0
+        VERIFY_THROUGHPUT.set(verified / secs if secs > 0 else 0.0)
+        return {"verified": verified, "by_status": by_status, "seconds": round(secs, 2)}
+    finally:
+        _running = False
@@ -0,0 +1,119 @@
+import json, sqlite3, threading, time
+from typing import Dict, Iterable, List, Optional, Set
+
+from app.config import CHECKPOINT_PATH
+
+class CrawlCheckpoint:
+    """
+    Frontier of the current run in SQLite: every discovered user (pending or
+    done, with the last stage it finished), the listing cursor, the run
+    params and the run counters. Written as the crawl goes, so a restarted
+    run can pick up the pending users and the next listing page.
+    Users cut off mid-visit stay pending and are visited again.
+    """
+    def __init__(self, path: str):
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(
+            "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);"
+            "CREATE TABLE IF NOT EXISTS users (username TEXT PRIMARY KEY, seq INTEGER NOT NULL,"
+            " done INTEGER NOT NULL DEFAULT 0, stage TEXT NOT NULL DEFAULT '');"
+        )
+        self._db.commit()
+
+    def _get(self, key: str, default=None):
+        row = self._db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def _put(self, key: str, value) -> None:
+        self._db.execute("INSERT OR REPLACE INTO meta VALUES (?, ?)", (key, json.dumps(value)))
+
+    # ---- run lifecycle ----
+    def resumable(self) -> bool:
+        with self._lock:
+            return self._get("status") == "running"
+
+    def start(self, params: dict) -> None:
+        with self._lock:
+            self._db.execute("DELETE FROM users")
+            self._db.execute("DELETE FROM meta")
+            self._put("status", "running")
+            self._put("params", params)
+            self._put("started_at", time.time())
+            self._db.commit()
+
+    def finish(self) -> None:
+        with self._lock:
+            self._put("status", "finished")
+            self._put("finished_at", time.time())
+            self._db.commit()
+
+    @property
+    def params(self) -> dict:
+        with self._lock:
+            return self._get("params", {})
+
+    @property
+    def cursor(self) -> Optional[dict]:
+        with self._lock:
+            return self._get("cursor")
+
+    @property
+    def counters(self) -> Optional[dict]:
+        with self._lock:
+            return self._get("counters")
+
+    # ---- frontier ----
+    def users(self) -> Set[str]:
+        with self._lock:
+            return {r[0] for r in self._db.execute("SELECT username FROM users")}
+
+    def pending(self) -> List[str]:
+        with self._lock:
+            return [r[0] for r in self._db.execute("SELECT username FROM users WHERE done = 0 ORDER BY seq")]
+
+    def add_page(self, users: Iterable[str], cursor: dict) -> None:
+        """Users found on one listing page, stored together with the cursor past it."""
+        with self._lock:
+            seq = self._db.execute("SELECT COALESCE(MAX(seq), 0) FROM users").fetchone()[0]
+            self._db.executemany("INSERT OR IGNORE INTO users (username, seq) VALUES (?, ?)",
+                                 [(u, seq + i) for i, u in enumerate(users, 1)])
+            self._put("cursor", cursor)
+            self._db.commit()
+
+    def stage(self, user: str, stage: str) -> None:
+        with self._lock:
+            self._db.execute("UPDATE users SET stage = ? WHERE username = ?", (stage, user))
+            self._db.commit()
+
+    def user_done(self, user: str, counters: dict) -> None:
+        with self._lock:
+            self._db.execute("UPDATE users SET done = 1, stage = 'done' WHERE username = ?", (user,))
+            self._put("counters", counters)
+            self._db.commit()
+
+    def summary(self) -> Dict[str, object]:
+        with self._lock:
+            by_stage = dict(self._db.execute("SELECT stage, COUNT(*) FROM users GROUP BY stage").fetchall())
+            return {
+                "status": self._get("status"),
+                "params": self._get("params"),
+                "started_at": self._get("started_at"),
+                "users_discovered": sum(by_stage.values()),
+                "users_done": by_stage.get("done", 0),
+                "users_by_stage": by_stage,
+                "cursor": self._get("cursor"),
+                "counters": self._get("counters"),
+            }
+
+_checkpoint: Optional[CrawlCheckpoint] = None
+_checkpoint_lock = threading.Lock()
+
+def get_checkpoint() -> CrawlCheckpoint:
+    global _checkpoint
+    with _checkpoint_lock:
+        if _checkpoint is None:
+            _checkpoint = CrawlCheckpoint(CHECKPOINT_PATH)
+        return _checkpoint
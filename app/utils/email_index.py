@@ -0,0 +1,224 @@
+import json, os, sqlite3, threading
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+from app.utils.io_utils import iter_jsonl_from, file_marker, resume_offset
+
+class EmailIndex:
+    """
+    Persistent dedup index for an emails JSONL file, kept in a SQLite file
+    next to it (`<path>.idx`). Holds every email and (username, email) pair in
+    the file plus how far the file has been read, so opening it costs the
+    same no matter how large the JSONL is. It is rebuilt from scratch only
+    when missing or when the JSONL was truncated/replaced; rows appended by
+    someone else are folded in from the last offset.
+    It also maps every row to its byte range in the JSONL, indexed by
+    username, email domain and source, so rows can be looked up by those
+    without scanning the file (see find / read_rows).
+    """
+    def __init__(self, jsonl_path: str, index_path: Optional[str] = None):
+        self.jsonl_path = jsonl_path
+        self.index_path = index_path or jsonl_path + ".idx"
+        self._lock = threading.RLock()
+        self._pending_emails: Set[str] = set()
+        self._pending_pairs: Set[Tuple[str, str]] = set()
+        self._db = sqlite3.connect(self.index_path, timeout=30, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        had_rows = self._db.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'rows'"
+        ).fetchone() is not None
+        self._db.executescript(
+            "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);"
+            "CREATE TABLE IF NOT EXISTS emails (email TEXT PRIMARY KEY) WITHOUT ROWID;"
+            "CREATE TABLE IF NOT EXISTS pairs (username TEXT NOT NULL, email TEXT NOT NULL,"
+            " PRIMARY KEY (username, email)) WITHOUT ROWID;"
+            "CREATE TABLE IF NOT EXISTS rows (offset INTEGER PRIMARY KEY, length INTEGER NOT NULL,"
+            " email TEXT NOT NULL, username TEXT NOT NULL, domain TEXT NOT NULL, source TEXT NOT NULL);"
+            "CREATE INDEX IF NOT EXISTS rows_username ON rows(username, offset);"
+            "CREATE INDEX IF NOT EXISTS rows_domain ON rows(domain, offset);"
+            "CREATE INDEX IF NOT EXISTS rows_source ON rows(source, offset);"
+        )
+        if not had_rows:
+            self._reset()  # index from before row offsets: rebuilt on the next sync
+        self._db.commit()
+
+    # ---- state ----
+    def _meta(self) -> Dict[str, str]:
+        return dict(self._db.execute("SELECT key, value FROM meta").fetchall())
+
+    def _set_offset(self, offset: int) -> None:
+        st = os.stat(self.jsonl_path)
+        self._db.executemany(
+            "INSERT OR REPLACE INTO meta VALUES (?, ?)",
+            [("offset", str(offset)), ("inode", str(st.st_ino)),
+             ("marker", file_marker(self.jsonl_path, offset))],
+        )
+
+    @property
+    def offset(self) -> int:
+        return int(self._meta().get("offset", "0"))
+
+    def sync(self) -> None:
+        """Bring the index up to date with the JSONL (rebuild only if stale)."""
+        with self._lock:
+            meta = self._meta()
+            old = int(meta.get("offset", "0"))
+            if not os.path.exists(self.jsonl_path):
+                if old or meta:
+                    self._reset()
+                    self._db.commit()
+                return
+            start = resume_offset(self.jsonl_path, old, int(meta.get("inode", "0")), meta.get("marker", ""))
+            if start == 0 and (old or meta):
+                self._reset()
+            end = start
+            for row, row_start, end in iter_jsonl_from(self.jsonl_path, start):
+                self._insert(row.get("username"), row.get("email"))
+                self._insert_row(row, row_start, end - row_start)
+            self._set_offset(end)
+            self._db.commit()
+
+    def _reset(self) -> None:
+        self._db.execute("DELETE FROM emails")
+        self._db.execute("DELETE FROM pairs")
+        self._db.execute("DELETE FROM rows")
+        self._db.execute("DELETE FROM meta")
+
+    def _insert(self, username, email) -> None:
+        # same normalization the scraper used when it loaded the file into sets
+        if isinstance(email, str):
+            self._db.execute("INSERT OR IGNORE INTO emails VALUES (?)", (email,))
+        u = str(username or "").strip()
+        e = str(email or "").strip().lower()
+        if u and e:
+            self._db.execute("INSERT OR IGNORE INTO pairs VALUES (?, ?)", (u, e))
+
+    def _insert_row(self, row: dict, offset: int, length: int) -> None:
+        email = row.get("email")
+        if not isinstance(email, str):
+            return
+        self._db.execute(
+            "INSERT OR REPLACE INTO rows VALUES (?, ?, ?, ?, ?, ?)",
+            (offset, length, email, str(row.get("username") or ""),
+             email.rsplit("@", 1)[-1].strip().lower(), str(row.get("source") or "")),
+        )
+
+    # ---- lookups / updates ----
+    def seen(self, username: str, email: str) -> bool:
+        with self._lock:
+            if email in self._pending_emails or (username, email) in self._pending_pairs:
+                return True
+            if self._db.execute("SELECT 1 FROM emails WHERE email = ?", (email,)).fetchone():
+                return True
+            return self._db.execute(
+                "SELECT 1 FROM pairs WHERE username = ? AND email = ?", (username, email)
+            ).fetchone() is not None
+
+    def reserve(self, username: str, email: str) -> None:
+        """Mark a row as taken before it reaches disk (it is queued in a writer)."""
+        with self._lock:
+            self._pending_emails.add(email)
+            self._pending_pairs.add((username, email))
+
+    def release(self, rows: List[dict]) -> None:
+        """Drop the reservations of rows that never reached disk (writer failed)."""
+        with self._lock:
+            for r in rows:
+                self._pending_emails.discard(r.get("email"))
+                self._pending_pairs.discard((r.get("username"), r.get("email")))
+
+    def commit(self, rows: List[dict], offset: int) -> None:
+        """Record rows that are now on disk; `offset` is the file size after them."""
+        # byte lengths as JsonlWriter encodes the rows; they end at `offset`
+        lengths = [len((json.dumps(r, ensure_ascii=False) + "\n").encode("utf-8")) for r in rows]
+        pos = offset - sum(lengths)
+        with self._lock:
+            stored = self.offset
+            if pos > stored:
+                # rows appended by someone else (a merged shard, another process)
+                # since the last sync: fold them in first, up to this batch
+                rest = iter_jsonl_from(self.jsonl_path, stored)
+                for row, row_start, end in rest:
+                    if row_start >= pos:
+                        break
+                    self._insert(row.get("username"), row.get("email"))
+                    self._insert_row(row, row_start, end - row_start)
+                rest.close()
+            for r, n in zip(rows, lengths):
+                u, e = r.get("username"), r.get("email")
+                self._insert(u, e)
+                self._insert_row(r, pos, n)
+                pos += n
+                self._pending_emails.discard(e)
+                self._pending_pairs.discard((u, e))
+            self._set_offset(max(offset, stored))  # a sync may already be past this batch
+            self._db.commit()
+
+    # ---- row lookups ----
+    def find(self, username: Optional[str] = None, domain: Optional[str] = None,
+             source: Optional[str] = None, limit: int = 50, after: Optional[int] = None,
+             before: Optional[int] = None) -> List[Tuple[int, int, str]]:
+        """
+        (offset, length, email) of rows matching every given filter, in file
+        order: the first `limit` starting at or after `after`, else the last
+        `limit` starting before `before` (or at the end of the file).
+        """
+        where, args = [], []
+        for col, val in (("username", username), ("domain", domain.lower().lstrip("@") if domain else None),
+                         ("source", source)):
+            if val is not None:
+                where.append(f"{col} = ?"); args.append(val)
+        if after is not None:
+            where.append("offset >= ?"); args.append(after)
+        elif before is not None:
+            where.append("offset < ?"); args.append(before)
+        order = "ASC" if after is not None else "DESC"
+        sql = (f"SELECT offset, length, email FROM rows {'WHERE ' + ' AND '.join(where) if where else ''}"
+               f" ORDER BY offset {order} LIMIT ?")
+        with self._lock:
+            found = self._db.execute(sql, (*args, limit)).fetchall()
+        return found if after is not None else found[::-1]
+
+    def iter_find(self, username: Optional[str] = None, domain: Optional[str] = None,
+                  source: Optional[str] = None, batch: int = 1000) -> Iterator[Tuple[int, int, str]]:
+        """find() over the whole file, front to back, `batch` rows per query."""
+        after = 0
+        while True:
+            found = self.find(username, domain, source, limit=batch, after=after)
+            yield from found
+            if len(found) < batch:
+                return
+            after = found[-1][0] + 1
+
+    def read_rows(self, spans: List[Tuple[int, int, str]]) -> List[dict]:
+        """The JSONL rows at `spans` (from find); a row that no longer matches its span is left out."""
+        out: List[dict] = []
+        if not spans:
+            return out
+        with open(self.jsonl_path, "rb") as f:
+            for offset, length, email in spans:
+                f.seek(offset)
+                try:
+                    row = json.loads(f.read(length))
+                except ValueError:
+                    continue
+                if isinstance(row, dict) and row.get("email") == email:
+                    out.append(row)
+        return out
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+_indexes: Dict[str, EmailIndex] = {}
+_indexes_lock = threading.Lock()
+
+def get_index(jsonl_path: str) -> EmailIndex:
+    """Process-wide index for `jsonl_path`, synced with the file on each call."""
+    key = os.path.abspath(jsonl_path)
+    with _indexes_lock:
+        idx = _indexes.get(key)
+        if idx is None:
+            idx = _indexes[key] = EmailIndex(jsonl_path)
+    idx.sync()
+    return idx
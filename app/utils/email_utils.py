@@ -1,6 +1,7 @@
+import codecs
 import re
 import html
-from typing import List
+from typing import Iterator, List
 
 # --- Common obfuscations (kept from your version) ---
 _OBF_PATTERNS = [
@@ -27,26 +28,50 @@ EMAIL_RE = re.compile(
     re.IGNORECASE | re.VERBOSE,
 )
 
+# Compiled once. After brackets are blanked, the bracket/brace variants in
+# _OBF_PATTERNS can no longer match, so only " at " / " dot " remain and one
+# pass handles both. A " dot " that runs straight into " at " is left alone,
+# exactly as the old at-then-dot passes left it (the "@" ate its whitespace).
+_BRACKETS_RE = re.compile(r"[\(\)\[\]\{\}<>]")
+_HYPHEN_RE = re.compile(r"\s*-\s*")
+_AT_DOT_RE = re.compile(r"\s+(?:(at)\s+|dot(?!\s+at\s)\s+)", re.IGNORECASE)
+_SPACES_RE = re.compile(r"\s+")
+
+def _at_or_dot(m: "re.Match[str]") -> str:
+    return "@" if m.group(1) else "."
+
 def deobfuscate(text: str) -> str:
     t = html.unescape(text or "")
-    t = re.sub(r"[\(\)\[\]\{\}<>]", " ", t)   # break <at> / [dot] tricks
-    t = re.sub(r"\s*-\s*", "-", t)            # normalize "name - at - domain"
-    for pat, rep in _OBF_PATTERNS:
-        t = re.sub(pat, rep, t, flags=re.IGNORECASE)
-    return re.sub(r"\s+", " ", t).strip()
+    t = _BRACKETS_RE.sub(" ", t)     # break <at> / [dot] tricks
+    t = _HYPHEN_RE.sub("-", t)       # normalize "name - at - domain"
+    t = _AT_DOT_RE.sub(_at_or_dot, t)
+    return _SPACES_RE.sub(" ", t).strip()
 
-def extract_emails(text: str) -> List[str]:
-    """
-    Extract only .com emails. Filters out:
-      - filename/asset endings like '.jpg' right after the .com
-      - noreply and GitHub noreply addresses
-      - domains with broken labels (underscores, empty, leading/trailing '-')
-    Dedupes while preserving order.
-    """
-    t = deobfuscate(text)
-    if not t:
-        return []
+# --- Fast path: only deobfuscate the stretches of a page that can hold an email ---
+# None of the rewrites above can reach across these characters (they are not
+# whitespace, brackets, letters, '-' or part of an entity name), and none of
+# them can appear inside a match, so cutting a page at them changes nothing.
+_SEPARATORS = "\"'=,:/"
+_SEPARATOR_RE = re.compile(r"[\"'=,:/]")
+# anything that can still turn into "@": a literal one, an entity, or an "at" word
+_AT_CANDIDATE_RE = re.compile(r"@|&|\bat\b", re.IGNORECASE)
+_COM_CANDIDATE_RE = re.compile(r"com|&", re.IGNORECASE)
 
+def _candidate_windows(text: str) -> Iterator[str]:
+    pos = 0
+    for m in _AT_CANDIDATE_RE.finditer(text):
+        p = m.start()
+        if p < pos:
+            continue
+        start = max(pos, max(text.rfind(c, pos, p) for c in _SEPARATORS) + 1)
+        sep = _SEPARATOR_RE.search(text, p)
+        end = sep.start() if sep else len(text)
+        pos = end + 1
+        window = text[start:end]
+        if _COM_CANDIDATE_RE.search(window):
+            yield window
+
+def _scan(t: str) -> List[str]:
     out: list[str] = []
     for m in EMAIL_RE.finditer(t):
         e = m.group(0)
@@ -70,6 +95,23 @@ def extract_emails(text: str) -> List[str]:
             continue
 
         out.append(e)
+    return out
+
+def extract_emails(text: str) -> List[str]:
+    """
+    Extract only .com emails. Filters out:
+      - filename/asset endings like '.jpg' right after the .com
+      - noreply and GitHub noreply addresses
+      - domains with broken labels (underscores, empty, leading/trailing '-')
+    Dedupes while preserving order.
+    Pages with no '@'-like token are skipped outright; otherwise only the
+    windows around candidates are deobfuscated and scanned.
+    """
+    out: list[str] = []
+    for window in _candidate_windows(text or ""):
+        t = deobfuscate(window)
+        if t:
+            out.extend(_scan(t))
 
     # Dedup preserve order
     seen, uniq = set(), []
@@ -79,4 +121,51 @@ def extract_emails(text: str) -> List[str]:
             uniq.append(e)
     return uniq
 
-__all__ = ["deobfuscate", "extract_emails"]
+class EmailStreamScanner:
+    """
+    extract_emails over a body that arrives in chunks, with the same result as
+    one call on the whole text. Candidate windows never cross a separator, so
+    each chunk is scanned up to its last separator and the remainder is carried
+    into the next one; a carry that grows past `max_carry` without a separator
+    is scanned anyway, keeping its last `overlap` chars for the next chunk.
+    """
+    def __init__(self, encoding: str = "", max_carry: int = 65536, overlap: int = 512):
+        self.encoding = encoding
+        self.max_carry = max_carry
+        self.overlap = overlap
+        self.found: List[str] = []
+        self._seen: set = set()
+        self._carry = ""
+        self._decoder = None
+
+    def _add(self, emails: List[str]) -> List[str]:
+        new = [e for e in emails if e not in self._seen]
+        self._seen.update(new)
+        self.found.extend(new)
+        return new
+
+    def feed(self, data: bytes, encoding: str = "") -> List[str]:
+        """Scan the next chunk of the body; returns the emails it completed."""
+        if self._decoder is None:
+            try:
+                self._decoder = codecs.getincrementaldecoder(encoding or self.encoding or "utf-8")(errors="replace")
+            except LookupError:
+                self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        buf = self._carry + self._decoder.decode(data)
+        cut = max(buf.rfind(c) for c in _SEPARATORS) + 1
+        if cut == 0 and len(buf) > self.max_carry:
+            # no separator for a long stretch: scan it all, carry on from a word boundary
+            keep = len(buf) - self.overlap
+            ws = buf.rfind(" ", 0, keep)
+            self._carry = buf[ws if ws > 0 else keep:]
+            return self._add(extract_emails(buf))
+        self._carry = buf[cut:]
+        return self._add(extract_emails(buf[:cut])) if cut else []
+
+    def close(self) -> List[str]:
+        """End of the body (or of what was read of it): scan the carry."""
+        tail = self._decoder.decode(b"", final=True) if self._decoder else ""
+        buf, self._carry = self._carry + tail, ""
+        return self._add(extract_emails(buf))
+
+__all__ = ["EmailStreamScanner", "deobfuscate", "extract_emails"]
@@ -0,0 +1,85 @@
+import json, sqlite3, threading, time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from app.config import GITHUB_MEMO_PATH, GITHUB_MEMO_TTL, GITHUB_MEMO_NEGATIVE_TTL
+from app.metrics import GITHUB_MEMO
+
+class GithubMemo:
+    """
+    GitHub login -> harvested emails. Kept in memory for the process and in
+    SQLite across runs; entries expire after `ttl` (`negative_ttl` when
+    nothing was found). Concurrent lookups of the same login share one fetch.
+    """
+    def __init__(self, path: str, ttl: int, negative_ttl: int):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._lock = threading.Lock()
+        self._mem: Dict[str, Tuple[float, List[str]]] = {}
+        self._inflight: Dict[str, threading.Event] = {}
+        self._db = None
+        if path:
+            self._db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS github_emails ("
+                " login TEXT PRIMARY KEY, emails TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._db.commit()
+
+    def _lookup(self, login: str) -> Optional[List[str]]:
+        now = time.time()
+        hit = self._mem.get(login)
+        if hit is None and self._db is not None:
+            row = self._db.execute(
+                "SELECT emails, expires_at FROM github_emails WHERE login = ?", (login,)
+            ).fetchone()
+            if row:
+                hit = self._mem[login] = (row[1], json.loads(row[0]))
+        if hit and hit[0] > now:
+            return hit[1]
+        return None
+
+    def _store(self, login: str, emails: List[str]) -> None:
+        expires = time.time() + (self.ttl if emails else self.negative_ttl)
+        self._mem[login] = (expires, emails)
+        if self._db is not None:
+            self._db.execute("INSERT OR REPLACE INTO github_emails VALUES (?, ?, ?)",
+                             (login, json.dumps(emails), expires))
+            self._db.commit()
+
+    def get(self, login: str, fetch: Callable[[str], Optional[List[str]]]) -> List[str]:
+        """Memoized fetch(login); a None result (request failed) is not cached."""
+        key = login.lower()
+        while True:
+            with self._lock:
+                found = self._lookup(key)
+                if found is not None:
+                    GITHUB_MEMO.labels("hit").inc()
+                    return list(found)
+                waiting = self._inflight.get(key)
+                if waiting is None:
+                    done = self._inflight[key] = threading.Event()
+                    break
+            waiting.wait()  # another thread is fetching this login; then re-check
+
+        GITHUB_MEMO.labels("miss").inc()
+        try:
+            emails = fetch(login)
+            if emails is not None:
+                with self._lock:
+                    self._store(key, emails)
+            return list(emails or [])
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            done.set()
+
+_memo: Optional[GithubMemo] = None
+_memo_lock = threading.Lock()
+
+def get_memo() -> GithubMemo:
+    global _memo
+    with _memo_lock:
+        if _memo is None:
+            _memo = GithubMemo(GITHUB_MEMO_PATH, GITHUB_MEMO_TTL, GITHUB_MEMO_NEGATIVE_TTL)
+        return _memo
@@ -0,0 +1,128 @@
+from html.parser import HTMLParser
+from typing import Callable, Dict, List, Tuple
+
+from app.config import HTML_BACKEND
+
+try:
+    from selectolax.lexbor import LexborHTMLParser as _LexborParser  # pip install selectolax
+    _SELECTOLAX = True
+except Exception:
+    _LexborParser = None
+    _SELECTOLAX = False
+
+_SKIP_TEXT = {"script", "style", "noscript", "template"}
+
+class PageLinks:
+    """
+    Links and visible text of one HTML page, collected in a single pass.
+      github   - hrefs pointing at github.com (cleaned, deduped)
+      external - absolute http(s) hrefs off huggingface.co (cleaned, deduped)
+      internal - site-relative hrefs ("/user/repo"), raw, in document order
+      relative - document-relative hrefs ("contact.html", "../team"), raw
+    """
+    __slots__ = ("github", "external", "internal", "relative", "text")
+
+    def __init__(self, hrefs: List[str], text: str):
+        github: List[str] = []
+        external: List[str] = []
+        internal: List[str] = []
+        relative: List[str] = []
+        for raw in hrefs:
+            href = raw.strip()
+            if not href:
+                continue
+            if raw.startswith("/"):
+                internal.append(raw)
+            elif href[0] not in "#?" and ":" not in href.split("/")[0]:
+                relative.append(href)
+            if "github.com" in href.lower():
+                github.append(clean_link(href))
+            if href.startswith("http") and "huggingface.co" not in href:
+                external.append(clean_link(href))
+        self.github = list(dict.fromkeys(github))
+        self.external = list(dict.fromkeys(external))
+        self.internal = internal
+        self.relative = relative
+        self.text = text
+
+    def user_slugs(self, user: str) -> List[str]:
+        # "/{user}/{repo}" links, e.g. the models tab of a profile
+        slugs: List[str] = []
+        prefix = f"/{user}/"
+        for href in self.internal:
+            if not href.startswith(prefix):
+                continue
+            href = clean_link(href)
+            if len(href.strip("/").split("/")) == 2:
+                slugs.append(href)
+        return list(dict.fromkeys(slugs))
+
+def clean_link(href: str) -> str:
+    return href.split("?")[0].split("#")[0].rstrip("/")
+
+# ---- backends: (html, text) -> (hrefs, visible text); text=False skips the text ("") ----
+
+class _LinkTextParser(HTMLParser):
+    def __init__(self, text: bool = True):
+        super().__init__(convert_charrefs=True)
+        self.hrefs: List[str] = []
+        self.chunks: List[str] = []
+        self._skip = 0
+        if not text:
+            self.handle_data = lambda data: None
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "a":
+            for k, v in attrs:
+                if k == "href" and v is not None:
+                    self.hrefs.append(v)
+                    break
+        elif tag in _SKIP_TEXT:
+            self._skip += 1
+
+    def handle_endtag(self, tag):
+        if tag in _SKIP_TEXT and self._skip:
+            self._skip -= 1
+
+    def handle_data(self, data):
+        if not self._skip:
+            self.chunks.append(data)
+
+def _stdlib(html: str, text: bool = True) -> Tuple[List[str], str]:
+    p = _LinkTextParser(text)
+    p.feed(html)
+    p.close()
+    return p.hrefs, " ".join(p.chunks)
+
+def _selectolax(html: str, text: bool = True) -> Tuple[List[str], str]:
+    tree = _LexborParser(html)
+    hrefs = [a.attributes.get("href") or "" for a in tree.css("a[href]")]
+    if not text:
+        return hrefs, ""
+    tree.strip_tags(list(_SKIP_TEXT))
+    root = tree.body or tree.root
+    return hrefs, root.text(separator=" ") if root else ""
+
+def _bs4(html: str, text: bool = True) -> Tuple[List[str], str]:
+    # reference path (what the scraper did before); slowest
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(html, "html.parser")
+    hrefs = [a["href"] for a in soup.find_all("a", href=True)]
+    if not text:
+        return hrefs, ""
+    for t in soup(list(_SKIP_TEXT)):
+        t.decompose()
+    return hrefs, soup.get_text(" ")
+
+BACKENDS: Dict[str, Callable[..., Tuple[List[str], str]]] = {"stdlib": _stdlib, "bs4": _bs4}
+if _SELECTOLAX:
+    BACKENDS["selectolax"] = _selectolax
+
+_backend = HTML_BACKEND if HTML_BACKEND in BACKENDS else ("selectolax" if _SELECTOLAX else "stdlib")
+
+def extract_links(html: str, backend: str = "", text: bool = True) -> PageLinks:
+    """Links of `html`, plus its visible text unless text=False (then page.text is "")."""
+    hrefs, body = BACKENDS[backend or _backend](html or "", text)
+    return PageLinks(hrefs, body)
+
+__all__ = ["PageLinks", "BACKENDS", "clean_link", "extract_links"]
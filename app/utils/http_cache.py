@@ -0,0 +1,144 @@
+import json, sqlite3, threading, time
+from typing import Dict, Optional
+
+import requests
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+from app.config import HTTP_CACHE_PATH, HTTP_CACHE_TTL, HTTP_CACHE_MAX_MB
+from app.metrics import HTTP_CACHE_BYTES
+
+# only what readers of a cached response need; bodies are stored decoded
+_KEEP_HEADERS = ("Content-Type", "ETag", "Last-Modified", "Link")
+
+class CachedEntry:
+    __slots__ = ("url", "headers", "body", "stored_at")
+
+    def __init__(self, url: str, headers: Dict[str, str], body: bytes, stored_at: float):
+        self.url = url
+        self.headers = headers
+        self.body = body
+        self.stored_at = stored_at
+
+    def validators(self) -> Dict[str, str]:
+        h: Dict[str, str] = {}
+        if self.headers.get("ETag"):
+            h["If-None-Match"] = self.headers["ETag"]
+        if self.headers.get("Last-Modified"):
+            h["If-Modified-Since"] = self.headers["Last-Modified"]
+        return h
+
+    def to_response(self) -> requests.Response:
+        r = requests.Response()
+        r.status_code = 200
+        r.url = self.url
+        r.headers = CaseInsensitiveDict(self.headers)
+        r.encoding = get_encoding_from_headers(r.headers)
+        r._content = self.body
+        return r
+
+class HttpCache:
+    """
+    SQLite-backed response cache keyed by URL. Entries younger than `ttl` are
+    served without touching the network; older ones are revalidated with
+    If-None-Match / If-Modified-Since. Least recently used bodies are evicted
+    once the total exceeds `max_bytes`. Hits only note their access time in
+    memory; the notes are written with the next put / refresh, or once
+    `touch_batch` have piled up.
+    """
+    touch_batch = 256
+
+    def __init__(self, path: str, ttl: int, max_bytes: int):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._touched: Dict[str, float] = {}  # url -> accessed_at not yet written
+        self._db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " url TEXT PRIMARY KEY, headers TEXT NOT NULL, body BLOB NOT NULL,"
+            " size INTEGER NOT NULL, stored_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS responses_lru ON responses(accessed_at)")
+        self._db.commit()
+        self._bytes = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        HTTP_CACHE_BYTES.set(self._bytes)
+
+    def get(self, url: str) -> Optional[CachedEntry]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT headers, body, stored_at FROM responses WHERE url = ?", (url,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._touched[url] = time.time()
+            if len(self._touched) >= self.touch_batch:
+                self._write_touched()
+                self._db.commit()
+        return CachedEntry(url, json.loads(row[0]), row[1], row[2])
+
+    def is_fresh(self, entry: CachedEntry) -> bool:
+        return time.time() - entry.stored_at < self.ttl
+
+    def put(self, url: str, resp: requests.Response) -> None:
+        cc = resp.headers.get("Cache-Control", "").lower()
+        if "no-store" in cc:
+            return
+        headers = {k: resp.headers[k] for k in _KEEP_HEADERS if k in resp.headers}
+        body = resp.content
+        now = time.time()
+        with self._lock:
+            self._write_touched()
+            old = self._db.execute("SELECT size FROM responses WHERE url = ?", (url,)).fetchone()
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)",
+                (url, json.dumps(headers), body, len(body), now, now),
+            )
+            self._touched.pop(url, None)
+            self._bytes += len(body) - (old[0] if old else 0)
+            if self._bytes > self.max_bytes:
+                self._evict()
+            self._db.commit()
+            HTTP_CACHE_BYTES.set(self._bytes)
+
+    def refresh(self, entry: CachedEntry, resp: requests.Response) -> None:
+        # 304: body still valid; take any updated validators and restart the TTL
+        for k in ("ETag", "Last-Modified"):
+            if k in resp.headers:
+                entry.headers[k] = resp.headers[k]
+        entry.stored_at = time.time()
+        with self._lock:
+            self._write_touched()
+            self._db.execute(
+                "UPDATE responses SET headers = ?, stored_at = ? WHERE url = ?",
+                (json.dumps(entry.headers), entry.stored_at, entry.url),
+            )
+            self._db.commit()
+
+    def _write_touched(self) -> None:
+        if self._touched:
+            self._db.executemany("UPDATE responses SET accessed_at = ? WHERE url = ?",
+                                 [(t, url) for url, t in self._touched.items()])
+            self._touched.clear()
+
+    def _evict(self) -> None:
+        target = int(self.max_bytes * 0.9)
+        rows = self._db.execute("SELECT url, size FROM responses ORDER BY accessed_at").fetchall()
+        for url, size in rows:
+            if self._bytes <= target:
+                break
+            self._db.execute("DELETE FROM responses WHERE url = ?", (url,))
+            self._bytes -= size
+
+_cache: Optional[HttpCache] = None
+_cache_lock = threading.Lock()
+
+def get_cache() -> Optional[HttpCache]:
+    global _cache
+    if not HTTP_CACHE_PATH:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = HttpCache(HTTP_CACHE_PATH, HTTP_CACHE_TTL, HTTP_CACHE_MAX_MB * 1024 * 1024)
+        return _cache
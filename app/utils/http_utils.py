@@ -1,16 +1,241 @@
-import time, requests
-from typing import Optional, Dict
-from app.metrics import REQ_LATENCY, REQUESTS_TOTAL, REQUEST_ERRORS
-from app.config import REQUEST_TIMEOUT
-
-def timed_get(url: str, target: str, headers: Optional[Dict[str, str]] = None):
-    t0 = time.perf_counter()
-    try:
-        resp = requests.get(url, headers=headers, timeout=REQUEST_TIMEOUT)
-        REQ_LATENCY.labels(target).observe(time.perf_counter() - t0)
-        REQUESTS_TOTAL.labels(target, str(resp.status_code)).inc()
+import time, threading, requests
+from typing import Callable, Dict, Iterable, List, Optional
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.util.retry import Retry
+from app.metrics import (
+    REQ_LATENCY, REQUESTS_TOTAL, REQUEST_ERRORS, CONN_OPENED, CONN_REUSE, HTTP_CACHE,
+    STREAM_BYTES_READ, STREAM_BYTES_SAVED, STREAM_ABORTS,
+)
+from app.config import (
+    REQUEST_TIMEOUT, PER_TARGET_CONCURRENCY, TARGET_CONCURRENCY, UA,
+    HTTP_POOL_CONNECTIONS, HTTP_POOL_MAXSIZE, HTTP_RETRIES, HTTP_BACKOFF,
+    RATE_LIMIT_MAX_RETRIES, STREAM_MAX_BYTES, STREAM_CHUNK_BYTES, STREAM_CONTENT_TYPES,
+)
+from app.utils.rate_limit import scheduler, host_of
+from app.utils.http_cache import get_cache
+from app.utils.spans import span
+
+def _parse_target_limits(spec: str) -> Dict[str, int]:
+    limits: Dict[str, int] = {}
+    for item in spec.split(","):
+        name, _, n = item.partition("=")
+        if name.strip() and n.strip().isdigit():
+            limits[name.strip()] = int(n)
+    return limits
+
+_TARGET_LIMITS = _parse_target_limits(TARGET_CONCURRENCY)
+_slots: Dict[str, Optional[threading.BoundedSemaphore]] = {}
+_slots_lock = threading.Lock()
+
+def _target_slot(target: str) -> Optional[threading.BoundedSemaphore]:
+    # per-target cap on in-flight requests; None = unlimited
+    with _slots_lock:
+        if target not in _slots:
+            n = _TARGET_LIMITS.get(target, PER_TARGET_CONCURRENCY)
+            _slots[target] = threading.BoundedSemaphore(n) if n > 0 else None
+        return _slots[target]
+
+# ---- pooled sessions, one per target label ----
+_tls = threading.local()  # set when urllib3 opens a connection on this thread
+
+def _counting_pool(base, target: str):
+    class _Pool(base):
+        def _new_conn(self):
+            CONN_OPENED.labels(target).inc()
+            _tls.opened = True
+            return super()._new_conn()
+    return _Pool
+
+class _TargetAdapter(HTTPAdapter):
+    def __init__(self, target: str, **kw):
+        self.target = target
+        super().__init__(**kw)
+
+    def init_poolmanager(self, *args, **kw):
+        super().init_poolmanager(*args, **kw)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _counting_pool(HTTPConnectionPool, self.target),
+            "https": _counting_pool(HTTPSConnectionPool, self.target),
+        }
+
+_sessions: Dict[str, requests.Session] = {}
+_sessions_lock = threading.Lock()
+
+def get_session(target: str) -> requests.Session:
+    with _sessions_lock:
+        s = _sessions.get(target)
+        if s is None:
+            n = _TARGET_LIMITS.get(target, PER_TARGET_CONCURRENCY)
+            # only failed connects are retried here (nothing reached the host); 5xx
+            # and 429 retries run in _fetch, through the scheduler and the counts
+            retry = Retry(
+                total=HTTP_RETRIES, connect=HTTP_RETRIES, read=0, status=0, other=0,
+                backoff_factor=HTTP_BACKOFF, allowed_methods=frozenset({"GET"}), raise_on_status=False,
+            )
+            adapter = _TargetAdapter(
+                target, pool_connections=HTTP_POOL_CONNECTIONS,
+                pool_maxsize=max(HTTP_POOL_MAXSIZE, n), max_retries=retry,
+            )
+            s = requests.Session()
+            s.headers.update({"User-Agent": UA})
+            s.mount("http://", adapter)
+            s.mount("https://", adapter)
+            _sessions[target] = s
+        return s
+
+def close_sessions() -> None:
+    with _sessions_lock:
+        for s in _sessions.values():
+            s.close()
+        _sessions.clear()
+
+# ---- request counts (network requests, 5xx / 429 retries included; cache hits are not
+# requests; redirects followed by requests.Session are counted as one) ----
+_count_lock = threading.Lock()
+_requests_made = 0
+_tls_count = threading.local()
+
+def requests_made() -> int:
+    """Requests sent by this process so far."""
+    return _requests_made
+
+def thread_requests() -> int:
+    """Requests sent by the calling thread so far (for per-stage attribution)."""
+    return getattr(_tls_count, "n", 0)
+
+def _count_request() -> None:
+    global _requests_made
+    with _count_lock:
+        _requests_made += 1
+    _tls_count.n = getattr(_tls_count, "n", 0) + 1
+
+# ---- streaming mode ----
+class StreamLimits:
+    """
+    Streaming mode of timed_get: the body is only read for `content_types`
+    (no Content-Type header counts as allowed), at most `max_bytes` of it, in
+    chunks passed to on_chunk(chunk, encoding), which ends the read early by
+    returning True. The response's `truncated` is then the reason the body
+    was cut short (content_type / max_bytes / enough) or None.
+    """
+    __slots__ = ("max_bytes", "content_types", "on_chunk")
+
+    def __init__(self, max_bytes: int = STREAM_MAX_BYTES, content_types: List[str] = STREAM_CONTENT_TYPES,
+                 on_chunk: Optional[Callable[[bytes, Optional[str]], bool]] = None):
+        self.max_bytes = max_bytes
+        self.content_types = content_types
+        self.on_chunk = on_chunk
+
+def _chunks(body: bytes) -> Iterable[bytes]:
+    for i in range(0, len(body), STREAM_CHUNK_BYTES):
+        yield body[i:i + STREAM_CHUNK_BYTES]
+
+def _stream_body(resp, target: str, limits: StreamLimits, chunks: Iterable[bytes]) -> None:
+    """Set resp's content from `chunks`, within `limits`."""
+    ctype = resp.headers.get("Content-Type", "").split(";")[0].strip().lower()
+    length = resp.headers.get("Content-Length", "")
+    length = int(length) if length.isdigit() else 0
+    body = bytearray()
+    reason = None
+    if ctype and limits.content_types and ctype not in limits.content_types:
+        reason = "content_type"
+    else:
+        for chunk in chunks:
+            if limits.max_bytes:
+                chunk = chunk[:limits.max_bytes - len(body)]
+            body += chunk
+            if limits.on_chunk is not None and limits.on_chunk(chunk, resp.encoding):
+                reason = "enough"
+                break
+            if limits.max_bytes and len(body) >= limits.max_bytes:
+                reason = "max_bytes"
+                break
+        if reason and length and len(body) >= length:
+            reason = None  # stopped on the body's last byte: nothing was cut
+    STREAM_BYTES_READ.labels(target).inc(len(body))
+    if reason:
+        STREAM_ABORTS.labels(target, reason).inc()
+        if length > len(body):
+            STREAM_BYTES_SAVED.labels(target).inc(length - len(body))
+    resp._content = bytes(body)
+    resp.truncated = reason
+
+def timed_get(url: str, target: str, headers: Optional[Dict[str, str]] = None, cache: bool = True,
+              stream: Optional[StreamLimits] = None):
+    with span("http"):
+        return _cached_get(url, target, headers, cache, stream)
+
+def _cached_get(url: str, target: str, headers: Optional[Dict[str, str]], cache: bool,
+                stream: Optional[StreamLimits] = None):
+    store = get_cache() if cache else None
+    entry = store.get(url) if store else None
+    if entry is not None:
+        if store.is_fresh(entry):
+            HTTP_CACHE.labels(target, "hit").inc()
+            return _cached_response(entry, target, stream)
+        headers = {**(headers or {}), **entry.validators()}
+
+    resp = _fetch(url, target, headers, stream)
+    if store is None or resp is None:
         return resp
-    except requests.RequestException:
-        REQ_LATENCY.labels(target).observe(time.perf_counter() - t0)
-        REQUEST_ERRORS.labels(target).inc()
-        return None
+    if resp.status_code == 304 and entry is not None:
+        HTTP_CACHE.labels(target, "revalidated").inc()
+        store.refresh(entry, resp)
+        return _cached_response(entry, target, stream)
+    HTTP_CACHE.labels(target, "miss").inc()
+    if resp.status_code == 200 and not getattr(resp, "truncated", None):
+        store.put(url, resp)
+    return resp
+
+def _cached_response(entry, target: str, stream: Optional[StreamLimits]):
+    resp = entry.to_response()
+    if stream is not None:
+        _stream_body(resp, target, stream, _chunks(resp.content))
+    return resp
+
+_RETRY_STATUS = (500, 502, 503, 504)
+
+def _fetch(url: str, target: str, headers: Optional[Dict[str, str]], stream: Optional[StreamLimits] = None):
+    host = host_of(url)
+    slot = _target_slot(target)
+    session = get_session(target)
+    rate_retries = status_retries = 0
+    while True:
+        scheduler.acquire(host)
+        if slot:
+            slot.acquire()
+        _tls.opened = False
+        _count_request()
+        t0 = time.perf_counter()
+        try:
+            resp = session.get(url, headers=headers, timeout=REQUEST_TIMEOUT, stream=stream is not None)
+            REQ_LATENCY.labels(target).observe(time.perf_counter() - t0)
+            REQUESTS_TOTAL.labels(target, str(resp.status_code)).inc()
+            CONN_REUSE.labels(target, "false" if _tls.opened else "true").inc()
+        except requests.RequestException:
+            REQ_LATENCY.labels(target).observe(time.perf_counter() - t0)
+            REQUEST_ERRORS.labels(target).inc()
+            return None
+        finally:
+            if slot:
+                slot.release()
+        backoff = scheduler.observe(host, resp.status_code, resp.headers)
+        if backoff is not None and resp.status_code in (403, 429) and rate_retries < RATE_LIMIT_MAX_RETRIES:
+            rate_retries += 1  # told to wait: the scheduler holds the host until then, so just retry
+        elif resp.status_code in _RETRY_STATUS and status_retries < HTTP_RETRIES:
+            time.sleep(HTTP_BACKOFF * 2 ** status_retries)
+            status_retries += 1
+        else:
+            break
+        if stream is not None:
+            resp.close()
+    if stream is not None:
+        try:
+            _stream_body(resp, target, stream, resp.iter_content(STREAM_CHUNK_BYTES))
+        except requests.RequestException:
+            REQUEST_ERRORS.labels(target).inc()
+            return None
+        finally:
+            resp.close()  # drops the connection if the body was not read to the end
+    return resp
@@ -1,8 +1,105 @@
-import os, json
+import os, json, hashlib
+from contextlib import contextmanager
+from typing import IO, Iterator, List, Optional, Tuple
 
-def append_jsonl(path: str, record: dict) -> None:
+try:
+    import fcntl
+except ImportError:  # not POSIX: no advisory locks
+    fcntl = None
+
+def lock(f: IO) -> None:
+    """Take an exclusive advisory lock (flock) on open file `f`; a no-op where flock is missing."""
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+
+def unlock(f: IO) -> None:
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+@contextmanager
+def locked(f: IO) -> Iterator[None]:
+    lock(f)
+    try:
+        yield
+    finally:
+        unlock(f)
+
+def lock_current(f: IO, path: str) -> IO:
+    """
+    Lock `f`, opened for append on `path`. If `path` was replaced meanwhile
+    (compaction swaps it in with os.replace), `f` is closed and the file now
+    at `path` is opened and locked instead; returns the locked file.
+    """
+    while True:
+        lock(f)
+        try:
+            same = os.stat(path).st_ino == os.fstat(f.fileno()).st_ino
+        except FileNotFoundError:
+            same = False
+        if same:
+            return f
+        unlock(f)
+        f.close()
+        f = open(path, "ab")
+
+@contextmanager
+def append_locked(path: str) -> Iterator[IO]:
+    """The file at `path`, open for binary append under an exclusive lock."""
+    f = lock_current(open(path, "ab"), path)
+    try:
+        yield f
+    finally:
+        unlock(f)
+        f.close()
+
+def append_jsonl(path: str, record: dict) -> int:
+    """Append one row; returns the file size (byte offset) after the write."""
     with open(path, "a", encoding="utf-8") as f:
         f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        return f.tell()
+
+def iter_jsonl_from(path: str, offset: int = 0) -> Iterator[Tuple[dict, int, int]]:
+    """
+    Yield (row, start, end) byte offsets for each complete line from `offset`.
+    A last line without its newline counts only if it parses; otherwise it is
+    a write in progress and is left for the next read.
+    """
+    with open(path, "rb") as f:
+        f.seek(offset)
+        pos = offset
+        for raw in f:
+            line = raw.strip()
+            try:
+                row = json.loads(line) if line else None
+            except ValueError:
+                row = None
+                if not raw.endswith(b"\n"):
+                    break
+            start, pos = pos, pos + len(raw)
+            if isinstance(row, dict):
+                yield row, start, pos
+
+def file_marker(path: str, offset: int, width: int = 64) -> str:
+    """Hash of the `width` bytes before `offset`: tells an append from a rewrite."""
+    with open(path, "rb") as f:
+        f.seek(max(0, offset - width))
+        return hashlib.sha1(f.read(min(offset, width))).hexdigest()
+
+def resume_offset(path: str, offset: int, inode: int, marker: str) -> int:
+    """
+    Where to resume reading `path` after having processed it up to `offset`:
+    `offset` if it is still the same file (same inode, not truncated, same
+    bytes before the offset), otherwise 0 so the caller rebuilds.
+    """
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return 0
+    if st.st_ino != inode or st.st_size < offset:
+        return 0
+    if offset and file_marker(path, offset) != marker:
+        return 0
+    return offset
 
 def load_existing_emails(path: str) -> set[str]:
     s: set[str] = set()
@@ -22,15 +119,89 @@ def load_existing_emails(path: str) -> set[str]:
                 pass
     return s
 
-def tail_jsonl(path: str, limit: int) -> list[dict]:
+_BLOCK = 64 * 1024
+
+def _lines_backwards(f, end: int) -> Iterator[Tuple[int, bytes]]:
+    """(start_offset, line) pairs ending at or before `end`, newest first."""
+    pos, head = end, b""
+    while pos > 0:
+        step = min(_BLOCK, pos)
+        pos -= step
+        f.seek(pos)
+        parts = (f.read(step) + head).split(b"\n")
+        head = parts[0]                      # may continue before `pos`
+        start = pos + len(head) + 1
+        found = []
+        for ln in parts[1:]:
+            found.append((start, ln))
+            start += len(ln) + 1
+        yield from reversed(found)
+    if head:
+        yield 0, head
+
+def _parse_line(line: bytes):
+    line = line.strip()
+    if not line:
+        return None
+    try:
+        row = json.loads(line)
+    except ValueError:
+        return None
+    return row if isinstance(row, dict) else None
+
+def page_jsonl(path: str, limit: int, after: Optional[int] = None,
+               before: Optional[int] = None) -> Tuple[List[dict], int, int]:
+    """
+    Page through a JSONL file by byte offset without loading it.
+      after=N  -> the first `limit` rows starting at offset N (oldest first)
+      before=N -> the last `limit` rows ending before offset N
+      neither  -> the last `limit` rows of the file
+    Returns (rows, start, end): `start` is the offset of the first row returned
+    (pass as before= for older rows), `end` the offset just past the last one
+    (pass as after= for newer rows).
+    """
     if not os.path.exists(path):
-        return []
-    with open(path, "r", encoding="utf-8") as f:
-        lines = f.readlines()[-limit:]
-    rows: list[dict] = []
-    for ln in lines:
-        try:
-            rows.append(json.loads(ln))
-        except json.JSONDecodeError:
-            continue
-    return rows
+        return [], 0, 0
+    size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        if after is not None:
+            pos = min(max(0, after), size)
+            f.seek(pos)
+            if pos > 0:
+                f.seek(pos - 1)
+                if f.read(1) != b"\n":          # not a line boundary: skip to the next one
+                    pos += len(f.readline())
+            rows: List[dict] = []
+            start = end = pos
+            for raw in f:
+                row = _parse_line(raw)
+                if row is None and not raw.endswith(b"\n"):
+                    break                        # write in progress
+                if row is not None:
+                    if not rows:
+                        start = pos
+                    rows.append(row)
+                pos += len(raw)
+                end = pos
+                if len(rows) >= limit:
+                    break
+            return rows, start, end
+
+        end_at = size if before is None else min(max(0, before), size)
+        newest_first: List[dict] = []
+        start = end = end_at
+        for off, line in _lines_backwards(f, end_at):
+            row = _parse_line(line)
+            if row is None:
+                continue
+            if not newest_first:
+                end = min(off + len(line) + 1, size)
+            newest_first.append(row)
+            start = off
+            if len(newest_first) >= limit:
+                break
+        newest_first.reverse()
+        return newest_first, start, end
+
+def tail_jsonl(path: str, limit: int) -> list[dict]:
+    return page_jsonl(path, limit)[0]
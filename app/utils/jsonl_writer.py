@@ -0,0 +1,187 @@
+import atexit, json, os, queue, threading, time
+from typing import Callable, List, Optional
+
+from app.config import WRITER_QUEUE_SIZE, WRITER_BATCH_SIZE, WRITER_FLUSH_INTERVAL, WRITER_FSYNC
+from app.metrics import WRITER_QUEUE_DEPTH, WRITER_FLUSH_LATENCY, WRITER_BATCH_ROWS
+from app.utils.io_utils import lock_current, unlock
+
+_STOP = object()
+
+class _Callback:
+    __slots__ = ("fn",)
+
+    def __init__(self, fn: Callable[[], None]):
+        self.fn = fn
+
+class JsonlWriter:
+    """
+    Append-only JSONL writer with a bounded queue and one background thread.
+    Rows are written in batches (up to `batch_size`, or whatever arrived within
+    `flush_interval`), one write() + flush per batch. `fsync` is "none",
+    "batch" (after every batch) or "close". `on_flush(rows, end_offset)` runs
+    on the writer thread once a batch is on disk. Each batch is appended under
+    the file's flock, to the file currently at `path` (reopened if compaction
+    replaced it), so no batch lands in a file that was swapped out.
+    `on_error(rows)` runs there
+    for rows that were not written because a write failed (that batch and
+    every later one). write() is safe from any thread and blocks when the
+    queue is full; close() drains everything.
+    """
+    def __init__(self, path: str, on_flush: Optional[Callable[[List[dict], int], None]] = None,
+                 on_error: Optional[Callable[[List[dict]], None]] = None, max_queue: int = WRITER_QUEUE_SIZE, batch_size: int = WRITER_BATCH_SIZE,
+                 flush_interval: float = WRITER_FLUSH_INTERVAL, fsync: str = WRITER_FSYNC):
+        self.path = path
+        self.on_flush = on_flush
+        self.on_error = on_error
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+        self._q: "queue.Queue[object]" = queue.Queue(maxsize=max_queue)
+        self._error: Optional[BaseException] = None
+        self._closed = False
+        self._f = open(path, "ab")
+        self._thread = threading.Thread(target=self._run, name="jsonl-writer", daemon=True)
+        self._thread.start()
+        _open_writers.add(self)
+
+    def write(self, record: dict) -> None:
+        if self._error:
+            raise self._error
+        if self._closed:
+            raise ValueError("write to closed JsonlWriter")
+        self._q.put(record)
+        WRITER_QUEUE_DEPTH.set(self._q.qsize())
+
+    def after_flush(self, fn: Callable[[], None]) -> None:
+        """Run `fn()` on the writer thread once every row written before this call
+        is on disk (and through on_flush); never, if a write failed."""
+        if self._error:
+            raise self._error
+        self._q.put(_Callback(fn))
+
+    def flush(self) -> None:
+        """Block until every row queued so far is written."""
+        done = threading.Event()
+        self._q.put(done)
+        done.wait()
+        if self._error:
+            raise self._error
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        self._q.put(_STOP)
+        self._thread.join()
+        if self.fsync in ("batch", "close"):
+            os.fsync(self._f.fileno())
+        self._f.close()
+        _open_writers.discard(self)
+        WRITER_QUEUE_DEPTH.set(0)
+        if self._error:
+            raise self._error
+
+    def __enter__(self) -> "JsonlWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    # ---- writer thread ----
+    def _run(self) -> None:
+        stop = False
+        while not stop:
+            batch: List[dict] = []
+            waiters: List[threading.Event] = []
+            callbacks: List[_Callback] = []
+            item = self._q.get()
+            deadline = time.monotonic() + self.flush_interval
+            while True:
+                if item is _STOP:
+                    stop = True
+                elif isinstance(item, threading.Event):
+                    waiters.append(item)
+                elif isinstance(item, _Callback):
+                    callbacks.append(item)
+                else:
+                    batch.append(item)
+                if stop or waiters or len(batch) >= self.batch_size:
+                    break
+                timeout = deadline - time.monotonic()
+                try:
+                    item = self._q.get(timeout=timeout) if timeout > 0 else self._q.get_nowait()
+                except queue.Empty:
+                    break
+            if batch:
+                self._write_batch(batch)
+            self._run_callbacks(callbacks)
+            WRITER_QUEUE_DEPTH.set(self._q.qsize())
+            for w in waiters:
+                w.set()
+        # anything queued behind the stop marker (writes racing close())
+        rest, callbacks = [], []
+        while not self._q.empty():
+            item = self._q.get_nowait()
+            if isinstance(item, threading.Event):
+                item.set()
+            elif isinstance(item, _Callback):
+                callbacks.append(item)
+            elif item is not _STOP:
+                rest.append(item)
+        if rest:
+            self._write_batch(rest)
+        self._run_callbacks(callbacks)
+
+    def _run_callbacks(self, callbacks: List["_Callback"]) -> None:
+        for cb in callbacks:
+            if self._error:
+                return
+            try:
+                cb.fn()
+            except BaseException as e:
+                self._error = e
+
+    def _write_batch(self, batch: List[dict]) -> None:
+        if self._error:
+            self._dropped(batch)
+            return
+        t0 = time.perf_counter()
+        try:
+            data = "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in batch).encode("utf-8")
+            self._f = lock_current(self._f, self.path)
+            try:
+                self._f.write(data)
+                self._f.flush()
+                if self.fsync == "batch":
+                    os.fsync(self._f.fileno())
+                end = self._f.tell()
+            finally:
+                unlock(self._f)
+        except BaseException as e:  # surface on the next write()/close()
+            self._error = e
+            self._dropped(batch)
+            return
+        WRITER_FLUSH_LATENCY.observe(time.perf_counter() - t0)
+        WRITER_BATCH_ROWS.observe(len(batch))
+        if self.on_flush:
+            try:
+                self.on_flush(batch, end)
+            except BaseException as e:
+                self._error = e
+
+    def _dropped(self, batch: List[dict]) -> None:
+        if self.on_error:
+            try:
+                self.on_error(batch)
+            except Exception:
+                pass
+
+_open_writers: "set[JsonlWriter]" = set()
+
+@atexit.register
+def _close_all() -> None:
+    for w in list(_open_writers):
+        try:
+            w.close()
+        except Exception:
+            pass
@@ -1,6 +1,8 @@
-import json, os, re, html
+import json, os, re, threading
 from collections import Counter, defaultdict
-from typing import Dict, Iterable, Tuple
+from typing import Dict, Iterable
+
+from app.utils.io_utils import iter_jsonl_from, file_marker, resume_offset
 
 # Minimal “is this a real email?” filter (tune as needed)
 _EMAIL_RE = re.compile(r'(?:[A-Z0-9._%+-]{1,64})@(?:[A-Z0-9-]{1,63}\.)+(?:[A-Z]{2,15})', re.I)
@@ -8,7 +10,8 @@ _BAD_SUFFIXES = ('.png', '.jpg', '.jpeg', '.gif', '.svg', '.webp', '.ico')
 _BAD_EXACT = {'name@example.com', 'user@domain.com', 'actions@github.com'}
 _BAD_TLDS = {'local', 'lan', 'internal'}
 
-def _valid(email: str) -> bool:
+def is_valid_email(email: str) -> bool:
+    """Plausible real address (no asset names, placeholders or local TLDs)."""
     e = email.strip().strip('<>,"\'')
     el = e.lower()
     if any(el.endswith(suf) for suf in _BAD_SUFFIXES):
@@ -35,44 +38,118 @@ def stream_jsonl(path: str) -> Iterable[Dict]:
             except Exception:
                 continue
 
-def kpi_from_emails_jsonl(path: str) -> Dict:
-    """
-    Build KPI purely from the contents of emails.jsonl.
-    No hard-coding. Updates whenever the file changes.
-    """
-    per_source = defaultdict(int)
-    per_user_hits = defaultdict(int)
-    domains = Counter()
+class _KpiState:
+    """Aggregates over emails.jsonl up to `offset`, persisted next to the file."""
+    def __init__(self):
+        self.offset = 0
+        self.inode = 0
+        self.marker = ""
+        self.written = 0
+        self.per_source: Dict[str, int] = defaultdict(int)
+        self.per_user_hits: Dict[str, int] = defaultdict(int)
+        self.domains: Counter = Counter()
 
-    written = 0
-    for row in stream_jsonl(path):
+    def fold(self, row: Dict) -> None:
         email = (row.get('email') or '').strip()
         source = row.get('source') or 'unknown'
         user   = row.get('username') or ''
         if not email:
-            continue
-        if not _valid(email):
-            continue
+            return
+        if not is_valid_email(email):
+            return
 
-        written += 1
-        per_source[source] += 1
+        self.written += 1
+        self.per_source[source] += 1
         if user:
-            per_user_hits[user] += 1
-        domains[_domain(email)] += 1
-
-    users_with_hits = sum(1 for _, c in per_user_hits.items() if c > 0)
-
-    # This endpoint can’t know users_discovered/run_seconds without the live run.
-    # Return 0 for those, and keep structure identical to your example.
-    out = {
-        "run_seconds": 0.0,
-        "users_discovered": 0,
-        "users_with_hits": users_with_hits,
-        "hit_rate_percent": 0.0,  # unknown without discovered count
-        "new_emails_written": written,
-        "emails_by_source": dict(sorted(per_source.items(), key=lambda kv: kv[0])),
-        "unique_domains": len(domains),
-        "top_domains": domains.most_common(20),
-        "out_path": os.path.abspath(path),
-    }
+            self.per_user_hits[user] += 1
+        self.domains[_domain(email)] += 1
+
+    def to_json(self) -> Dict:
+        return {
+            "version": _STATE_VERSION, "offset": self.offset, "inode": self.inode, "marker": self.marker,
+            "written": self.written, "per_source": self.per_source,
+            "per_user_hits": self.per_user_hits, "domains": self.domains,
+        }
+
+    @classmethod
+    def from_json(cls, d: Dict) -> "_KpiState":
+        st = cls()
+        if d.get("version") != _STATE_VERSION:
+            return st
+        st.offset, st.inode, st.marker = int(d["offset"]), int(d["inode"]), d["marker"]
+        st.written = int(d["written"])
+        st.per_source.update(d["per_source"])
+        st.per_user_hits.update(d["per_user_hits"])
+        st.domains.update(d["domains"])
+        return st
+
+_STATE_VERSION = 1
+_states: Dict[str, _KpiState] = {}
+_states_lock = threading.Lock()
+
+def _state_path(path: str) -> str:
+    return path + ".kpi.json"
+
+def _load_state(path: str) -> _KpiState:
+    st = _states.get(os.path.abspath(path))
+    if st is not None:
+        return st
+    try:
+        with open(_state_path(path), 'r', encoding='utf-8') as f:
+            return _KpiState.from_json(json.load(f))
+    except Exception:
+        return _KpiState()
+
+def _save_state(path: str, st: _KpiState) -> None:
+    tmp = _state_path(path) + ".tmp"
+    try:
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(st.to_json(), f, ensure_ascii=False)
+        os.replace(tmp, _state_path(path))
+    except OSError:
+        pass  # read-only dir: still correct, just not incremental across restarts
+
+def _refresh(path: str) -> _KpiState:
+    """Fold lines appended since the last call; rebuild if the file was truncated/rotated."""
+    st = _load_state(path)
+    if not os.path.exists(path):
+        return _KpiState()
+    start = resume_offset(path, st.offset, st.inode, st.marker)
+    if start != st.offset:
+        st = _KpiState()
+    end = start
+    for row, _, end in iter_jsonl_from(path, start):
+        st.fold(row)
+    if end != st.offset or not st.inode:
+        st.offset = end
+        st.inode = os.stat(path).st_ino
+        st.marker = file_marker(path, end)
+        _save_state(path, st)
+    _states[os.path.abspath(path)] = st
+    return st
+
+def kpi_from_emails_jsonl(path: str) -> Dict:
+    """
+    Build KPI purely from the contents of emails.jsonl.
+    No hard-coding. Updates whenever the file changes.
+    Aggregates are persisted in `<path>.kpi.json` with the byte offset they
+    cover, so each call only reads lines appended since the previous one.
+    """
+    with _states_lock:
+        st = _refresh(path)
+        users_with_hits = len(st.per_user_hits)  # every tracked user has >= 1 hit
+
+        # This endpoint can’t know users_discovered/run_seconds without the live run.
+        # Return 0 for those, and keep structure identical to your example.
+        out = {
+            "run_seconds": 0.0,
+            "users_discovered": 0,
+            "users_with_hits": users_with_hits,
+            "hit_rate_percent": 0.0,  # unknown without discovered count
+            "new_emails_written": st.written,
+            "emails_by_source": dict(sorted(st.per_source.items(), key=lambda kv: kv[0])),
+            "unique_domains": len(st.domains),
+            "top_domains": st.domains.most_common(20),
+            "out_path": os.path.abspath(path),
+        }
     return out
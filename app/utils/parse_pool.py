@@ -0,0 +1,86 @@
+import atexit, multiprocessing, threading, time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import List, Optional, Tuple
+
+from app.config import PARSE_WORKERS
+from app.metrics import PARSE_QUEUE_SECONDS, PARSE_SECONDS, PARSE_PAGES
+from app.utils.email_utils import extract_emails
+from app.utils.html_extract import PageLinks, extract_links
+from app.utils.spans import span
+
+Parsed = Tuple[List[str], Optional[PageLinks]]
+
+def _parse(body: bytes, encoding: str, emails: bool, links: bool) -> Parsed:
+    text = body.decode(encoding, errors="replace")
+    found = extract_emails(text) if emails else []
+    page = None
+    if links:
+        page = extract_links(text, text=False)  # callers only use the links
+    return found, page
+
+def _work(body: bytes, encoding: str, emails: bool, links: bool, submitted: float):
+    # runs in a pool process: report queue wait and parse time with the result
+    started = time.time()
+    found, page = _parse(body, encoding, emails, links)
+    return found, page, started - submitted, time.time() - started
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_size = 0
+_pool_lock = threading.Lock()
+
+def _get_pool(workers: int) -> ProcessPoolExecutor:
+    global _pool, _pool_size
+    with _pool_lock:
+        if _pool is None or _pool_size != workers:
+            if _pool is not None:
+                _pool.shutdown(wait=True)
+            # spawn: forking a process that runs crawler/writer threads is unsafe
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+            _pool_size = workers
+        return _pool
+
+def parse_page(body: bytes, encoding: Optional[str] = None, emails: bool = True,
+               links: bool = True, workers: int = PARSE_WORKERS) -> Parsed:
+    """
+    Emails and/or links of a fetched page. With workers > 0 the decode + parse
+    runs in a process pool (raw bytes in, emails + link lists out) so parsing
+    is not bound to one core by the GIL; workers == 0 parses inline.
+    """
+    encoding = encoding or "utf-8"
+    if workers <= 0:
+        t0 = time.perf_counter()
+        out = _parse(body, encoding, emails, links)
+        PARSE_SECONDS.labels("inline").observe(time.perf_counter() - t0)
+        PARSE_PAGES.labels("inline").inc()
+        return out
+    try:
+        found, page, waited, took = _get_pool(workers).submit(
+            _work, body, encoding, emails, links, time.time()
+        ).result()
+    except BrokenProcessPool:
+        _drop_pool()  # a worker died; recreate the pool on the next call
+        return parse_page(body, encoding, emails, links, workers=0)
+    PARSE_QUEUE_SECONDS.observe(max(0.0, waited))
+    PARSE_SECONDS.labels("pool").observe(took)
+    PARSE_PAGES.labels("pool").inc()
+    return found, page
+
+def parse_response(resp, emails: bool = True, links: bool = True) -> Parsed:
+    with span("parse"):
+        return parse_page(resp.content, resp.encoding, emails=emails, links=links)
+
+def _drop_pool() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False)
+            _pool = None
+
+@atexit.register
+def shutdown_pool() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=True)
+            _pool = None
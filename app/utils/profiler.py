@@ -0,0 +1,62 @@
+import os, sys, threading, time
+from collections import Counter
+from typing import Dict, Optional
+
+_lock = threading.Lock()  # one profile at a time
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}:{frame.f_lineno}"
+
+def _thread_names() -> Dict[int, str]:
+    return {t.ident: t.name for t in threading.enumerate() if t.ident is not None}
+
+def sample(seconds: float, interval: float = 0.01, top: int = 25, thread_prefix: Optional[str] = None) -> dict:
+    """
+    Sample every thread's stack (sys._current_frames) each `interval` for
+    `seconds`, from inside the running process. Returns the hottest frames by
+    self and total samples plus collapsed stacks ("a;b;c count" lines, as
+    flamegraph.pl / speedscope read them). Idle threads waiting on a lock or
+    socket show up too: a sample is wall-clock, not CPU.
+    `thread_prefix` keeps only threads whose name starts with it.
+    """
+    if not _lock.acquire(blocking=False):
+        raise RuntimeError("Profile already running")
+    try:
+        me = threading.get_ident()
+        stacks: Counter = Counter()
+        self_hits: Counter = Counter()
+        total_hits: Counter = Counter()
+        per_thread: Counter = Counter()
+        samples = 0
+        t_end = time.perf_counter() + seconds
+        while time.perf_counter() < t_end:
+            names = _thread_names()
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                name = names.get(ident, str(ident))
+                if thread_prefix and not name.startswith(thread_prefix):
+                    continue
+                labels = []
+                while frame is not None:
+                    labels.append(_frame_label(frame))
+                    frame = frame.f_back
+                labels.reverse()
+                stacks[(name,) + tuple(labels)] += 1
+                self_hits[labels[-1]] += 1
+                total_hits.update(set(labels))
+                per_thread[name] += 1
+            samples += 1
+            time.sleep(interval)
+        return {
+            "seconds": seconds,
+            "interval": interval,
+            "samples": samples,
+            "threads": dict(per_thread.most_common()),
+            "top_self": [{"frame": f, "samples": n} for f, n in self_hits.most_common(top)],
+            "top_total": [{"frame": f, "samples": n} for f, n in total_hits.most_common(top)],
+            "collapsed": "\n".join(f"{';'.join(k)} {n}" for k, n in stacks.most_common()),
+        }
+    finally:
+        _lock.release()
@@ -0,0 +1,139 @@
+import time, threading
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+from app.config import RATE_DEFAULT_RPS, RATE_BURST, HOST_RATES, RATE_LIMIT_BACKOFF, HF_BASE, GITHUB_API
+from app.metrics import RATE_TOKENS, RATE_PER_SECOND, RATE_REMAINING, RATE_LIMITED
+
+def _parse_host_rates(spec: str) -> Dict[str, float]:
+    rates: Dict[str, float] = {}
+    for item in spec.split(","):
+        host, _, rps = item.partition("=")
+        try:
+            rate = float(rps)
+        except ValueError:
+            continue
+        if rate <= 0:
+            raise ValueError(f"HOST_RATES: rate for {host.strip()!r} must be > 0, got {rps.strip()!r}")
+        rates[host.strip().lower()] = rate
+    return rates
+
+def _retry_after(value: Optional[str]) -> Optional[float]:
+    # Retry-After is either delta-seconds or an HTTP date
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+class _Bucket:
+    __slots__ = ("label", "max_rate", "rate", "capacity", "tokens", "updated", "blocked_until")
+
+    def __init__(self, label: str, rate: float, capacity: int):
+        self.label = label
+        self.max_rate = rate
+        self.rate = rate
+        self.capacity = float(max(1, capacity))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+
+    def refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+class HostScheduler:
+    """
+    Token bucket per host. Paces at the configured rate with a small burst,
+    and follows what the server says: GitHub's X-RateLimit-Remaining/Reset
+    cap the budget and block until reset when exhausted; 429 (and 403 with
+    an empty budget) block for Retry-After and halve the rate, which then
+    recovers additively on successful responses.
+    Metrics are labelled by host only for `named_hosts` and hosts with their
+    own rate; every other host (personal websites) shares the label "other",
+    so the label set stays bounded.
+    """
+    def __init__(self, default_rate: float = RATE_DEFAULT_RPS, burst: int = RATE_BURST,
+                 host_rates: Optional[Dict[str, float]] = None, named_hosts: tuple = ()):
+        if default_rate <= 0:
+            raise ValueError(f"RATE_DEFAULT_RPS must be > 0, got {default_rate}")
+        self.default_rate = default_rate
+        self.burst = burst
+        self.host_rates = host_rates or {}
+        self.named_hosts = set(named_hosts) | set(self.host_rates)
+        self._buckets: Dict[str, _Bucket] = {}
+        self._lock = threading.Lock()
+
+    def _bucket(self, host: str) -> _Bucket:
+        b = self._buckets.get(host)
+        if b is None:
+            label = host if host in self.named_hosts else "other"
+            b = self._buckets[host] = _Bucket(label, self.host_rates.get(host, self.default_rate), self.burst)
+            RATE_PER_SECOND.labels(label).set(b.rate)
+        return b
+
+    def acquire(self, host: str) -> float:
+        """Block until `host` has budget for one request; returns seconds waited."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                b = self._bucket(host)
+                now = time.monotonic()
+                b.refill(now)
+                if now < b.blocked_until:
+                    wait = b.blocked_until - now
+                elif b.tokens >= 1.0:
+                    b.tokens -= 1.0
+                    RATE_TOKENS.labels(b.label).set(b.tokens)
+                    return waited
+                else:
+                    wait = (1.0 - b.tokens) / b.rate
+            time.sleep(wait)
+            waited += wait
+
+    def observe(self, host: str, status: int, headers) -> Optional[float]:
+        """Fold a response into the host's budget; returns the back-off delay if told to wait."""
+        with self._lock:
+            b = self._bucket(host)
+            now = time.monotonic()
+            b.refill(now)
+            delay: Optional[float] = None
+
+            remaining = headers.get("X-RateLimit-Remaining")
+            if remaining is not None and remaining.isdigit():
+                left = int(remaining)
+                RATE_REMAINING.labels(b.label).set(left)
+                b.tokens = min(b.tokens, float(left))
+                reset = headers.get("X-RateLimit-Reset")
+                if left == 0 and reset and reset.isdigit():
+                    delay = max(0.0, int(reset) - time.time())
+
+            if status == 429 or (status == 403 and delay is not None):
+                RATE_LIMITED.labels(b.label).inc()
+                told = _retry_after(headers.get("Retry-After"))
+                if told is not None:
+                    delay = told
+                elif delay is None:
+                    delay = RATE_LIMIT_BACKOFF
+                b.rate = max(b.max_rate / 16, b.rate / 2)
+            elif 200 <= status < 400 and b.rate < b.max_rate:
+                b.rate = min(b.max_rate, b.rate + b.max_rate / 20)
+
+            if delay is not None:
+                b.blocked_until = max(b.blocked_until, now + delay)
+                b.tokens = 0.0
+            RATE_TOKENS.labels(b.label).set(b.tokens)
+            RATE_PER_SECOND.labels(b.label).set(b.rate)
+            return delay
+
+def host_of(url: str) -> str:
+    return urlparse(url).netloc.lower()
+
+scheduler = HostScheduler(host_rates=_parse_host_rates(HOST_RATES),
+                          named_hosts=(host_of(HF_BASE), host_of(GITHUB_API), "github.com"))
@@ -0,0 +1,51 @@
+import threading, time
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlsplit
+from urllib.robotparser import RobotFileParser
+
+from app.config import UA, ROBOTS_TTL
+from app.utils.http_utils import timed_get
+
+class RobotsCache:
+    """
+    robots.txt per scheme://host, fetched once per `ttl`. A missing or
+    unreachable robots.txt allows everything; 401/403 disallows everything
+    (as urllib.robotparser does).
+    """
+    def __init__(self, ttl: int):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._rules: Dict[str, Tuple[float, RobotFileParser]] = {}
+
+    def _fetch(self, origin: str) -> RobotFileParser:
+        rp = RobotFileParser(f"{origin}/robots.txt")
+        resp = timed_get(f"{origin}/robots.txt", "robots", headers={"User-Agent": UA})
+        if resp is not None and resp.status_code in (401, 403):
+            rp.disallow_all = True
+        elif resp is not None and resp.status_code == 200:
+            rp.parse(resp.text.splitlines())
+        else:
+            rp.allow_all = True
+        return rp
+
+    def allowed(self, url: str, agent: str = UA) -> bool:
+        parts = urlsplit(url)
+        origin = f"{parts.scheme}://{parts.netloc}".lower()
+        now = time.time()
+        with self._lock:
+            hit = self._rules.get(origin)
+        if hit is None or hit[0] <= now:
+            hit = (now + self.ttl, self._fetch(origin))
+            with self._lock:
+                self._rules[origin] = hit
+        return hit[1].can_fetch(agent, url)
+
+_robots: Optional[RobotsCache] = None
+_robots_lock = threading.Lock()
+
+def get_robots() -> RobotsCache:
+    global _robots
+    with _robots_lock:
+        if _robots is None:
+            _robots = RobotsCache(ROBOTS_TTL)
+        return _robots
@@ -0,0 +1,89 @@
+import heapq, threading, time
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+from app.metrics import SPAN_SECONDS
+
+_SLOWEST_USERS = 10
+
+class SpanTotals:
+    """
+    One run's timing breakdown: count and total seconds per span name, plus
+    the slowest users with their own per-span split.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._totals: Dict[str, List[float]] = {}
+        self._slowest: List[Tuple[float, str, Dict[str, float]]] = []  # min-heap on seconds
+
+    def add(self, name: str, seconds: float) -> None:
+        with self._lock:
+            t = self._totals.setdefault(name, [0, 0.0])
+            t[0] += 1
+            t[1] += seconds
+
+    def add_user(self, user: str, seconds: float, spans: Dict[str, float]) -> None:
+        with self._lock:
+            item = (seconds, user, spans)
+            if len(self._slowest) < _SLOWEST_USERS:
+                heapq.heappush(self._slowest, item)
+            elif seconds > self._slowest[0][0]:
+                heapq.heapreplace(self._slowest, item)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            items = sorted(self._totals.items(), key=lambda kv: kv[1][1], reverse=True)
+            slowest = sorted(self._slowest, reverse=True)
+        return {
+            "spans": {name: {"count": int(n), "seconds": round(secs, 3), "mean_ms": round(secs / n * 1000, 2)}
+                      for name, (n, secs) in items},
+            "slowest_users": [{"username": u, "seconds": round(secs, 3),
+                               "spans": {k: round(v, 3) for k, v in spans.items()}}
+                              for secs, u, spans in slowest],
+        }
+
+_current = SpanTotals()
+_local = threading.local()  # .user: span seconds of the user this thread is visiting
+
+def reset() -> SpanTotals:
+    """Start a new breakdown (at the start of a run) and return it."""
+    global _current
+    _current = SpanTotals()
+    return _current
+
+def breakdown() -> dict:
+    return _current.snapshot()
+
+def observe(name: str, seconds: float) -> None:
+    SPAN_SECONDS.labels(name).observe(seconds)
+    _current.add(name, seconds)
+    user: Optional[Dict[str, float]] = getattr(_local, "user", None)
+    if user is not None:
+        user[name] = user.get(name, 0.0) + seconds
+
+@contextmanager
+def span(name: str):
+    """
+    Time a block as span `name`. Spans nest (a stage includes its http /
+    parse / dedup / write spans) and add up across threads, so with
+    concurrency the totals can exceed the run's wall time.
+    """
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - t0)
+
+@contextmanager
+def user_span(user: str):
+    """The "user" span; spans inside it are also attributed to `user`."""
+    totals, per_user = _current, {}
+    _local.user = per_user
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        _local.user = None
+        secs = time.perf_counter() - t0
+        observe("user", secs)
+        totals.add_user(user, secs, per_user)
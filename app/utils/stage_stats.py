@@ -0,0 +1,54 @@
+import sqlite3, threading, time
+from typing import Dict, Optional
+
+from app.config import STAGE_STATS_PATH
+
+class StageStats:
+    """
+    Requests, new emails, visits and skips per visit stage, summed across
+    runs in SQLite. Each run (or sharded-run worker) adds its own counts once
+    it finishes.
+    """
+    def __init__(self, path: str):
+        self._lock = threading.Lock()
+        self._db = None
+        if path:
+            self._db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS stage_yield (stage TEXT PRIMARY KEY,"
+                " requests INTEGER NOT NULL, emails INTEGER NOT NULL, visits INTEGER NOT NULL,"
+                " skipped INTEGER NOT NULL, updated_at REAL NOT NULL)"
+            )
+            self._db.commit()
+
+    def load(self) -> Dict[str, Dict[str, int]]:
+        if self._db is None:
+            return {}
+        with self._lock:
+            rows = self._db.execute("SELECT stage, requests, emails, visits, skipped FROM stage_yield").fetchall()
+        return {s: {"requests": r, "emails": e, "visits": v, "skipped": k} for s, r, e, v, k in rows}
+
+    def add(self, counts: Dict[str, Dict[str, int]]) -> None:
+        if self._db is None or not counts:
+            return
+        now = time.time()
+        with self._lock:
+            self._db.executemany(
+                "INSERT INTO stage_yield VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT(stage) DO UPDATE SET"
+                " requests = requests + excluded.requests, emails = emails + excluded.emails,"
+                " visits = visits + excluded.visits, skipped = skipped + excluded.skipped,"
+                " updated_at = excluded.updated_at",
+                [(s, c["requests"], c["emails"], c["visits"], c["skipped"], now) for s, c in counts.items()],
+            )
+            self._db.commit()
+
+_stats: Optional[StageStats] = None
+_stats_lock = threading.Lock()
+
+def get_stage_stats() -> StageStats:
+    global _stats
+    with _stats_lock:
+        if _stats is None:
+            _stats = StageStats(STAGE_STATS_PATH)
+        return _stats
@@ -1,5 +1,7 @@
 # app/utils/verify_email.py
-import re, smtplib, random
+import re, smtplib, random, threading, time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Union
 try:
     import dns.resolver  # pip install dnspython
     _DNS = True
@@ -7,13 +9,21 @@ except Exception:
     dns = None
     _DNS = False
 
+from app.config import (
+    MX_CACHE_TTL, MX_NEGATIVE_TTL, VERIFY_CONCURRENCY, SMTP_RCPT_PER_SESSION,
+)
+
 EMAIL_RE = re.compile(r"^[A-Za-z0-9._%+\-]+@[A-Za-z0-9.\-]+\.[A-Za-z]{2,}$")
 ROLE = {"admin","support","info","sales","contact","help","security","hr","billing","hello","team"}
 DISPOSABLE = {"mailinator.com","guerrillamail.com","10minutemail.com","tempmail.com","yopmail.com"}
 NOREPLY = (re.compile(r".+@users\.noreply\.github\.com$", re.I),
            re.compile(r".+@github\.noreply\.com$", re.I))
 
-def _mx(domain: str, timeout=3.0) -> list[str]:
+# domain -> (expires_at, mx hosts); empty lists are cached too, for MX_NEGATIVE_TTL
+_MX_CACHE: dict[str, tuple[float, list[str]]] = {}
+_MX_LOCK = threading.Lock()
+
+def _mx_lookup(domain: str, timeout=3.0) -> list[str]:
     if not _DNS: return []
     try:
         ans = dns.resolver.resolve(domain, "MX", lifetime=timeout)
@@ -21,35 +31,97 @@ def _mx(domain: str, timeout=3.0) -> list[str]:
     except Exception:
         return []
 
+def _mx(domain: str, timeout=3.0) -> list[str]:
+    now = time.monotonic()
+    with _MX_LOCK:
+        hit = _MX_CACHE.get(domain)
+    if hit and hit[0] > now:
+        return hit[1]
+    mxs = _mx_lookup(domain, timeout)
+    with _MX_LOCK:
+        _MX_CACHE[domain] = (now + (MX_CACHE_TTL if mxs else MX_NEGATIVE_TTL), mxs)
+    return mxs
+
 def _rcpt(mx: str, email: str, timeout=6.0):
+    return _rcpt_many(mx, [email], timeout)[email]
+
+def _rcpt_many(mx: str, emails: list[str], timeout=6.0) -> dict[str, Optional[bool]]:
+    """RCPT probe several addresses over one SMTP session (True/False/None per address)."""
+    out: dict[str, Optional[bool]] = {e: None for e in emails}
     try:
         with smtplib.SMTP(mx, 25, timeout=timeout) as s:
-            s.helo("example.com"); s.mail("validator@example.com")
-            code, _ = s.rcpt(email)
-            if code in (250, 251): return True
-            if 500 <= code < 600:  return False
-            return None
+            s.helo("example.com")
+            for i in range(0, len(emails), SMTP_RCPT_PER_SESSION):
+                if i:
+                    s.rset()
+                s.mail("validator@example.com")
+                for e in emails[i:i + SMTP_RCPT_PER_SESSION]:
+                    code, _ = s.rcpt(e)
+                    if code in (250, 251): out[e] = True
+                    elif 500 <= code < 600: out[e] = False
     except Exception:
-        return None
+        pass  # whatever was not answered stays uncertain
+    return out
 
-def verify_email(email: str, require_com=False, do_smtp=False) -> dict:
-    e = email.strip().lower()
+def _precheck(e: str, require_com: bool) -> Union[dict, tuple[str, list[str]]]:
+    """Offline checks: a final verdict, or (domain, reasons) to continue with MX/SMTP."""
     if not EMAIL_RE.match(e): return {"status":"invalid","reasons":["bad_syntax"]}
     local, domain = e.split("@",1)
     if require_com and not domain.endswith(".com"):
         return {"status":"invalid","reasons":["not_dot_com"]}
     if any(p.search(e) for p in NOREPLY): return {"status":"invalid","reasons":["noreply_github"]}
     if domain in DISPOSABLE: return {"status":"invalid","reasons":["disposable_domain"]}
-    reasons = ["role_account"] if local in ROLE else []
+    return domain, (["role_account"] if local in ROLE else [])
 
-    mxs = _mx(domain)
+def _verdict(reasons: list[str], mxs: list[str], ok: Optional[bool], do_smtp: bool) -> dict:
     if not mxs:
         return {"status":"uncertain","reasons":reasons+["mx_unavailable_or_absent"]}
-
     if do_smtp:
-        ok = _rcpt(mxs[0], e)
         if ok is True:  return {"status":"valid","reasons":reasons+["smtp_accept"]}
         if ok is False: return {"status":"invalid","reasons":reasons+["smtp_reject"]}
         return {"status":"uncertain","reasons":reasons+["smtp_uncertain"]}
-
     return {"status":"uncertain","reasons":reasons+["mx_only_passed"]}
+
+def verify_email(email: str, require_com=False, do_smtp=False) -> dict:
+    e = email.strip().lower()
+    pre = _precheck(e, require_com)
+    if isinstance(pre, dict): return pre
+    domain, reasons = pre
+
+    mxs = _mx(domain)
+    ok = _rcpt(mxs[0], e) if (mxs and do_smtp) else None
+    return _verdict(reasons, mxs, ok, do_smtp)
+
+def verify_batch(emails: list[str], require_com=False, do_smtp=False,
+                 concurrency: int = VERIFY_CONCURRENCY) -> list[dict]:
+    """
+    Verify many addresses at once: grouped by domain, one (cached) MX lookup
+    and at most one SMTP session per domain, domains checked in parallel.
+    Returns {"email", "status", "reasons"} per input, in input order.
+    """
+    results: dict[str, dict] = {}
+    by_domain: dict[str, dict[str, list[str]]] = {}
+    seen: set[str] = set()
+    for raw in emails:
+        e = raw.strip().lower()
+        if e in seen:
+            continue
+        seen.add(e)
+        pre = _precheck(e, require_com)
+        if isinstance(pre, dict):
+            results[e] = pre
+        else:
+            domain, reasons = pre
+            by_domain.setdefault(domain, {})[e] = reasons
+
+    def _domain_job(domain: str, group: dict[str, list[str]]) -> dict[str, dict]:
+        mxs = _mx(domain)
+        oks = _rcpt_many(mxs[0], list(group)) if (mxs and do_smtp) else {}
+        return {e: _verdict(reasons, mxs, oks.get(e), do_smtp) for e, reasons in group.items()}
+
+    if by_domain:
+        with ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(by_domain)))) as pool:
+            for done in pool.map(lambda kv: _domain_job(*kv), list(by_domain.items())):
+                results.update(done)
+
+    return [{"email": raw, **results[raw.strip().lower()]} for raw in emails]
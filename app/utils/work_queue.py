@@ -0,0 +1,233 @@
+import json, os, socket, sqlite3, threading, time
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from app.config import SHARD_QUEUE_PATH, SHARD_PREFETCH_USERS, SHARD_MAX_ATTEMPTS
+
+Task = Tuple[int, str, str, dict]  # (id, kind, key, payload)
+
+class WorkQueue:
+    """
+    Lease-based task queue shared by scraper workers through one SQLite file
+    (processes on one host or on several hosts sharing a filesystem).
+    Tasks are listing pages and users; a leased task becomes visible again
+    once its lease expires, so work held by a dead worker is picked up by
+    another. A task leased `max_attempts` times without completing is marked
+    failed and left out of the run. The same file holds the run's email
+    claims (shared dedup) and each worker's counters. A claim counts as kept
+    once its row is flushed to the worker's shard; a user's unflushed claims
+    are released when that user's lease expires (the worker died).
+    """
+    def __init__(self, path: str, max_attempts: int = SHARD_MAX_ATTEMPTS):
+        self.max_attempts = max(1, max_attempts)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, timeout=60, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(
+            "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);"
+            "CREATE TABLE IF NOT EXISTS tasks (id INTEGER PRIMARY KEY AUTOINCREMENT,"
+            " kind TEXT NOT NULL, key TEXT NOT NULL, payload TEXT NOT NULL DEFAULT '{}',"
+            " state TEXT NOT NULL DEFAULT 'ready', owner TEXT, lease_expires REAL NOT NULL DEFAULT 0,"
+            " attempts INTEGER NOT NULL DEFAULT 0, UNIQUE (kind, key));"
+            "CREATE INDEX IF NOT EXISTS tasks_state ON tasks(state, lease_expires);"
+            "CREATE TABLE IF NOT EXISTS claims (email TEXT PRIMARY KEY, username TEXT NOT NULL,"
+            " worker TEXT NOT NULL, flushed INTEGER NOT NULL DEFAULT 0) WITHOUT ROWID;"
+            "CREATE TABLE IF NOT EXISTS workers (worker TEXT PRIMARY KEY, host TEXT NOT NULL,"
+            " pid INTEGER NOT NULL, started_at REAL NOT NULL, heartbeat REAL NOT NULL,"
+            " counters TEXT NOT NULL DEFAULT '{}', finished INTEGER NOT NULL DEFAULT 0);"
+        )
+        if "flushed" not in [r[1] for r in self._db.execute("PRAGMA table_info(claims)")]:
+            self._db.execute("ALTER TABLE claims ADD COLUMN flushed INTEGER NOT NULL DEFAULT 0")
+        self._claimed = self._db.execute("SELECT COUNT(*) FROM claims").fetchone()[0]
+
+    @contextmanager
+    def _tx(self):
+        # BEGIN IMMEDIATE takes the write lock up front: lease/claim races are decided here
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._db
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+            self._db.execute("COMMIT")
+
+    def _meta(self, key: str, default=None):
+        row = self._db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    # ---- run ----
+    def start(self, params: dict, first_page: dict) -> None:
+        """Reset the queue for a new run seeded with the first listing page."""
+        with self._tx() as db:
+            for table in ("meta", "tasks", "claims", "workers"):
+                db.execute(f"DELETE FROM {table}")
+            db.executemany("INSERT INTO meta VALUES (?, ?)", [
+                ("params", json.dumps(params)), ("started_at", json.dumps(time.time())),
+            ])
+            db.execute("INSERT INTO tasks (kind, key, payload) VALUES ('page', ?, ?)",
+                       (str(first_page["page"]), json.dumps(first_page)))
+            self._claimed = 0
+
+    @property
+    def params(self) -> dict:
+        with self._lock:
+            return self._meta("params", {})
+
+    @property
+    def started_at(self) -> Optional[float]:
+        with self._lock:
+            return self._meta("started_at")
+
+    def counts(self) -> Dict[str, int]:
+        """Tasks per "<kind>:<state>"."""
+        with self._lock:
+            rows = self._db.execute("SELECT kind, state, COUNT(*) FROM tasks GROUP BY kind, state").fetchall()
+        return {f"{k}:{s}": n for k, s, n in rows}
+
+    def active_workers(self, stale: float) -> List[str]:
+        """Workers that hold a live lease or reported within `stale` seconds without finishing."""
+        now = time.time()
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT worker FROM workers WHERE finished = 0 AND heartbeat > ?"
+                " UNION SELECT owner FROM tasks WHERE state = 'leased' AND lease_expires > ?",
+                (now - stale, now),
+            ).fetchall()
+        return sorted(r[0] for r in rows)
+
+    def idle(self) -> bool:
+        """No task is ready or leased (only done or failed ones): the run is over."""
+        with self._lock:
+            return self._db.execute(
+                "SELECT 1 FROM tasks WHERE state NOT IN ('done', 'failed') LIMIT 1"
+            ).fetchone() is None
+
+    # ---- tasks ----
+    def lease(self, worker: str, seconds: float) -> Optional[Task]:
+        now = time.time()
+        with self._tx() as db:
+            # expired leases: their worker died, so its unflushed claims for the
+            # user are gone with it; tasks out of attempts are failed
+            expired = db.execute(
+                "SELECT kind, key, owner FROM tasks WHERE state = 'leased' AND lease_expires < ?", (now,)
+            ).fetchall()
+            db.executemany("DELETE FROM claims WHERE username = ? AND worker = ? AND flushed = 0",
+                           [(key, owner) for kind, key, owner in expired if kind == "user"])
+            db.execute("UPDATE tasks SET state = 'failed', lease_expires = 0"
+                       " WHERE state = 'leased' AND lease_expires < ? AND attempts >= ?", (now, self.max_attempts))
+            self._claimed = db.execute("SELECT COUNT(*) FROM claims").fetchone()[0]
+            # fetch the next listing page only when few users are waiting, so
+            # listing overlaps visiting but does not run far ahead of the limit
+            ready = db.execute("SELECT COUNT(*) FROM tasks WHERE kind = 'user' AND state = 'ready'").fetchone()[0]
+            first = "page" if ready < SHARD_PREFETCH_USERS else "user"
+            row = db.execute(
+                "SELECT id, kind, key, payload FROM tasks"
+                " WHERE state = 'ready' OR (state = 'leased' AND lease_expires < ?)"
+                " ORDER BY kind = ? DESC, id LIMIT 1", (now, first)
+            ).fetchone()
+            if row is None:
+                return None
+            db.execute("UPDATE tasks SET state = 'leased', owner = ?, lease_expires = ?,"
+                       " attempts = attempts + 1 WHERE id = ?", (worker, now + seconds, row[0]))
+        return row[0], row[1], row[2], json.loads(row[3])
+
+    def release(self, task_id: int, worker: str) -> None:
+        """Give back a task that raised: ready for another try, or failed after max_attempts."""
+        with self._tx() as db:
+            db.execute("UPDATE tasks SET state = CASE WHEN attempts >= ? THEN 'failed' ELSE 'ready' END,"
+                       " lease_expires = 0 WHERE id = ? AND owner = ? AND state = 'leased'",
+                       (self.max_attempts, task_id, worker))
+
+    def extend(self, task_id: int, worker: str, seconds: float) -> None:
+        with self._tx() as db:
+            db.execute("UPDATE tasks SET lease_expires = ? WHERE id = ? AND owner = ? AND state = 'leased'",
+                       (time.time() + seconds, task_id, worker))
+
+    def heartbeat(self, worker: str, seconds: float) -> None:
+        """Renew every lease `worker` still holds and mark it alive."""
+        now = time.time()
+        with self._tx() as db:
+            db.execute("UPDATE tasks SET lease_expires = ? WHERE owner = ? AND state = 'leased'",
+                       (now + seconds, worker))
+            db.execute("UPDATE workers SET heartbeat = ? WHERE worker = ?", (now, worker))
+
+    def complete(self, task_id: int, worker: str, users: Iterable[str] = (),
+                 next_page: Optional[dict] = None) -> int:
+        """
+        Mark a task done, enqueueing what it discovered; returns how many users
+        were new. A worker that lost the lease (it expired and the task was
+        leased again) commits nothing and gets 0.
+        """
+        with self._tx() as db:
+            cur = db.execute("UPDATE tasks SET state = 'done', lease_expires = 0"
+                             " WHERE id = ? AND owner = ? AND state = 'leased'", (task_id, worker))
+            if cur.rowcount == 0:
+                return 0
+            before = db.total_changes
+            db.executemany("INSERT OR IGNORE INTO tasks (kind, key) VALUES ('user', ?)", [(u,) for u in users])
+            added = db.total_changes - before
+            if next_page is not None:
+                db.execute("INSERT OR IGNORE INTO tasks (kind, key, payload) VALUES ('page', ?, ?)",
+                           (str(next_page["page"]), json.dumps(next_page)))
+        return added
+
+    # ---- shared dedup ----
+    def claim(self, worker: str, username: str, email: str, limit: int) -> bool:
+        """
+        Take `email` for this run unless another worker has, the run's limit is
+        reached or `worker` no longer holds the lease on `username`.
+        """
+        with self._tx() as db:
+            cur = db.execute(
+                "INSERT OR IGNORE INTO claims SELECT ?, ?, ?, 0 WHERE (SELECT COUNT(*) FROM claims) < ?"
+                " AND EXISTS (SELECT 1 FROM tasks WHERE kind = 'user' AND key = ? AND owner = ?"
+                " AND state = 'leased')",
+                (email, username, worker, limit, username, worker),
+            )
+            if cur.rowcount == 1:
+                self._claimed += 1
+            return cur.rowcount == 1
+
+    def is_claimed(self, email: str) -> bool:
+        with self._lock:
+            return self._db.execute("SELECT 1 FROM claims WHERE email = ?", (email,)).fetchone() is not None
+
+    def flushed(self, worker: str, emails: Iterable[str]) -> None:
+        """The rows of these claims are on disk in the worker's shard (claims it lost stay lost)."""
+        with self._tx() as db:
+            db.executemany("UPDATE claims SET flushed = 1 WHERE email = ? AND worker = ?",
+                           [(e, worker) for e in emails])
+
+    def claimed(self) -> int:
+        """Claims of the run: this worker's own as they happen, everyone's as of the last lease / report."""
+        return self._claimed
+
+    # ---- workers ----
+    def report(self, worker: str, counters: dict, finished: bool = False) -> None:
+        now = time.time()
+        with self._tx() as db:
+            db.execute(
+                "INSERT INTO workers VALUES (?, ?, ?, ?, ?, ?, ?) ON CONFLICT(worker) DO UPDATE SET"
+                " heartbeat = excluded.heartbeat, counters = excluded.counters, finished = excluded.finished",
+                (worker, socket.gethostname(), os.getpid(), now, now, json.dumps(counters), int(finished)),
+            )
+            self._claimed = db.execute("SELECT COUNT(*) FROM claims").fetchone()[0]
+
+    def workers(self) -> List[dict]:
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT worker, host, pid, started_at, heartbeat, counters, finished FROM workers"
+            ).fetchall()
+        return [{"worker": w, "host": h, "pid": p, "started_at": s, "heartbeat": hb,
+                 "counters": json.loads(c), "finished": bool(f)} for w, h, p, s, hb, c, f in rows]
+
+_queue: Optional[WorkQueue] = None
+_queue_lock = threading.Lock()
+
+def get_queue() -> WorkQueue:
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = WorkQueue(SHARD_QUEUE_PATH)
+        return _queue
@@ -0,0 +1,113 @@
+"""
+Regression check + micro-benchmark for app.utils.email_utils.extract_emails.
+
+    python -m benchmarks.bench_email_extract --repeat 5
+
+Builds a corpus from the addresses in emails.jsonl / old_emails.jsonl, each
+written plainly and in every obfuscated form deobfuscate() understands,
+embedded in HTML-ish pages (plus email-free pages). The fast path must
+return exactly what the old full-page implementation returned; then both are
+timed in MB/s.
+"""
+import argparse, html, json, os, random, re, sys, time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from app.utils.email_utils import _OBF_PATTERNS, _scan, extract_emails  # noqa: E402
+
+def reference_deobfuscate(text: str) -> str:
+    # the original implementation: unescape + 3 normalizations + 8 pattern passes
+    t = html.unescape(text or "")
+    t = re.sub(r"[\(\)\[\]\{\}<>]", " ", t)
+    t = re.sub(r"\s*-\s*", "-", t)
+    for pat, rep in _OBF_PATTERNS:
+        t = re.sub(pat, rep, t, flags=re.IGNORECASE)
+    return re.sub(r"\s+", " ", t).strip()
+
+def reference_extract_emails(text: str) -> list[str]:
+    t = reference_deobfuscate(text)
+    if not t:
+        return []
+    return list(dict.fromkeys(_scan(t)))
+
+_ATS = ["@", " at ", " [at] ", " (at) ", "{at}", " AT ", "&#64;", "&commat;", " &lt;at&gt; ", " - at - "]
+_DOTS = [".", " dot ", " [dot] ", "(dot)", " {dot} ", " DOT ", "&#46;"]
+
+def _variants(email: str, rnd: random.Random) -> list[str]:
+    local, _, domain = email.partition("@")
+    out = [email, f'<a href="mailto:{email}">{email}</a>', f"{email}.png", f"({email})"]
+    for at in _ATS:
+        dot = rnd.choice(_DOTS)
+        out.append(local + at + dot.join(domain.split(".")))
+    return out
+
+def _emails(paths: list[str]) -> list[str]:
+    seen: dict[str, None] = {}
+    for path in paths:
+        if not os.path.exists(path):
+            continue
+        with open(path, "r", encoding="utf-8") as f:
+            for ln in f:
+                try:
+                    e = json.loads(ln).get("email")
+                except json.JSONDecodeError:
+                    continue
+                if isinstance(e, str) and "@" in e:
+                    seen.setdefault(e.strip(), None)
+    return list(seen)
+
+_FILLER = ("<div class=\"card\"><a href=\"/org/model?p=2&amp;sort=likes\">Model card</a>"
+           "<p>Trained at scale on 8 GPUs; see the docs at huggingface.co for details.</p></div>")
+_NO_EMAIL = ("<div class=\"row\" data-id=\"42\"><span>Downloads last month</span>"
+             "<p>lorem ipsum dolor sit amet, consectetur adipiscing elit</p></div>")
+
+def build_corpus(emails: list[str], seed: int = 11) -> tuple[list[str], list[str]]:
+    rnd = random.Random(seed)
+    with_emails, without = [], []
+    snippets = [v for e in emails for v in _variants(e, rnd)]
+    rnd.shuffle(snippets)
+    for i in range(0, len(snippets), 8):
+        body = "".join(f"<p>contact: {s}</p>{_FILLER}" for s in snippets[i:i + 8])
+        with_emails.append(f"<html><body>{_FILLER * 20}{body}{_FILLER * 20}</body></html>")
+    for _ in range(max(1, len(with_emails) // 2)):
+        without.append(f"<html><body>{_NO_EMAIL * 80}</body></html>")
+    return with_emails, without
+
+def bench(fn, pages: list[str], repeat: int) -> float:
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        for p in pages:
+            fn(p)
+    return time.perf_counter() - t0
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("inputs", nargs="*", default=[os.path.join(ROOT, "emails.jsonl"),
+                                                  os.path.join(ROOT, "old_emails.jsonl")])
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    emails = _emails(args.inputs)
+    if not emails:
+        sys.exit("no emails found in inputs")
+    with_emails, without = build_corpus(emails)
+
+    mismatches = 0
+    for page in with_emails + without:
+        if extract_emails(page) != reference_extract_emails(page):
+            mismatches += 1
+    found = sum(len(extract_emails(p)) for p in with_emails)
+    print(f"corpus: {len(emails)} addresses -> {len(with_emails)} pages with candidates, "
+          f"{len(without)} without; {found} extractions; mismatches vs reference: {mismatches}")
+    if mismatches:
+        sys.exit(1)
+
+    for label, pages in (("with emails", with_emails), ("no emails", without)):
+        mb = sum(len(p.encode("utf-8")) for p in pages) * args.repeat / 1e6
+        ref = bench(reference_extract_emails, pages, args.repeat)
+        fast = bench(extract_emails, pages, args.repeat)
+        print(f"{label:12s} reference {mb / ref:8.1f} MB/s   fast path {mb / fast:8.1f} MB/s   {ref / fast:5.2f}x")
+
+if __name__ == "__main__":
+    main()
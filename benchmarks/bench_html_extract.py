@@ -0,0 +1,89 @@
+"""
+Compare HTML link/text extraction backends against the old BeautifulSoup path.
+
+    python -m benchmarks.bench_html_extract --pages saved_hf_pages/ --repeat 20
+
+--pages takes a directory of saved HF pages (*.html). Without it, synthetic
+pages shaped like HF profile / model listing pages are generated.
+"""
+import argparse, glob, os, random, sys, time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bs4 import BeautifulSoup  # noqa: E402
+from app.utils.html_extract import BACKENDS, extract_links  # noqa: E402
+from app.utils.email_utils import extract_emails  # noqa: E402
+
+def synthetic_pages(n: int, seed: int = 7) -> list[str]:
+    rnd = random.Random(seed)
+    pages = []
+    for i in range(n):
+        user = f"org{i}"
+        nav = "".join(f'<a href="/{p}">{p}</a>' for p in ("models", "datasets", "spaces", "docs", "blog"))
+        cards = "".join(
+            f'<article><a href="/{user}/model-{k}?x=1"><h4>{user}/model-{k}</h4></a>'
+            f'<div class="meta">Updated {rnd.randint(1, 30)} days ago &middot; {rnd.randint(1, 10**6)} downloads</div></article>'
+            for k in range(rnd.randint(20, 60))
+        )
+        props = '{"user":"%s","repos":[%s]}' % (user, ",".join('"%d"' % k for k in range(200)))
+        links = (f'<a href="https://github.com/{user}">GitHub</a>'
+                 f'<a href="https://{user}.example.com/">site</a>'
+                 f'<a href="mailto:{user}@example.com">mail</a>')
+        pages.append(
+            "<!doctype html><html><head><style>.a{color:red}</style>"
+            f"<script>window.__props={props}</script></head><body>"
+            f"<header>{nav}</header><main data-props='{props}'>{links}{cards}"
+            "<p>" + "lorem ipsum dolor sit amet " * 200 + "</p></main></body></html>"
+        )
+    return pages
+
+def bs4_links(html: str) -> list[str]:
+    # what scrape_hf_profile did before: build the full tree just to collect hrefs
+    soup = BeautifulSoup(html, "html.parser")
+    return [a["href"].strip() for a in soup.find_all("a", href=True)]
+
+def bench(fn, pages: list[str], repeat: int) -> float:
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        for p in pages:
+            fn(p)
+    return time.perf_counter() - t0
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--pages", default="", help="directory of saved *.html pages")
+    ap.add_argument("--synthetic", type=int, default=30, help="synthetic pages when --pages is empty")
+    ap.add_argument("--repeat", type=int, default=10)
+    args = ap.parse_args()
+
+    if args.pages:
+        pages = []
+        for path in sorted(glob.glob(os.path.join(args.pages, "*.html"))):
+            with open(path, "r", encoding="utf-8", errors="replace") as f:
+                pages.append(f.read())
+    else:
+        pages = synthetic_pages(args.synthetic)
+    if not pages:
+        sys.exit("no pages to benchmark")
+    mb = sum(len(p.encode("utf-8")) for p in pages) * args.repeat / 1e6
+
+    # backends must agree with the BeautifulSoup reference on links
+    for name in BACKENDS:
+        for p in pages:
+            ref = extract_links(p, "bs4")
+            got = extract_links(p, name)
+            if (got.github, got.external, got.internal) != (ref.github, ref.external, ref.internal):
+                sys.exit(f"backend {name!r} disagrees with bs4 on links")
+
+    emails = bench(extract_emails, pages, args.repeat)
+    base = bench(bs4_links, pages, args.repeat)
+    print(f"{len(pages)} pages x {args.repeat}, {mb:.1f} MB; extract_emails alone {emails:.3f}s")
+    print(f"{'path':26s} {'links':>8s} {'MB/s':>8s} {'+emails':>8s} {'speedup':>8s}")
+    rows = [("bs4 tree (old)", bs4_links)]
+    rows += [(f"extract_links[{name}]", lambda p, n=name: extract_links(p, n)) for name in BACKENDS]
+    for label, fn in rows:
+        secs = base if fn is bs4_links else bench(fn, pages, args.repeat)
+        print(f"{label:26s} {secs:8.3f} {mb / secs:8.1f} {secs + emails:8.3f} {base / secs:7.2f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Throughput of app.utils.parse_pool.parse_page as the worker count grows.
+
+    python -m benchmarks.bench_parse_pool --pages saved_hf_pages/ --workers 0,1,2,4,8
+
+--pages takes a directory of recorded pages (*.html); without it the
+synthetic HF-shaped pages from bench_html_extract are used. Pages are fed
+from `--threads` concurrent callers (like crawler threads after their
+fetches); workers=0 is the inline, GIL-bound baseline. Every configuration
+must return exactly what inline parsing returns.
+"""
+import argparse, glob, os, sys, time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils import parse_pool  # noqa: E402
+from benchmarks.bench_html_extract import synthetic_pages  # noqa: E402
+
+def _summary(result):
+    emails, page = result
+    return emails, page.github, page.external, page.internal
+
+def run(bodies: list[bytes], workers: int, threads: int, repeat: int) -> tuple[float, list]:
+    if workers:
+        parse_pool.parse_page(bodies[0], "utf-8", workers=workers)  # start the processes first
+    work = bodies * repeat
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as ex:
+        out = list(ex.map(lambda b: parse_pool.parse_page(b, "utf-8", workers=workers), work))
+    return time.perf_counter() - t0, [_summary(r) for r in out[:len(bodies)]]
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--pages", default="", help="directory of recorded *.html pages")
+    ap.add_argument("--synthetic", type=int, default=40, help="synthetic pages when --pages is empty")
+    ap.add_argument("--workers", default=f"0,1,2,{os.cpu_count() or 1}")
+    ap.add_argument("--threads", type=int, default=16, help="concurrent callers")
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args()
+
+    if args.pages:
+        bodies = []
+        for path in sorted(glob.glob(os.path.join(args.pages, "*.html"))):
+            with open(path, "rb") as f:
+                bodies.append(f.read())
+    else:
+        bodies = [p.encode("utf-8") for p in synthetic_pages(args.synthetic)]
+    if not bodies:
+        sys.exit("no pages to benchmark")
+    mb = sum(map(len, bodies)) * args.repeat / 1e6
+    counts = sorted({max(0, int(w)) for w in args.workers.split(",") if w.strip()})
+
+    print(f"{len(bodies)} pages x {args.repeat}, {mb:.1f} MB, {args.threads} callers, {os.cpu_count()} cpus")
+    print(f"{'workers':>8s} {'secs':>8s} {'pages/s':>9s} {'MB/s':>8s} {'speedup':>8s}")
+    base = reference = None
+    for w in (counts if 0 in counts else [0] + counts):
+        secs, results = run(bodies, w, args.threads, args.repeat)
+        if reference is None:
+            base, reference = secs, results
+        elif results != reference:
+            sys.exit(f"workers={w} returned different results than inline parsing")
+        print(f"{w:8d} {secs:8.3f} {len(bodies) * args.repeat / secs:9.1f} {mb / secs:8.1f} {base / secs:7.2f}x")
+    parse_pool.shutdown_pool()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""
+End-to-end run_scrape benchmark against the local replay server.
+
+    python -m benchmarks.bench_scrape                      # compare with the saved baseline
+    python -m benchmarks.bench_scrape --save-baseline      # record a new baseline
+    python -m benchmarks.bench_scrape --scenarios c8 --users 400 --fixtures recorded/
+
+Each scenario runs one cold scrape (empty OUT_PATH, no HTTP cache, no GitHub
+memo) in a fresh process pointed at benchmarks.replay_server via HF_BASE /
+GITHUB_API (and HTTP_PROXY for every other host), and reports users/s,
+emails/s, requests per email (as counted by the server, 429s included) and
+the process's peak RSS. Against a baseline,
+a throughput drop, requests/email increase or memory increase beyond
+--tolerance is reported as a regression (exit status 1).
+"""
+import argparse, json, os, resource, subprocess, sys, tempfile, time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.replay_server import load_fixtures, serve, synthetic_corpus  # noqa: E402
+
+SCENARIOS = {
+    # name: (crawl concurrency, latency s, 429 share)
+    "seq":    (1, 0.02, 0.0),
+    "c8":     (8, 0.02, 0.0),
+    "c8-429": (8, 0.02, 0.05),
+}
+_BASELINE = os.path.join(ROOT, "benchmarks", "baselines", "scrape.json")
+
+def child(spec: dict) -> None:
+    # runs in the scenario's own process, configured through the environment
+    from app.models.schema import ScrapeParams
+    from app.services import scraper
+    from app.utils.checkpoint import get_checkpoint
+    kpi = scraper.run_scrape(ScrapeParams(concurrency=spec["concurrency"], email_limit=spec["email_limit"],
+                                          hf_listing_pages=spec["pages"], models_pages_per_user=1))
+    print(json.dumps({
+        "run_seconds": kpi["run_seconds"],
+        "users_visited": get_checkpoint().summary()["users_done"],
+        "emails": kpi["new_emails_written"],
+        "peak_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }))
+
+def run_scenario(srv, name: str, args) -> dict:
+    concurrency, latency, p429 = SCENARIOS[name]
+    srv.latency, srv.p429 = latency, p429
+    srv.reset()
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, PYTHONPATH=ROOT, HF_BASE=srv.base, GITHUB_API=srv.base + "/gh",
+                   OUT_PATH=os.path.join(tmp, "emails.jsonl"), HTTP_CACHE_PATH="", GITHUB_MEMO_PATH="",
+                   CHECKPOINT_PATH=os.path.join(tmp, "checkpoint.sqlite"), RATE_DEFAULT_RPS=str(args.rps),
+                   RATE_BURST=str(args.rps), RATE_LIMIT_BACKOFF="1", REQUEST_TIMEOUT="10",
+                   HF_API_PAGE_SIZE=str(args.page_size),
+                   # links to other hosts (github.com pages, personal sites) go through the replay server
+                   HTTP_PROXY=srv.base, http_proxy=srv.base, NO_PROXY="127.0.0.1", no_proxy="127.0.0.1")
+        spec = {"concurrency": concurrency, "email_limit": args.email_limit,
+                "pages": (args.users + args.page_size - 1) // args.page_size}
+        t0 = time.perf_counter()
+        out = subprocess.run([sys.executable, "-m", "benchmarks.bench_scrape", "--child", json.dumps(spec)],
+                             cwd=tmp, env=env, capture_output=True, text=True)
+        wall = time.perf_counter() - t0
+    if out.returncode:
+        sys.exit(f"scenario {name} failed:\n{out.stderr[-2000:]}")
+    res = json.loads(out.stdout.strip().splitlines()[-1])
+    stats = srv.stats
+    secs = res["run_seconds"] or wall
+    emails = res["emails"]
+    return {
+        "users_per_s": round(res["users_visited"] / secs, 2),
+        "emails_per_s": round(emails / secs, 2),
+        "requests_per_email": round(stats["requests"] / emails, 2) if emails else None,
+        "peak_mb": round(res["peak_mb"], 1),
+        "run_seconds": round(secs, 2),
+        "users": res["users_visited"],
+        "emails": emails,
+        "requests": stats["requests"],
+        "http_429": stats["429"],
+    }
+
+def regressions(name: str, got: dict, base: dict, tol: float) -> list[str]:
+    out = []
+    for key in ("users_per_s", "emails_per_s"):
+        if base.get(key) and got[key] < base[key] * (1 - tol):
+            out.append(f"{name}: {key} {got[key]} < baseline {base[key]}")
+    for key in ("requests_per_email", "peak_mb"):
+        if base.get(key) and got[key] is not None and got[key] > base[key] * (1 + tol):
+            out.append(f"{name}: {key} {got[key]} > baseline {base[key]}")
+    return out
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--child", help=argparse.SUPPRESS)
+    ap.add_argument("--scenarios", default=",".join(SCENARIOS))
+    ap.add_argument("--fixtures", default="", help="recorded fixtures dir (default: synthetic corpus)")
+    ap.add_argument("--users", type=int, default=200, help="synthetic corpus size")
+    ap.add_argument("--page-size", type=int, default=30)
+    ap.add_argument("--email-limit", type=int, default=10**6, help="default: crawl the whole corpus")
+    ap.add_argument("--rps", type=float, default=1000, help="client pacing (RATE_DEFAULT_RPS)")
+    ap.add_argument("--baseline", default=_BASELINE)
+    ap.add_argument("--save-baseline", action="store_true")
+    ap.add_argument("--tolerance", type=float, default=0.25)
+    args = ap.parse_args()
+
+    if args.child:
+        return child(json.loads(args.child))
+
+    names = [n for n in args.scenarios.split(",") if n]
+    unknown = [n for n in names if n not in SCENARIOS]
+    if unknown:
+        sys.exit(f"unknown scenarios: {unknown}; known: {list(SCENARIOS)}")
+    fixtures = load_fixtures(args.fixtures) if args.fixtures else synthetic_corpus(args.users, args.page_size)
+    srv = serve(0, fixtures)
+
+    results = {}
+    print(f"{'scenario':10s} {'users/s':>8s} {'emails/s':>9s} {'req/email':>10s} {'peak MB':>8s} "
+          f"{'secs':>7s} {'emails':>7s} {'429s':>5s}")
+    for name in names:
+        r = results[name] = run_scenario(srv, name, args)
+        print(f"{name:10s} {r['users_per_s']:8.2f} {r['emails_per_s']:9.2f} {r['requests_per_email'] or 0:10.2f} "
+              f"{r['peak_mb']:8.1f} {r['run_seconds']:7.2f} {r['emails']:7d} {r['http_429']:5d}")
+    srv.shutdown()
+
+    if args.save_baseline:
+        saved = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline, "r", encoding="utf-8") as f:
+                saved = json.load(f)
+        saved.update(results)
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(saved, f, indent=2, sort_keys=True)
+        print(f"baseline saved to {args.baseline}")
+        return
+    if not os.path.exists(args.baseline):
+        print("no baseline to compare with (use --save-baseline)")
+        return
+    with open(args.baseline, "r", encoding="utf-8") as f:
+        base = json.load(f)
+    found = [msg for n in names if n in base for msg in regressions(n, results[n], base[n], args.tolerance)]
+    for msg in found:
+        print("REGRESSION", msg)
+    if found:
+        sys.exit(1)
+    print(f"no regressions vs {os.path.relpath(args.baseline, ROOT)} (tolerance {args.tolerance:.0%})")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,260 @@
+"""
+Local stand-in for huggingface.co and api.github.com, serving recorded pages.
+
+    python -m benchmarks.replay_server --port 8765 --latency 0.05 --p429 0.02
+    HF_BASE=http://127.0.0.1:8765 GITHUB_API=http://127.0.0.1:8765/gh uvicorn app.main:app
+
+Responses come from a fixtures directory (--fixtures DIR: manifest.json
+mapping "path?query" -> {"status", "content_type", "file"}, bodies may use
+{BASE} for the server's own URL) or, by default, from a deterministic
+synthetic corpus shaped like HF listing/profile/model pages, personal sites
+and GitHub events/repos/commits JSON (--dump DIR writes it as fixtures).
+Requests are looked up by path + query, then by path alone. The server is
+also a plain-HTTP proxy: absolute-URI requests for other hosts (links to
+http://github.com/..., personal sites) are answered from "http://host/path"
+fixtures, so with HTTP_PROXY pointing here nothing leaves the machine.
+
+Every response waits --latency seconds (+/- --jitter); a --p429 share of
+them is answered 429 with Retry-After. Control endpoints:
+  GET /_stats                   request counts per route, 429s served
+  GET /_reset                   zero the counters
+  GET /_config?latency=&p429=   change latency / 429 share at runtime
+"""
+import argparse, hashlib, json, os, random, sys, threading, time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import parse_qsl, urlencode, urlparse
+
+_FILLER = ("<div class=\"card\"><a href=\"/docs/hub\">Docs</a><p>Trained on a mixture of public "
+           "datasets; evaluation results are reported in the model card below.</p></div>")
+
+def synthetic_corpus(users: int = 200, page_size: int = 30, seed: int = 19) -> dict:
+    """path[?query] -> (status, content_type, body) for `users` HF accounts."""
+    rnd = random.Random(seed)
+    names = [f"user{i:04d}" for i in range(users)]
+    orgs = max(1, users // 8)  # GitHub accounts are shared by several HF users
+    fx: dict = {}
+    html, js = "text/html; charset=utf-8", "application/json"
+
+    # listing: HTML pages and the JSON API with Link cursors
+    pages = (users + page_size - 1) // page_size
+    base_q = {"sort": "downloads", "direction": "-1", "limit": str(page_size)}
+    for p in range(pages):
+        chunk = names[p * page_size:(p + 1) * page_size]
+        cards = "".join(f'<article><a href="/{u}/model-0"><h4>{u}/model-0</h4></a></article>' for u in chunk)
+        nav = "".join(f'<a href="/{x}">{x}</a>' for x in ("models", "datasets", "spaces", "docs"))
+        fx[f"/models?p={p + 1}&sort=downloads"] = (200, html, f"<html><body>{nav}{cards}{_FILLER * 30}</body></html>")
+        q = dict(base_q, **({"cursor": str(p)} if p else {}))
+        fx["/api/models?" + urlencode(q)] = (200, js, json.dumps([{"id": f"{u}/model-0"} for u in chunk]))
+
+    for i, u in enumerate(names):
+        gh = f"gh-org{i % orgs}"
+        links = f'<a href="http://github.com/{gh}">GitHub</a>'
+        text = ""
+        if i % 3 == 0:
+            links += f'<a href="http://{u}.sites.test/">Homepage</a>'
+        if i % 5 == 0:
+            text = f"<p>Contact: {u}@uni{i % 13}.edu</p>"
+        fx[f"/{u}"] = (200, html, f"<html><body><h1>{u}</h1>{links}{text}{_FILLER * 40}</body></html>")
+        models = "".join(f'<a href="/{u}/model-{k}">{u}/model-{k}</a>' for k in range(3))
+        fx[f"/{u}?p=1&sort=models"] = (200, html, f"<html><body>{models}{_FILLER * 20}</body></html>")
+        for k in range(3):
+            card = f"<p>maintainer: {u} [at] lab{i % 7} [dot] org</p>" if (i + k) % 7 == 0 else ""
+            fx[f"/{u}/model-{k}"] = (200, html, f'<html><body><a href="http://github.com/{gh}/m{k}">code</a>'
+                                                f"{card}{_FILLER * 60}</body></html>")
+        site = f"http://{u}.sites.test"
+        contact = f"<p>write to {u} (at) site{i} (dot) com</p>" if i % 2 else "<p>use the form</p>"
+        fx[f"{site}/"] = (200, html, f'<html><a href="/contact">Contact</a>{_FILLER * 10}{contact if i % 4 == 1 else ""}</html>')
+        fx[f"{site}/contact"] = (200, html, contact)
+
+    for o in range(orgs):
+        gh = f"gh-org{o}"
+        # github.com HTML, fetched when a GitHub link is also treated as a website
+        fx[f"http://github.com/{gh}"] = (200, html, f"<html><body><h1>{gh}</h1>{_FILLER * 50}</body></html>")
+        for k in range(3):
+            fx[f"http://github.com/{gh}/m{k}"] = (200, html, f"<html><body>{gh}/m{k}{_FILLER * 50}</body></html>")
+        events = [] if o % 2 else [{"type": "PushEvent", "payload": {"commits": [
+            {"author": {"email": f"dev{o}.{k}@gmail.com"}} for k in range(rnd.randint(1, 3))]}}]
+        fx[f"/gh/users/{gh}/events/public"] = (200, js, json.dumps(events))
+        fx[f"/gh/users/{gh}/repos"] = (200, js, json.dumps(
+            [{"name": f"repo{r}", "owner": {"type": "Organization"}} for r in range(4)]))
+        for r in range(4):
+            fx[f"/gh/repos/{gh}/repo{r}/commits"] = (200, js, json.dumps([
+                {"commit": {"author": {"email": f"{gh}.r{r}.c{c}@gmail.com"},
+                            "committer": {"email": "noreply@github.com"}}} for c in range(5)]))
+    return fx
+
+def load_fixtures(path: str) -> dict:
+    with open(os.path.join(path, "manifest.json"), "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    fx = {}
+    for key, meta in manifest.items():
+        with open(os.path.join(path, meta["file"]), "r", encoding="utf-8") as f:
+            fx[key] = (meta.get("status", 200), meta.get("content_type", "text/html"), f.read())
+    return fx
+
+def dump_fixtures(fx: dict, path: str) -> None:
+    os.makedirs(path, exist_ok=True)
+    manifest = {}
+    for n, (key, (status, ctype, body)) in enumerate(sorted(fx.items())):
+        name = f"{n:06d}.{'json' if 'json' in ctype else 'html'}"
+        with open(os.path.join(path, name), "w", encoding="utf-8") as f:
+            f.write(body)
+        manifest[key] = {"status": status, "content_type": ctype, "file": name}
+    with open(os.path.join(path, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=1)
+
+class ReplayServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, addr, fixtures: dict, latency: float = 0.0, jitter: float = 0.0,
+                 p429: float = 0.0, retry_after: int = 1, seed: int = 0):
+        super().__init__(addr, _Handler)
+        self.fixtures = fixtures
+        self.latency, self.jitter, self.p429, self.retry_after = latency, jitter, p429, retry_after
+        self.rnd = random.Random(seed)
+        self.lock = threading.Lock()
+        self.reset()
+
+    @property
+    def base(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def reset(self) -> None:
+        with self.lock:
+            self.stats = {"requests": 0, "429": 0, "304": 0, "404": 0, "routes": {}}
+
+    def handle_error(self, request, client_address) -> None:
+        # clients that stop reading a body (streaming fetches) reset the connection
+        if not isinstance(sys.exc_info()[1], (ConnectionResetError, BrokenPipeError)):
+            super().handle_error(request, client_address)
+
+    def count(self, route: str, status: int) -> None:
+        with self.lock:
+            self.stats["requests"] += 1
+            self.stats["routes"][route] = self.stats["routes"].get(route, 0) + 1
+            if str(status) in self.stats:
+                self.stats[str(status)] += 1
+
+def _route(path: str) -> str:
+    parts = [p for p in path.split("/") if p]
+    if not parts:
+        return "/"
+    if parts[0] == "gh":
+        return "gh:" + {"public": "events"}.get(parts[-1], parts[-1])
+    if parts[0] in ("api", "models", "site"):
+        return parts[0]
+    return "profile" if len(parts) == 1 else "model"
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # one buffered write per response: headers and body in separate segments
+    # hit Nagle + delayed ACK and add ~40ms to every keep-alive request
+    wbufsize = 64 * 1024
+    disable_nagle_algorithm = True
+    server: ReplayServer
+
+    def log_message(self, *a):
+        pass
+
+    def _send(self, status: int, body: bytes, ctype: str, headers: dict = None) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", ctype)
+        self.send_header("Content-Length", str(len(body)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        srv = self.server
+        u = urlparse(self.path)
+        if u.path.startswith("/_"):
+            return self._control(u)
+        delay = srv.latency + (srv.rnd.uniform(-srv.jitter, srv.jitter) if srv.jitter else 0.0)
+        if delay > 0:
+            time.sleep(delay)
+        route = "external" if u.netloc and u.netloc != srv.base.split("//", 1)[1] else _route(u.path)
+        if srv.p429 and srv.rnd.random() < srv.p429:
+            srv.count(route, 429)
+            return self._send(429, b"slow down", "text/plain", {"Retry-After": str(srv.retry_after)})
+
+        q = dict(parse_qsl(u.query))
+        q.pop("per_page", None); q.pop("author", None)
+        path = u.path or "/"
+        if u.netloc and u.netloc != srv.base.split("//", 1)[1]:
+            path = f"http://{u.netloc}{path}"  # proxied request for another host
+        key = path + ("?" + urlencode(q) if q else "")
+        hit = srv.fixtures.get(key) or srv.fixtures.get(path)
+        if hit is None:
+            srv.count(route, 404)
+            return self._send(404, b"not found", "text/plain")
+        status, ctype, body = hit
+        data = body.replace("{BASE}", srv.base).encode("utf-8")
+        headers = {"ETag": '"%s"' % hashlib.md5(data).hexdigest()}
+        if u.path.startswith("/api/models"):
+            nxt = _next_cursor(srv, u.path, q)
+            if nxt:
+                headers["Link"] = f'<{srv.base}{nxt}>; rel="next"'
+        if status == 200 and self.headers.get("If-None-Match") == headers["ETag"]:
+            srv.count(route, 304)
+            return self._send(304, b"", ctype, headers)
+        srv.count(route, status)
+        self._send(status, data, ctype, headers)
+
+    def _control(self, u):
+        srv = self.server
+        if u.path == "/_stats":
+            with srv.lock:
+                body = json.dumps(srv.stats)
+            return self._send(200, body.encode(), "application/json")
+        if u.path == "/_reset":
+            srv.reset()
+            return self._send(200, b"{}", "application/json")
+        if u.path == "/_config":
+            q = dict(parse_qsl(u.query))
+            srv.latency = float(q.get("latency", srv.latency))
+            srv.jitter = float(q.get("jitter", srv.jitter))
+            srv.p429 = float(q.get("p429", srv.p429))
+            return self._send(200, json.dumps({"latency": srv.latency, "jitter": srv.jitter,
+                                               "p429": srv.p429}).encode(), "application/json")
+        return self._send(404, b"", "text/plain")
+
+def _next_cursor(srv: ReplayServer, path: str, q: dict):
+    cur = int(q.get("cursor", "0")) + 1
+    nq = dict(q, cursor=str(cur))
+    key = path + "?" + urlencode(nq)
+    return key if key in srv.fixtures else None
+
+def serve(port: int = 0, fixtures: dict = None, **kw) -> ReplayServer:
+    """Start a server on a background thread (port 0 = any free port)."""
+    srv = ReplayServer(("127.0.0.1", port), fixtures if fixtures is not None else synthetic_corpus(), **kw)
+    threading.Thread(target=srv.serve_forever, name="replay-server", daemon=True).start()
+    return srv
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--fixtures", default="", help="directory with manifest.json (recorded responses)")
+    ap.add_argument("--users", type=int, default=200, help="synthetic corpus size")
+    ap.add_argument("--dump", default="", help="write the synthetic corpus as fixtures and exit")
+    ap.add_argument("--latency", type=float, default=0.0)
+    ap.add_argument("--jitter", type=float, default=0.0)
+    ap.add_argument("--p429", type=float, default=0.0, help="share of responses answered 429")
+    ap.add_argument("--retry-after", type=int, default=1)
+    args = ap.parse_args()
+
+    fx = load_fixtures(args.fixtures) if args.fixtures else synthetic_corpus(args.users)
+    if args.dump:
+        dump_fixtures(fx, args.dump)
+        print(f"wrote {len(fx)} fixtures to {args.dump}")
+        return
+    srv = ReplayServer(("127.0.0.1", args.port), fx, latency=args.latency, jitter=args.jitter,
+                       p429=args.p429, retry_after=args.retry_after)
+    print(f"serving {len(fx)} fixtures on {srv.base}", flush=True)
+    try:
+        srv.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,73 @@
+from app.services.scraper import _RunState, _UserHits
+from app.services.stage_scheduler import StageScheduler
+from app.utils.checkpoint import CrawlCheckpoint
+from app.utils.email_index import EmailIndex
+from app.utils.jsonl_writer import JsonlWriter
+from app.utils.stage_stats import StageStats
+
+def test_resume_picks_up_pending_users_cursor_and_counters(tmp_path):
+    path = str(tmp_path / "ck.sqlite")
+    ck = CrawlCheckpoint(path)
+    ck.start({"email_limit": 10})
+    ck.add_page(["alice", "bob"], {"page": 2})
+    ck.add_page(["carol", "alice"], {"page": 3})
+    ck.stage("bob", "hf_models")
+    ck.user_done("alice", {"found": 1})
+
+    again = CrawlCheckpoint(path)
+    assert again.resumable()
+    assert again.params == {"email_limit": 10}
+    assert again.pending() == ["bob", "carol"]  # discovery order, done users left out
+    assert again.users() == {"alice", "bob", "carol"}
+    assert again.cursor == {"page": 3}
+    assert again.counters == {"found": 1}
+    assert again.summary()["users_by_stage"] == {"done": 1, "hf_models": 1, "": 1}
+
+    again.finish()
+    assert not CrawlCheckpoint(path).resumable()
+
+def test_start_clears_the_previous_run(tmp_path):
+    ck = CrawlCheckpoint(str(tmp_path / "ck.sqlite"))
+    ck.start({})
+    ck.add_page(["alice"], {"page": 2})
+    ck.start({"email_limit": 5})
+    assert ck.pending() == [] and ck.cursor is None and ck.counters is None
+
+def test_user_is_checkpointed_only_once_their_rows_are_on_disk(tmp_path):
+    out = str(tmp_path / "emails.jsonl")
+    ck = CrawlCheckpoint(str(tmp_path / "ck.sqlite"))
+    ck.start({})
+    ck.add_page(["alice", "bob"], {"page": 2})
+    index = EmailIndex(out)
+    writer = JsonlWriter(out, on_flush=index.commit, flush_interval=60, batch_size=1000)
+    state = _RunState(10, index, writer, ck, StageScheduler(stats=StageStats("")))
+
+    hits = _UserHits()
+    state.record("alice", ["alice@corp.com"], "website", hits)
+    state.user_done("alice", hits)
+    assert ck.pending() == ["alice", "bob"]  # row still queued in the writer
+
+    writer.flush()
+    assert ck.pending() == ["bob"]
+    assert ck.counters["found"] == 1 and ck.counters["users_with_hits"] == 1
+    writer.close()
+
+def test_user_is_not_checkpointed_when_their_rows_failed_to_write(tmp_path):
+    out = str(tmp_path / "emails.jsonl")
+    ck = CrawlCheckpoint(str(tmp_path / "ck.sqlite"))
+    ck.start({})
+    ck.add_page(["alice"], {"page": 2})
+    index = EmailIndex(out)
+    writer = JsonlWriter(out, on_flush=index.commit, on_error=index.release)
+    writer._f.close()  # every write fails
+    state = _RunState(10, index, writer, ck, StageScheduler(stats=StageStats("")))
+
+    hits = _UserHits()
+    state.record("alice", ["alice@corp.com"], "website", hits)
+    state.user_done("alice", hits)
+    try:
+        writer.close()
+    except ValueError:
+        pass
+    assert ck.pending() == ["alice"]
+    assert not index.seen("alice", "alice@corp.com")  # reservation released
@@ -0,0 +1,73 @@
+import json
+
+from app.services.compactor import compact
+from app.utils.jsonl_writer import JsonlWriter
+
+def _write(path, rows):
+    with open(path, "w", encoding="utf-8") as f:
+        for r in rows:
+            f.write(json.dumps(r) + "\n")
+    return str(path)
+
+def _read(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+def _inputs(tmp_path):
+    a = _write(tmp_path / "a.jsonl", [
+        {"username": "u1", "email": "Zed@Corp.com", "source": "website"},
+        {"username": "u2", "email": "amy@corp.com", "source": "github"},
+        {"username": "u3", "email": "zed@corp.com", "source": "github"},
+        {"username": "u1", "email": "not-an-email", "source": "website"},
+    ])
+    b = _write(tmp_path / "b.jsonl", [
+        {"username": "u9", "email": "amy@corp.com", "source": "website"},
+        {"username": "u2", "email": " amy@corp.com", "source": "huggingface-profile"},
+        {"username": "u4", "email": "bob@corp.com", "source": "website"},
+    ])
+    return [a, b]
+
+def test_first_occurrence_wins_and_output_is_sorted(tmp_path):
+    out = str(tmp_path / "out.jsonl")
+    # one row per run file and fan-in 2: exercises the multi-level merge
+    stats = compact(_inputs(tmp_path), out, chunk_rows=1, fanin=2)
+    assert _read(out) == [
+        {"username": "u2", "email": "amy@corp.com", "source": "github"},
+        {"username": "u4", "email": "bob@corp.com", "source": "website"},
+        {"username": "u1", "email": "zed@corp.com", "source": "website"},
+    ]
+    assert (stats["read"], stats["invalid"], stats["duplicates"], stats["written"]) == (7, 1, 3, 3)
+
+def test_keep_shared_keeps_one_row_per_username(tmp_path):
+    out = str(tmp_path / "out.jsonl")
+    compact(_inputs(tmp_path), out, keep_shared=True, chunk_rows=2, fanin=2)
+    assert [(r["email"], r["username"], r["source"]) for r in _read(out)] == [
+        ("amy@corp.com", "u2", "github"),
+        ("amy@corp.com", "u9", "website"),
+        ("bob@corp.com", "u4", "website"),
+        ("zed@corp.com", "u1", "website"),
+        ("zed@corp.com", "u3", "github"),
+    ]
+
+def test_output_may_be_one_of_the_inputs(tmp_path):
+    a, b = _inputs(tmp_path)
+    compact([a, b], a)
+    assert [r["email"] for r in _read(a)] == ["amy@corp.com", "bob@corp.com", "zed@corp.com"]
+
+def test_existing_output_is_kept_when_not_listed(tmp_path):
+    out = _write(tmp_path / "out.jsonl", [{"username": "u0", "email": "amy@corp.com", "source": "website"},
+                                          {"username": "u0", "email": "old@corp.com", "source": "website"}])
+    compact(_inputs(tmp_path), out)
+    rows = _read(out)
+    assert [r["email"] for r in rows] == ["amy@corp.com", "bob@corp.com", "old@corp.com", "zed@corp.com"]
+    assert rows[0]["username"] == "u0"  # the output counts as the first input
+
+def test_open_writer_appends_to_the_compacted_file(tmp_path):
+    out = _write(tmp_path / "out.jsonl", [{"username": "u0", "email": "old@corp.com"}])
+    writer = JsonlWriter(out)
+    writer.write({"username": "u1", "email": "before@corp.com"})
+    writer.flush()
+    compact([out], out)
+    writer.write({"username": "u2", "email": "after@corp.com"})
+    writer.close()
+    assert [r["email"] for r in _read(out)] == ["before@corp.com", "old@corp.com", "after@corp.com"]
@@ -0,0 +1,51 @@
+import json, time
+
+from app.services import scraper
+from app.services.crawler import run_crawl
+from app.services.stage_scheduler import StageScheduler
+from app.utils.checkpoint import CrawlCheckpoint
+from app.utils.email_index import EmailIndex
+from app.utils.jsonl_writer import JsonlWriter
+from app.utils.stage_stats import StageStats
+
+def _run(tmp_path, users, limit, per_user, concurrency, monkeypatch):
+    monkeypatch.setattr(scraper, "_PER_USER_MAX", per_user)
+    out = str(tmp_path / "emails.jsonl")
+    ck = CrawlCheckpoint(str(tmp_path / "ck.sqlite"))
+    ck.start({})
+    ck.add_page(users, {"page": 2})
+    index = EmailIndex(out)
+    visited = []
+
+    with JsonlWriter(out, on_flush=index.commit) as writer:
+        state = scraper._RunState(limit, index, writer, ck, StageScheduler(stats=StageStats("")))
+
+        def visit(user):
+            visited.append(user)
+            hits = scraper._UserHits()
+            for stage in range(3):  # three stages, two addresses each
+                time.sleep(0.001)
+                state.record(user, [f"{user}.{stage}.{i}@corp.com" for i in range(2)], "website", hits)
+            state.user_done(user, hits)
+
+        run_crawl(iter(users), visit, state.done, concurrency, queue_size=2)
+    with open(out, encoding="utf-8") as f:
+        rows = [json.loads(line) for line in f]
+    return state, rows, visited
+
+def test_concurrent_crawl_stops_at_the_email_limit(tmp_path, monkeypatch):
+    users = [f"user{i}" for i in range(50)]
+    state, rows, visited = _run(tmp_path, users, 17, 0, 8, monkeypatch)
+    assert state.found == len(rows) == 17
+    assert len({r["email"] for r in rows}) == 17
+    assert len(visited) < len(users)  # the producer and workers stop once the limit is reached
+
+def test_concurrent_crawl_keeps_the_per_user_cap(tmp_path, monkeypatch):
+    users = [f"user{i}" for i in range(20)]
+    state, rows, visited = _run(tmp_path, users, 10**6, 2, 8, monkeypatch)
+    assert sorted(visited) == sorted(users)
+    per_user = {}
+    for r in rows:
+        per_user[r["username"]] = per_user.get(r["username"], 0) + 1
+    assert per_user == {u: 2 for u in users}
+    assert state.users_with_hits == state.users_visited == 20
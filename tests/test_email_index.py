@@ -0,0 +1,80 @@
+import json
+
+from app.utils.email_index import EmailIndex
+
+def _write(path, rows, mode="w"):
+    with open(path, mode, encoding="utf-8") as f:
+        for r in rows:
+            f.write(json.dumps(r, ensure_ascii=False) + "\n")
+
+ROWS = [
+    {"username": "alice", "email": "alice@corp.com", "source": "website"},
+    {"username": "bob", "email": "bob@lab.com", "source": "github"},
+    {"username": "alice", "email": "a.l@lab.com", "source": "github"},
+    {"username": "carol", "email": "cärol@corp.com", "source": "huggingface-profile"},
+]
+
+def test_rebuild_from_existing_file(tmp_path):
+    path = str(tmp_path / "emails.jsonl")
+    _write(path, ROWS)
+    index = EmailIndex(path)
+    index.sync()
+    assert index.seen("anyone", "bob@lab.com")
+    assert index.seen("alice", "a.l@lab.com")
+    assert not index.seen("anyone", "dave@corp.com")
+
+def test_appended_rows_are_folded_in_and_a_replaced_file_is_rebuilt(tmp_path):
+    path = str(tmp_path / "emails.jsonl")
+    _write(path, ROWS[:2])
+    index = EmailIndex(path)
+    index.sync()
+    _write(path, ROWS[2:], mode="a")
+    index.sync()
+    assert len(index.find(limit=10)) == 4
+
+    _write(path, [ROWS[3]])  # rewritten (e.g. compacted)
+    index.sync()
+    assert [h[2] for h in index.find(limit=10)] == ["cärol@corp.com"]
+    assert not index.seen("anyone", "alice@corp.com")
+
+def test_index_survives_reopen(tmp_path):
+    path = str(tmp_path / "emails.jsonl")
+    _write(path, ROWS)
+    EmailIndex(path).sync()
+    again = EmailIndex(path)
+    assert again.offset == len("".join(json.dumps(r, ensure_ascii=False) + "\n" for r in ROWS).encode("utf-8"))
+    assert again.seen("alice", "a.l@lab.com")
+
+def test_reserve_commit_and_release(tmp_path):
+    path = str(tmp_path / "emails.jsonl")
+    _write(path, [])
+    index = EmailIndex(path)
+    index.reserve("dave", "dave@corp.com")
+    index.reserve("erin", "erin@corp.com")
+    assert index.seen("x", "dave@corp.com") and index.seen("x", "erin@corp.com")
+    row = {"username": "dave", "email": "dave@corp.com", "source": "website"}
+    _write(path, [row], mode="a")
+    with open(path, "rb") as f:
+        end = len(f.read())
+    index.commit([row], end)
+    index.release([{"username": "erin", "email": "erin@corp.com"}])
+    assert index.seen("x", "dave@corp.com")
+    assert not index.seen("x", "erin@corp.com")
+    assert index.read_rows(index.find(username="dave")) == [row]
+
+def test_commit_folds_in_rows_appended_by_someone_else(tmp_path):
+    path = str(tmp_path / "emails.jsonl")
+    _write(path, ROWS[:1])
+    index = EmailIndex(path)
+    index.sync()
+    _write(path, ROWS[1:3], mode="a")  # e.g. a merged shard, not seen by this index
+    row = ROWS[3]
+    _write(path, [row], mode="a")
+    with open(path, "rb") as f:
+        end = len(f.read())
+    index.commit([row], end)
+    assert index.offset == end
+    assert index.seen("anyone", "bob@lab.com")
+    assert [h[2] for h in index.find(limit=10)] == [r["email"] for r in ROWS]
+    index.commit([row], end)  # again, e.g. after a sync got there first
+    assert index.offset == end and len(index.find(limit=10)) == 4
@@ -0,0 +1,34 @@
+import json
+
+from app.utils.email_index import EmailIndex
+
+def _write(path, rows, mode="w"):
+    with open(path, mode, encoding="utf-8") as f:
+        for r in rows:
+            f.write(json.dumps(r, ensure_ascii=False) + "\n")
+
+ROWS = [
+    {"username": "alice", "email": "alice@corp.com", "source": "website"},
+    {"username": "bob", "email": "bob@lab.com", "source": "github"},
+    {"username": "alice", "email": "a.l@lab.com", "source": "github"},
+    {"username": "carol", "email": "cärol@corp.com", "source": "huggingface-profile"},
+]
+
+def test_find_by_filters_and_pages(tmp_path):
+    path = str(tmp_path / "emails.jsonl")
+    _write(path, ROWS)
+    index = EmailIndex(path)
+    index.sync()
+
+    def emails(hits):
+        return [r["email"] for r in index.read_rows(hits)]
+
+    assert emails(index.find(username="alice")) == ["alice@corp.com", "a.l@lab.com"]
+    assert emails(index.find(domain="@LAB.com")) == ["bob@lab.com", "a.l@lab.com"]
+    assert emails(index.find(source="github", username="bob")) == ["bob@lab.com"]
+    assert emails(index.find(limit=2)) == ["a.l@lab.com", "cärol@corp.com"]  # the last page
+    first = index.find(limit=2, after=0)
+    assert emails(first) == ["alice@corp.com", "bob@lab.com"]
+    assert emails(index.find(limit=2, after=first[-1][0] + 1)) == ["a.l@lab.com", "cärol@corp.com"]
+    assert emails(index.find(limit=1, before=first[-1][0])) == ["alice@corp.com"]
+    assert [h[2] for h in index.iter_find(domain="corp.com", batch=1)] == ["alice@corp.com", "cärol@corp.com"]
@@ -0,0 +1,29 @@
+from app.utils.email_utils import EmailStreamScanner, extract_emails
+
+TEXT = (
+    "<html><p>Contact: jane.doe@example.com or ops (at) example [dot] com</p>"
+    "<a href='mailto:Büro@münchen-lab.com'>mail</a> team@corp.com, dup jane.doe@example.com "
+    + "filler " * 300
+    + "<p>noreply@github.com 123+x@users.noreply.github.com last@tail-co.com</p>"
+    + "x" * 3000 + " split@chunked.com</html>"
+)
+
+def _scan(data: bytes, size: int, **kw) -> list:
+    scanner = EmailStreamScanner(**kw)
+    for i in range(0, len(data), size):
+        scanner.feed(data[i:i + size], "utf-8")
+    scanner.close()
+    return scanner.found
+
+def test_any_chunking_matches_one_call_on_the_whole_text():
+    data = TEXT.encode("utf-8")
+    expected = extract_emails(TEXT)
+    assert "team@corp.com" in expected and "last@tail-co.com" in expected
+    for size in (1, 2, 3, 7, 64, 500, 4096, len(data)):
+        assert _scan(data, size) == expected, size
+
+def test_long_runs_without_separators_are_scanned_with_overlap():
+    text = "a" * 5000 + " mid@longrun.com " + "b" * 5000
+    data = text.encode("utf-8")
+    for size in (100, 1000):
+        assert _scan(data, size, max_carry=1024, overlap=128) == extract_emails(text)
@@ -0,0 +1,51 @@
+import gzip, json, os
+
+from app.services import exporter
+from app.services.exporter import export_ndjson, export_rows
+from app.services.verifier import get_store
+
+ROWS = [
+    {"username": "alice", "email": "alice@corp.com", "source": "website"},
+    {"username": "bob", "email": "bob@lab.com", "source": "github"},
+    {"username": "alice", "email": "A.L@Lab.com", "source": "github"},
+    {"username": "carol", "email": "carol@corp.com", "source": "huggingface-profile"},
+    {"username": "dave", "email": "dave@lab.com", "source": "github"},
+]
+
+def _file(tmp_path):
+    path = str(tmp_path / "emails.jsonl")
+    with open(path, "w", encoding="utf-8") as f:
+        for r in ROWS:
+            f.write(json.dumps(r) + "\n")
+    return path
+
+def _emails(rows):
+    return [r["email"] for r in rows]
+
+def test_filters_combine_and_keep_file_order(tmp_path, monkeypatch):
+    monkeypatch.setattr(exporter, "_LOOKUP_ROWS", 2)  # several index/store chunks
+    path = _file(tmp_path)
+    assert _emails(export_rows(path)) == _emails(ROWS)
+    assert _emails(export_rows(path, domain="@LAB.COM")) == ["bob@lab.com", "A.L@Lab.com", "dave@lab.com"]
+    assert _emails(export_rows(path, source="github", username="alice")) == ["A.L@Lab.com"]
+    assert _emails(export_rows(path, source="github", domain="corp.com")) == []
+    assert list(export_rows(str(tmp_path / "missing.jsonl"))) == []
+
+def test_status_filter_and_field(tmp_path, monkeypatch):
+    monkeypatch.setattr(exporter, "_LOOKUP_ROWS", 2)
+    path = _file(tmp_path)
+    get_store(path).save([{"email": "bob@lab.com", "status": "valid", "reasons": []},
+                          {"email": "a.l@lab.com", "status": "invalid", "reasons": []}], os.path.getsize(path))
+    assert _emails(export_rows(path, status="valid")) == ["bob@lab.com"]
+    assert _emails(export_rows(path, domain="lab.com", status="unverified")) == ["dave@lab.com"]
+    rows = list(export_rows(path, source="github", with_status=True))
+    assert [r["verification"] for r in rows] == ["valid", "invalid", "unverified"]
+
+def test_ndjson_chunks_and_gzip_round_trip(tmp_path):
+    chunks = list(export_ndjson(iter(ROWS), chunk_bytes=100))
+    assert len(chunks) > 1
+    plain = b"".join(chunks)
+    assert [json.loads(line) for line in plain.decode("utf-8").splitlines()] == ROWS
+    packed = list(export_ndjson(iter(ROWS), gzip=True, chunk_bytes=100))
+    assert gzip.decompress(b"".join(packed)) == plain
+    assert gzip.decompress(b"".join(export_ndjson(iter([]), gzip=True))) == b""
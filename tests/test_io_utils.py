@@ -0,0 +1,58 @@
+import json
+
+from app.utils import io_utils
+from app.utils.io_utils import page_jsonl
+
+def _file(tmp_path, n):
+    path = str(tmp_path / "emails.jsonl")
+    with open(path, "w", encoding="utf-8") as f:
+        for i in range(n):
+            f.write(json.dumps({"i": i, "email": f"u{i}@cörp.com"}, ensure_ascii=False) + "\n")
+    return path
+
+def _ids(rows):
+    return [r["i"] for r in rows]
+
+def test_forward_cursor_round_trip_covers_every_row_once(tmp_path):
+    path = _file(tmp_path, 23)
+    seen, after = [], 0
+    while True:
+        rows, start, end = page_jsonl(path, 5, after=after)
+        if not rows:
+            break
+        seen += _ids(rows)
+        after = end
+    assert seen == list(range(23))
+
+def test_reverse_paging_from_the_tail(tmp_path, monkeypatch):
+    monkeypatch.setattr(io_utils, "_BLOCK", 16)  # lines span read blocks
+    path = _file(tmp_path, 23)
+    rows, start, end = page_jsonl(path, 5)
+    assert _ids(rows) == [18, 19, 20, 21, 22]
+    seen = _ids(rows)
+    while start > 0:
+        rows, start, _ = page_jsonl(path, 5, before=start)
+        seen = _ids(rows) + seen
+    assert seen == list(range(23))
+
+def test_cursors_of_one_page_lead_to_its_neighbours(tmp_path):
+    path = _file(tmp_path, 10)
+    rows, start, end = page_jsonl(path, 3, after=0)
+    rows, start, end = page_jsonl(path, 3, after=end)
+    assert _ids(rows) == [3, 4, 5]
+    assert _ids(page_jsonl(path, 3, before=start)[0]) == [0, 1, 2]
+    assert _ids(page_jsonl(path, 3, after=end)[0]) == [6, 7, 8]
+    assert _ids(page_jsonl(path, 3, after=start + 1)[0]) == [4, 5, 6]  # mid-line: next line boundary
+
+def test_partial_last_line_is_left_for_later(tmp_path):
+    path = _file(tmp_path, 3)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"i": 3, "ema')
+    rows, _, end = page_jsonl(path, 10, after=0)
+    assert _ids(rows) == [0, 1, 2]
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('il": "x@y.com"}\n')
+    assert _ids(page_jsonl(path, 10, after=end)[0]) == [3]
+
+def test_missing_file(tmp_path):
+    assert page_jsonl(str(tmp_path / "none.jsonl"), 5) == ([], 0, 0)
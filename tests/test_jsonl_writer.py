@@ -0,0 +1,60 @@
+import json, threading
+
+from app.utils.jsonl_writer import JsonlWriter
+
+def _lines(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+def test_batches_reach_on_flush_in_file_order(tmp_path):
+    path = str(tmp_path / "out.jsonl")
+    flushed = []
+    with JsonlWriter(path, on_flush=lambda rows, end: flushed.append((list(rows), end)), batch_size=3) as w:
+        for i in range(10):
+            w.write({"i": i})
+    assert [r["i"] for rows, _ in flushed for r in rows] == list(range(10))
+    size = 0
+    for rows, end in flushed:  # each end offset covers exactly the rows before it
+        size += sum(len((json.dumps(r) + "\n").encode()) for r in rows)
+        assert end == size
+    assert _lines(path) == [{"i": i} for i in range(10)]
+
+def test_after_flush_runs_once_earlier_rows_are_on_disk(tmp_path):
+    path = str(tmp_path / "out.jsonl")
+    events = []
+    w = JsonlWriter(path, on_flush=lambda rows, end: events.append(("flush", end)), flush_interval=60)
+    w.write({"i": 0})
+    w.after_flush(lambda: events.append(("done", len(_lines(path)))))
+    assert events == []  # still batching
+    w.flush()
+    assert events == [("flush", 9), ("done", 1)]
+    w.close()
+
+def test_rows_from_each_thread_keep_their_order(tmp_path):
+    path = str(tmp_path / "out.jsonl")
+    with JsonlWriter(path, max_queue=8, batch_size=5) as w:
+        threads = [threading.Thread(target=lambda t=t: [w.write({"t": t, "i": i}) for i in range(200)])
+                   for t in range(4)]
+        for th in threads:
+            th.start()
+        for th in threads:
+            th.join()
+    rows = _lines(path)
+    assert len(rows) == 800
+    for t in range(4):
+        assert [r["i"] for r in rows if r["t"] == t] == list(range(200))
+
+def test_failed_write_drops_rows_and_callbacks(tmp_path):
+    path = str(tmp_path / "out.jsonl")
+    dropped, done = [], []
+    w = JsonlWriter(path, on_error=dropped.extend)
+    w._f.close()
+    w.write({"i": 0})
+    w.after_flush(lambda: done.append(True))
+    try:
+        w.close()
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("the write error was not raised")
+    assert dropped == [{"i": 0}] and done == []
@@ -0,0 +1,45 @@
+import json, os
+
+from app.utils import kpi_from_file
+from app.utils.kpi_from_file import kpi_from_emails_jsonl
+
+def _append(path, rows, mode="a"):
+    with open(path, mode, encoding="utf-8") as f:
+        for r in rows:
+            f.write(json.dumps(r, ensure_ascii=False) + "\n")
+
+def _rows(start, n):
+    return [{"username": f"u{i % 4}", "email": f"e{i}@d{i % 3}.com",
+             "source": ("website", "github")[i % 2]} for i in range(start, start + n)]
+
+def _rebuilt(path):
+    """KPI from scratch: no in-memory or on-disk state."""
+    kpi_from_file._states.pop(os.path.abspath(path), None)
+    if os.path.exists(path + ".kpi.json"):
+        os.remove(path + ".kpi.json")
+    return kpi_from_emails_jsonl(path)
+
+def test_incremental_fold_matches_a_full_rebuild(tmp_path):
+    path = str(tmp_path / "emails.jsonl")
+    _append(path, _rows(0, 10) + [{"username": "u9", "email": "logo@x.png"}], mode="w")
+    first = kpi_from_emails_jsonl(path)
+    assert first["new_emails_written"] == 10
+    _append(path, _rows(10, 7))
+    kpi_from_file._states.clear()  # a restart: resume from <path>.kpi.json
+    assert kpi_from_emails_jsonl(path) == _rebuilt(path)
+    assert _rebuilt(path)["new_emails_written"] == 17
+
+def test_truncated_or_replaced_file_invalidates_the_state(tmp_path):
+    path = str(tmp_path / "emails.jsonl")
+    _append(path, _rows(0, 12), mode="w")
+    kpi_from_emails_jsonl(path)
+    _append(path, _rows(100, 3), mode="w")  # shorter file
+    kpi = kpi_from_emails_jsonl(path)
+    assert kpi["new_emails_written"] == 3
+    assert kpi == _rebuilt(path)
+
+    _append(path, _rows(0, 12), mode="w")
+    kpi_from_emails_jsonl(path)
+    rewritten = _rows(200, 12)  # same length, different rows
+    _append(path, rewritten, mode="w")
+    assert kpi_from_emails_jsonl(path) == _rebuilt(path)
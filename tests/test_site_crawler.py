@@ -0,0 +1,71 @@
+from collections import OrderedDict
+
+import pytest
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from app.services import site_crawler
+from app.utils import http_utils, parse_pool
+
+SITE = {
+    "http://lab.com/": "<p>old@lab.com</p><a href='/blog'>b</a><a href='/team'>t</a><a href='/contact'>c</a>",
+    "http://lab.com/contact": "<p>contact@lab.com</p><a href='/about'>a</a>",
+    "http://lab.com/team": "<p>team@lab.com</p>",
+    "http://lab.com/blog": "<p>never@lab.com</p>",
+}
+
+class _Robots:
+    def allowed(self, url):
+        return True
+
+@pytest.fixture
+def fetched(monkeypatch):
+    """Serve SITE through the real streaming code; returns the URLs fetched, in order."""
+    urls = []
+
+    def fake_get(url, target, headers=None, stream=None):
+        urls.append(url)
+        resp = requests.Response()
+        resp.status_code = 200 if url in SITE else 404
+        resp.url = url
+        resp.headers = CaseInsensitiveDict({"Content-Type": "text/html; charset=utf-8"})
+        resp.encoding = "utf-8"
+        http_utils._stream_body(resp, target, stream, http_utils._chunks(SITE.get(url, "").encode()))
+        return resp
+
+    monkeypatch.setattr(site_crawler, "timed_get", fake_get)
+    monkeypatch.setattr(site_crawler, "get_robots", lambda: _Robots())
+    monkeypatch.setattr(site_crawler, "parse_response",
+                        lambda resp, emails: parse_pool.parse_page(resp.content, resp.encoding, emails, workers=0))
+    monkeypatch.setattr(site_crawler, "_cache", OrderedDict())
+    monkeypatch.setattr(site_crawler, "SITE_MAX_PAGES", 4)
+    monkeypatch.setattr(site_crawler, "SITE_MAX_BYTES", 10**6)
+    return urls
+
+def test_candidates_are_fetched_by_priority_within_the_page_budget(fetched, monkeypatch):
+    monkeypatch.setattr(site_crawler, "SITE_MAX_PAGES", 3)
+    assert site_crawler.crawl_site("http://lab.com/", enough=0) == ["old@lab.com", "contact@lab.com", "team@lab.com"]
+    # contact before team (SITE_CANDIDATE_PATHS order); /blog is no candidate; depth 1 keeps /about out
+    assert fetched == ["http://lab.com/", "http://lab.com/contact", "http://lab.com/team"]
+
+def test_byte_budget_stops_the_crawl(fetched, monkeypatch):
+    monkeypatch.setattr(site_crawler, "SITE_MAX_BYTES", len(SITE["http://lab.com/"]) + 1)
+    site_crawler.crawl_site("http://lab.com/", enough=0)
+    assert fetched == ["http://lab.com/", "http://lab.com/contact"]  # the second page is cut at the budget
+
+def test_addresses_already_written_do_not_count_towards_enough(fetched):
+    found = site_crawler.crawl_site("http://lab.com/", enough=1, is_new=lambda e: e != "old@lab.com")
+    assert found == ["old@lab.com", "contact@lab.com"]
+    assert fetched == ["http://lab.com/", "http://lab.com/contact"]
+
+def test_only_full_crawls_are_cached(fetched, monkeypatch):
+    assert site_crawler.crawl_site("http://lab.com/", enough=1) == ["old@lab.com"]
+    assert "lab.com" not in site_crawler._cache  # cut short by `enough`
+    full = site_crawler.crawl_site("http://lab.com/", enough=0)
+    n = len(fetched)
+    assert site_crawler.crawl_site("http://www.lab.com/team", enough=1) == full  # same site, from the cache
+    assert len(fetched) == n
+
+    monkeypatch.setattr(site_crawler, "SITE_CACHE_SIZE", 1)
+    site_crawler.crawl_site("http://other.com/", enough=0)
+    assert list(site_crawler._cache) == ["other.com"]
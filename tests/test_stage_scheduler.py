@@ -0,0 +1,53 @@
+import random
+
+from app.services import stage_scheduler
+from app.services.stage_scheduler import STAGES, StageScheduler
+from app.utils.stage_stats import StageStats
+
+def _scheduler(**kw):
+    return StageScheduler(mode="adaptive", explore=0.0, skip_yield=0.05, min_requests=20,
+                          stats=StageStats(""), **kw)
+
+def test_fixed_order_ignores_yield():
+    s = StageScheduler(mode="fixed", stats=StageStats(""))
+    s.observe("hf_models", 100, 0)
+    assert s.plan() == list(STAGES)
+
+def test_ranks_by_yield_and_skips_dry_stages_after_min_requests():
+    s = _scheduler()
+    assert s.plan() == list(STAGES)  # untried: all equal, fixed order kept
+    s.observe("hf_models", 19, 0)  # below min_requests: still tried
+    s.observe("websites", 10, 5)
+    s.observe("github", 4, 1)
+    assert s.plan() == ["websites", "github", "hf_models"]
+    s.observe("hf_models", 1, 0)  # 20 requests, 0 emails
+    assert s.plan() == ["websites", "github"]
+    assert s.plan() == ["websites", "github"]
+    assert s.summary()["hf_models"]["skipped"] == 2
+    s.observe("hf_models", 0, 3)  # picks up again: 3 / 20 >= 0.05
+    assert s.plan() == ["websites", "github", "hf_models"]
+
+def test_explore_runs_every_stage_in_random_order(monkeypatch):
+    s = _scheduler()
+    s.observe("hf_models", 50, 0)
+    monkeypatch.setattr(random, "random", lambda: 0.0)  # below any explore share
+    s.explore = 0.1
+    monkeypatch.setattr(random, "shuffle", lambda order: order.reverse())
+    assert s.plan() == list(reversed(STAGES))
+    assert s.summary()["hf_models"]["skipped"] == 0
+    monkeypatch.setattr(random, "random", lambda: 0.5)
+    assert "hf_models" not in s.plan()
+
+def test_earlier_runs_are_a_scaled_down_prior(tmp_path, monkeypatch):
+    monkeypatch.setattr(stage_scheduler, "STAGE_PRIOR_REQUESTS", 100)
+    stats = StageStats(str(tmp_path / "stages.sqlite"))
+    first = StageScheduler(mode="adaptive", explore=0.0, skip_yield=0.05, min_requests=20, stats=stats)
+    first.observe("github", 1000, 0)
+    first.observe("websites", 10, 2)
+    first.save()
+
+    second = StageScheduler(mode="adaptive", explore=0.0, skip_yield=0.05, min_requests=20, stats=stats)
+    assert second.plan() == ["hf_models", "websites"]  # untried hf_models ranks first
+    # the 1000 dry requests count as 100, so a few good visits bring github back
+    second.observe("github", 10, 10)
+    assert second.plan() == ["hf_models", "websites", "github"]
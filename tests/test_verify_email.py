@@ -0,0 +1,40 @@
+import threading
+
+from app.utils import verify_email as ve
+from app.utils.verify_email import verify_batch
+
+def test_batch_does_one_lookup_and_one_session_per_domain(monkeypatch):
+    lookups, sessions = [], []
+    lock = threading.Lock()
+    def fake_lookup(domain, timeout=3.0):
+        with lock:
+            lookups.append(domain)
+        return [] if domain == "nomx.com" else [f"mx.{domain}"]
+    def fake_rcpt_many(mx, emails, timeout=6.0):
+        with lock:
+            sessions.append((mx, sorted(emails)))
+        return {e: not e.startswith("bad") for e in emails}
+    monkeypatch.setattr(ve, "_mx_lookup", fake_lookup)
+    monkeypatch.setattr(ve, "_rcpt_many", fake_rcpt_many)
+    monkeypatch.setattr(ve, "_MX_CACHE", {})
+
+    emails = ["A@corp.com", "bad@corp.com", "admin@other.com", "x@nomx.com",
+              "a@corp.com", "not-an-email", "y@mailinator.com"]
+    out = verify_batch(emails, do_smtp=True, concurrency=4)
+
+    assert sorted(lookups) == ["corp.com", "nomx.com", "other.com"]
+    assert sorted(sessions) == [("mx.corp.com", ["a@corp.com", "bad@corp.com"]),
+                                ("mx.other.com", ["admin@other.com"])]
+    assert [r["email"] for r in out] == emails  # input order, duplicates kept
+    assert [r["status"] for r in out] == ["valid", "invalid", "valid", "uncertain",
+                                          "valid", "invalid", "invalid"]
+    assert out[2]["reasons"] == ["role_account", "smtp_accept"]
+    assert out[3]["reasons"] == ["mx_unavailable_or_absent"]
+    assert out[6]["reasons"] == ["disposable_domain"]
+
+def test_batch_without_smtp_opens_no_session(monkeypatch):
+    monkeypatch.setattr(ve, "_mx_lookup", lambda domain, timeout=3.0: ["mx"])
+    monkeypatch.setattr(ve, "_rcpt_many", lambda *a, **k: (_ for _ in ()).throw(AssertionError("smtp")))
+    monkeypatch.setattr(ve, "_MX_CACHE", {})
+    out = verify_batch(["a@corp.com", "b@corp.com"], do_smtp=False)
+    assert [r["reasons"] for r in out] == [["mx_only_passed"]] * 2
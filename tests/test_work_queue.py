@@ -0,0 +1,95 @@
+import time
+
+from app.utils.work_queue import WorkQueue
+
+def _queue(tmp_path, users=("alice",), max_attempts=3) -> WorkQueue:
+    q = WorkQueue(str(tmp_path / "queue.sqlite"), max_attempts=max_attempts)
+    q.start({"email_limit": 10}, {"page": 1})
+    task_id, kind, _, payload = q.lease("w0", 60)
+    assert kind == "page" and payload == {"page": 1}
+    assert q.complete(task_id, "w0", users) == len(users)
+    return q
+
+def test_leased_task_is_hidden_until_its_lease_expires(tmp_path):
+    q = _queue(tmp_path)
+    task = q.lease("w1", 0.05)
+    assert task[2] == "alice"
+    assert q.lease("w2", 60) is None
+    time.sleep(0.1)
+    retry = q.lease("w2", 60)
+    assert retry[0] == task[0]
+    q.complete(retry[0], "w2")
+    assert q.idle()
+    assert q.counts() == {"page:done": 1, "user:done": 1}
+
+def test_extend_keeps_the_lease(tmp_path):
+    q = _queue(tmp_path)
+    task_id = q.lease("w1", 0.05)[0]
+    q.extend(task_id, "w1", 60)
+    time.sleep(0.1)
+    assert q.lease("w2", 60) is None
+
+def test_task_fails_after_max_attempts(tmp_path):
+    q = _queue(tmp_path, users=("alice", "bob"), max_attempts=2)
+    for _ in range(2):
+        task_id, _, key, _ = q.lease("w1", 60)
+        assert key == "alice"
+        q.release(task_id, "w1")
+    assert q.counts()["user:failed"] == 1
+    task_id, _, key, _ = q.lease("w1", 0.05)
+    assert key == "bob"
+    assert not q.idle()
+    time.sleep(0.1)  # the worker died; bob's lease expires
+    task_id, _, key, _ = q.lease("w2", 60)
+    assert key == "bob"
+    q.complete(task_id, "w2")
+    assert q.idle()
+    assert q.counts() == {"page:done": 1, "user:done": 1, "user:failed": 1}
+
+def test_unflushed_claims_of_an_expired_lease_are_released(tmp_path):
+    q = _queue(tmp_path)
+    q.lease("w1", 0.05)
+    assert q.claim("w1", "alice", "a1@corp.com", 10)
+    assert q.claim("w1", "alice", "a2@corp.com", 10)
+    assert not q.claim("w2", "alice", "a1@corp.com", 10)
+    q.flushed("w1", ["a1@corp.com"])
+    assert q.claimed() == 2
+    time.sleep(0.1)
+    assert q.lease("w2", 60)[2] == "alice"
+    assert q.claimed() == 1
+    assert not q.claim("w2", "alice", "a1@corp.com", 10)  # on disk in w1's shard
+    assert q.claim("w2", "alice", "a2@corp.com", 10)
+
+def test_claims_stop_at_the_limit(tmp_path):
+    q = _queue(tmp_path, users=("alice", "bob"))
+    assert q.lease("w1", 60)[2] == "alice" and q.lease("w2", 60)[2] == "bob"
+    assert q.claim("w1", "alice", "a1@corp.com", 2)
+    assert q.claim("w2", "bob", "b1@corp.com", 2)
+    assert not q.claim("w1", "alice", "a2@corp.com", 2)
+    assert q.claimed() == 2
+
+def test_a_worker_that_lost_its_lease_cannot_claim_or_complete(tmp_path):
+    q = _queue(tmp_path)
+    lost = q.lease("w1", 0.05)
+    time.sleep(0.1)
+    task_id = q.lease("w2", 60)[0]
+    assert not q.claim("w1", "alice", "a1@corp.com", 10)
+    assert q.complete(lost[0], "w1", ["mallory"]) == 0
+    assert q.counts() == {"page:done": 1, "user:leased": 1}  # still w2's, nothing enqueued
+    assert q.claim("w2", "alice", "a1@corp.com", 10)
+    q.complete(task_id, "w2")
+    assert q.idle()
+
+def test_heartbeat_renews_leases_and_keeps_the_worker_active(tmp_path):
+    q = _queue(tmp_path)
+    q.report("w1", {})
+    q.lease("w1", 0.05)
+    q.heartbeat("w1", 60)
+    time.sleep(0.1)
+    assert q.lease("w2", 60) is None
+    assert q.active_workers(stale=30) == ["w1"]
+    q.report("w1", {}, finished=True)
+    assert q.active_workers(stale=30) == ["w1"]  # finished, but its lease is still live
+    q.report("w3", {})
+    time.sleep(0.01)
+    assert q.active_workers(stale=0.005) == ["w1"]  # w3 stopped reporting without finishing